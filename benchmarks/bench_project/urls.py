@@ -0,0 +1,3 @@
+from django_scotty.helpers import load_scotty_urls
+
+urlpatterns = load_scotty_urls("benchapp")
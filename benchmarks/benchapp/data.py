@@ -0,0 +1,72 @@
+"""Datos sintéticos reproducibles para los benchmarks."""
+
+import datetime
+import random
+from decimal import Decimal
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Cliente, Pedido, Region
+
+REGIONES = 20
+# Un cliente cada tantos pedidos
+PEDIDOS_POR_CLIENTE = 100
+ESTADOS = [Pedido.NUEVO, Pedido.PREPARADO, Pedido.ENVIADO, Pedido.ARCHIVADO]
+# Distribución sesgada, como en una base real: pocos archivados
+PESOS_ESTADOS = [50, 25, 20, 5]
+
+
+def generate(rows, seed=0, batch_size=10000):
+    """Crear `rows` pedidos (con sus clientes y regiones) en una base vacía.
+
+    Con la misma `seed` los datos son siempre los mismos. Los pedidos se
+    insertan por lotes de `batch_size` sin tenerlos todos en memoria.
+    """
+    rng = random.Random(seed)
+    start = timezone.make_aware(datetime.datetime(2023, 1, 1))
+    minutes = 2 * 365 * 24 * 60
+
+    if connection.vendor == "sqlite":
+        with connection.cursor() as cursor:
+            # Solo para la carga inicial; la base se descarta si falla
+            cursor.execute("PRAGMA journal_mode = WAL")
+            cursor.execute("PRAGMA synchronous = OFF")
+
+    with transaction.atomic():
+        Region.objects.bulk_create(
+            Region(nombre=f"Región {n + 1}") for n in range(REGIONES)
+        )
+        region_ids = list(Region.objects.values_list("pk", flat=True))
+        clientes = max(rows // PEDIDOS_POR_CLIENTE, 10)
+        Cliente.objects.bulk_create(
+            (
+                Cliente(
+                    nombre=f"Cliente {n + 1}",
+                    region_id=rng.choice(region_ids),
+                    categoria=rng.choice(Cliente.CATEGORIAS)[0],
+                )
+                for n in range(clientes)
+            ),
+            batch_size=batch_size,
+        )
+        cliente_ids = list(Cliente.objects.values_list("pk", flat=True))
+
+        created = 0
+        while created < rows:
+            size = min(batch_size, rows - created)
+            estados = rng.choices(ESTADOS, weights=PESOS_ESTADOS, k=size)
+            Pedido.objects.bulk_create(
+                [
+                    Pedido(
+                        cliente_id=rng.choice(cliente_ids),
+                        estado=estado,
+                        prioridad=rng.randint(1, 3),
+                        monto=Decimal(rng.randint(100, 10_000_000)) / 100,
+                        creado=start + datetime.timedelta(minutes=rng.randrange(minutes)),
+                    )
+                    for estado in estados
+                ]
+            )
+            created += size
+    return created
@@ -0,0 +1,53 @@
+from django.db import models
+
+
+class Region(models.Model):
+    nombre = models.CharField(max_length=50)
+
+    def __str__(self):
+        return self.nombre
+
+
+class Cliente(models.Model):
+    CATEGORIAS = [
+        ("m", "Mayorista"),
+        ("n", "Minorista"),
+        ("d", "Distribuidor"),
+    ]
+
+    nombre = models.CharField(max_length=100)
+    region = models.ForeignKey(Region, on_delete=models.CASCADE)
+    categoria = models.CharField(max_length=1, choices=CATEGORIAS)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return self.nombre
+
+
+class Pedido(models.Model):
+    NUEVO = "n"
+    PREPARADO = "p"
+    ENVIADO = "e"
+    ARCHIVADO = "a"
+    ESTADOS = [
+        (NUEVO, "Nuevo"),
+        (PREPARADO, "Preparado"),
+        (ENVIADO, "Enviado"),
+        (ARCHIVADO, "Archivado"),
+    ]
+
+    class Prioridad(models.IntegerChoices):
+        BAJA = 1, "Baja"
+        MEDIA = 2, "Media"
+        ALTA = 3, "Alta"
+
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
+    estado = models.CharField(max_length=1, choices=ESTADOS, db_index=True)
+    prioridad = models.IntegerField(choices=Prioridad.choices)
+    monto = models.DecimalField(max_digits=12, decimal_places=2)
+    creado = models.DateTimeField()
+
+    class Meta:
+        ordering = ["id"]
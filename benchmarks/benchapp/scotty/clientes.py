@@ -0,0 +1,23 @@
+import django_tables2 as tables
+
+from django_scotty.helpers import CottonTableView, GenericDetailView
+
+from ..models import Cliente
+
+
+class ClienteTable(tables.Table):
+    region = tables.Column(accessor="region.nombre")
+
+    class Meta:
+        model = Cliente
+        fields = ["id", "nombre", "region", "categoria"]
+
+
+class ClienteView(CottonTableView):
+    model = Cliente
+    table_class = ClienteTable
+    filterset_fields = ["region", "categoria"]
+
+
+class ClienteDetailView(GenericDetailView):
+    model = Cliente
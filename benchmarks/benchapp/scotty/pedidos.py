@@ -0,0 +1,68 @@
+import django_filters
+import django_tables2 as tables
+from django.db.models import Q
+
+from django_scotty.helpers import ActionTable, CottonTableView, GenericDetailView
+
+from ..models import Pedido
+
+
+class PedidoTable(ActionTable):
+    cliente = tables.Column(accessor="cliente.nombre", order_by="cliente__nombre")
+    region = tables.Column(
+        accessor="cliente.region.nombre", order_by="cliente__region__nombre"
+    )
+
+    class Meta:
+        model = Pedido
+        fields = ["id", "cliente", "region", "estado", "prioridad", "monto", "creado"]
+
+
+class PedidoFilter(django_filters.FilterSet):
+    class Meta:
+        model = Pedido
+        fields = {
+            "estado": ["exact"],
+            "prioridad": ["exact"],
+            "cliente__region": ["exact"],
+            "cliente__categoria": ["exact"],
+            "monto": ["gte", "lte"],
+        }
+
+
+def archivar_queryset(queryset, request):
+    return queryset.update(estado=Pedido.ARCHIVADO)
+
+
+class PedidoView(CottonTableView):
+    model = Pedido
+    table_class = PedidoTable
+    filterset_class = PedidoFilter
+    paginate_by = 25
+    streaming_export = True
+    exclude_columns = ("acciones",)
+    available_action_names = ["archivar", "archivar_en_bloque"]
+    bulk_time_budget = None
+
+    def archivar(self, obj):
+        obj.estado = Pedido.ARCHIVADO
+        obj.save(update_fields=["estado"])
+
+    archivar.condition = lambda obj, request: obj.estado != Pedido.ARCHIVADO
+
+    def archivar_en_bloque(self, obj):
+        self.archivar(obj)
+
+    archivar_en_bloque.condition = archivar.condition
+    archivar_en_bloque.bulk = archivar_queryset
+    archivar_en_bloque.bulk_condition = ~Q(estado=Pedido.ARCHIVADO)
+
+
+class PedidoTablibView(PedidoView):
+    """La misma tabla exportada por tablib, sin streaming."""
+
+    streaming_export = False
+
+
+class PedidoDetailView(GenericDetailView):
+    model = Pedido
@@ -0,0 +1,86 @@
+"""Comparar dos resultados de run.py.
+
+    python benchmarks/compare.py results/antes.json results/despues.json --threshold 10
+
+Muestra cada métrica que está en los dos archivos con su cambio porcentual.
+Sale con código 1 si alguna empeoró más que `--threshold` por ciento.
+"""
+
+import argparse
+import json
+import sys
+
+# Métrica -> True si un valor más alto es mejor
+METRICS = {
+    "median_ms": False,
+    "rows_per_sec": True,
+    "peak_rss_mb": False,
+    "load_scotty_urls_ms": False,
+}
+
+
+def flatten(results):
+    """Devolver {(grupo, nombre, métrica): valor} de un resultado de run.py."""
+    values = {}
+
+    def collect(group, item):
+        for metric in METRICS:
+            if item.get(metric) is not None:
+                values[(group, item["name"], metric)] = item[metric]
+
+    for rows, dataset in results["datasets"].items():
+        for section in ("list", "bulk", "export"):
+            for item in dataset.get(section, []):
+                collect(f"{rows} {section}", item)
+        for item in dataset.get("filtered", []):
+            for part in ("count", "page"):
+                collect(f"{rows} filtered {part}", {"name": item["name"], **item[part]})
+    for item in results.get("startup", []):
+        collect("startup", item)
+    return values
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=10.0,
+        help="Porcentaje a partir del cual un cambio cuenta como regresión.",
+    )
+    args = parser.parse_args()
+
+    with open(args.before) as before_file:
+        before = flatten(json.load(before_file))
+    with open(args.after) as after_file:
+        after = flatten(json.load(after_file))
+
+    regressions = 0
+    for key in sorted(before.keys() & after.keys()):
+        group, name, metric = key
+        old, new = before[key], after[key]
+        change = (new - old) / old * 100 if old else 0.0
+        worse = -change if METRICS[metric] else change
+        mark = ""
+        if worse > args.threshold:
+            mark = "  REGRESIÓN"
+            regressions += 1
+        elif worse < -args.threshold:
+            mark = "  mejora"
+        print(
+            f"{group:<20} {name:<32} {metric:<20} "
+            f"{old:>12} -> {new:>12} {change:>+7.1f}%{mark}"
+        )
+
+    missing = sorted(before.keys() ^ after.keys())
+    if missing:
+        print(f"\n{len(missing)} métricas solo en uno de los archivos")
+    if regressions:
+        print(f"\n{regressions} regresiones de más de {args.threshold}%")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,547 @@
+"""Benchmarks de django-scotty sobre datasets sintéticos.
+
+    python benchmarks/run.py --rows 10k 100k 1m
+    python benchmarks/compare.py results/antes.json results/despues.json
+
+Cada tamaño usa su propia base SQLite en benchmarks/data/, que se genera la
+primera vez y se reusa. Cada medición corre en un proceso aparte: así el
+pico de memoria de una exportación no arrastra el de la anterior y el
+arranque se mide en frío. El resultado es un JSON en benchmarks/results/.
+"""
+
+import argparse
+import datetime
+import json
+import math
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+
+# Prefijo de la línea con el resultado de cada proceso hijo
+RESULT_PREFIX = "SCOTTY-BENCH "
+PAGE_SIZE = 25
+PAGE_DEPTHS = (1, 10, 100, 1000, 10000)
+LIST_ORDERS = ("", "-monto")
+FILTERS = {
+    "estado": "estado=n",
+    "estado+prioridad": "estado=p&prioridad=3",
+    "region": "cliente__region=3",
+    "categoria": "cliente__categoria=m",
+    "monto": "monto__gte=50000&monto__lte=60000",
+}
+EXPORTS = (
+    ("pedido", "csv"),
+    ("pedido", "xlsx"),
+    ("pedidotablib", "xlsx"),
+)
+# tablib arma todo el dataset en memoria: más allá de esto no tiene sentido
+TABLIB_MAX_ROWS = 100_000
+SELECTED_PER_OBJECT = 1000
+SELECTED_BULK = 10_000
+
+
+def parse_rows(value):
+    """Aceptar 10000, 10k o 1m."""
+    value = value.lower().replace("_", "")
+    multiplier = 1
+    if value.endswith("k"):
+        value, multiplier = value[:-1], 1_000
+    elif value.endswith("m"):
+        value, multiplier = value[:-1], 1_000_000
+    try:
+        return int(float(value) * multiplier)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Cantidad de filas inválida: {value}")
+
+
+def get_db_path(rows):
+    return os.path.join(DATA_DIR, f"bench-{rows}.sqlite3")
+
+
+def setup_django(rows, installed=False):
+    os.environ["SCOTTY_BENCH_DB"] = get_db_path(rows)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "bench_project.settings")
+    sys.path.insert(0, BENCH_DIR)
+    if not installed:
+        # Medir el código del repo y no la versión instalada
+        sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+
+    import django
+
+    django.setup()
+
+
+def summarize(samples):
+    samples = sorted(samples)
+    if len(samples) > 1:
+        p95 = statistics.quantiles(samples, n=20, method="inclusive")[18]
+    else:
+        p95 = samples[0]
+    return {
+        "samples": len(samples),
+        "min_ms": round(samples[0] * 1000, 3),
+        "median_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(p95 * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+
+def measure(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return summarize(samples)
+
+
+def peak_rss_mb():
+    """Pico de memoria residente del proceso, o None si no se puede medir."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo informa en KB, macOS en bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def count_queries(func):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as captured:
+        func()
+    return len(captured)
+
+
+def get_ok(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError(f"GET {url} devolvió {response.status_code}")
+    return response
+
+
+# --- Tareas: cada una corre en su propio proceso -------------------------
+
+
+def task_generate(args):
+    from django.core.management import call_command
+
+    from benchapp.data import generate
+    from benchapp.models import Pedido
+
+    started = time.perf_counter()
+    call_command("migrate", run_syncdb=True, verbosity=0)
+    existing = Pedido.objects.count()
+    if existing == args.rows:
+        return {"rows": existing, "generated": False}
+    if existing:
+        raise RuntimeError(
+            f"La base {get_db_path(args.rows)} tiene {existing} pedidos; "
+            f"borrarla o usar --rebuild"
+        )
+    generate(args.rows, seed=args.seed)
+    return {
+        "rows": args.rows,
+        "generated": True,
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+def task_list(args):
+    """Latencia de la página completa según la profundidad y el orden."""
+    from django.test import Client
+
+    client = Client()
+    num_pages = max(math.ceil(args.rows / PAGE_SIZE), 1)
+    depths = sorted({depth for depth in PAGE_DEPTHS if depth <= num_pages} | {num_pages})
+    results = []
+    for sort in LIST_ORDERS:
+        for page in depths:
+            url = f"/pedido/?page={page}"
+            if sort:
+                url += f"&sort={sort}"
+            results.append(
+                {
+                    "name": f"page={page} sort={sort or 'pk'}",
+                    "page": page,
+                    "sort": sort,
+                    "queries": count_queries(lambda url=url: get_ok(client, url)),
+                    **measure(lambda url=url: get_ok(client, url), args.repeat),
+                }
+            )
+    return results
+
+
+def task_filtered(args):
+    """COUNT filtrado solo y página completa con el mismo filtro."""
+    from django.http import QueryDict
+    from django.test import Client
+
+    from benchapp.models import Pedido
+    from benchapp.scotty.pedidos import PedidoFilter
+
+    client = Client()
+    results = []
+    for name, query in FILTERS.items():
+
+        def filtered_count(query=query):
+            filterset = PedidoFilter(QueryDict(query), queryset=Pedido.objects.all())
+            return filterset.qs.count()
+
+        url = f"/pedido/?{query}"
+        results.append(
+            {
+                "name": name,
+                "query": query,
+                "matches": filtered_count(),
+                "count": measure(filtered_count, args.repeat),
+                "page": measure(lambda url=url: get_ok(client, url), args.repeat),
+            }
+        )
+    return results
+
+
+def task_bulk(args):
+    """Acciones por POST a CottonTableView; cada corrida se revierte."""
+    from django.core.cache import cache
+    from django.db import transaction
+    from django.test import Client
+
+    from benchapp.models import Pedido
+
+    client = Client()
+    pending = Pedido.objects.exclude(estado=Pedido.ARCHIVADO).values_list(
+        "pk", flat=True
+    )
+    cases = [
+        (
+            "seleccionados por objeto",
+            {
+                "action": "archivar",
+                "seleccionar": [str(pk) for pk in pending[:SELECTED_PER_OBJECT]],
+            },
+        ),
+        (
+            "seleccionados en bloque",
+            {
+                "action": "archivar_en_bloque",
+                "seleccionar": [str(pk) for pk in pending[:SELECTED_BULK]],
+            },
+        ),
+        (
+            "filtrado completo en bloque",
+            {"action": "archivar_en_bloque", "filter_query_string": ""},
+        ),
+    ]
+
+    results = []
+    for name, data in cases:
+        rows = len(data.get("seleccionar", ())) or args.rows
+        samples = []
+        affected = None
+        for _ in range(args.repeat):
+            # Sin checkpoints de una corrida anterior
+            cache.clear()
+            with transaction.atomic():
+                before = Pedido.objects.filter(estado=Pedido.ARCHIVADO).count()
+                started = time.perf_counter()
+                response = client.post("/pedido/", data)
+                samples.append(time.perf_counter() - started)
+                affected = (
+                    Pedido.objects.filter(estado=Pedido.ARCHIVADO).count() - before
+                )
+                transaction.set_rollback(True)
+            if response.status_code not in (200, 302):
+                raise RuntimeError(f"POST {name} devolvió {response.status_code}")
+        timing = summarize(samples)
+        results.append(
+            {
+                "name": name,
+                "action": data["action"],
+                "rows": rows,
+                "affected": affected,
+                "rows_per_sec": round(rows / (timing["median_ms"] / 1000)),
+                **timing,
+            }
+        )
+    return results
+
+
+def task_export(args):
+    """Una exportación completa; el pico de memoria es el de este proceso."""
+    from django.test import Client
+
+    client = Client()
+    rss_before = peak_rss_mb()
+    url = f"/{args.view}/?_export={args.format}"
+    started = time.perf_counter()
+    response = get_ok(client, url)
+    size = 0
+    if response.streaming:
+        for chunk in response.streaming_content:
+            size += len(chunk)
+    else:
+        size = len(response.content)
+    seconds = time.perf_counter() - started
+    peak = peak_rss_mb()
+    return {
+        "name": f"{args.view} {args.format}",
+        "view": args.view,
+        "format": args.format,
+        "streaming": response.streaming,
+        "rows": args.rows,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(args.rows / seconds),
+        "peak_rss_mb": peak,
+        "rss_growth_mb": round(peak - rss_before, 1) if peak is not None else None,
+    }
+
+
+def task_manifest(args):
+    from django.core.management import call_command
+
+    options = {"delete": True} if args.delete else {}
+    with open(os.devnull, "w") as devnull:
+        call_command("scotty_manifest", "benchapp", stdout=devnull, **options)
+    return {}
+
+
+def task_startup(args):
+    """Arranque en frío: django.setup() y load_scotty_urls de la app."""
+    started = time.perf_counter()
+    setup_django(args.rows, installed=args.installed)
+    setup_seconds = time.perf_counter() - started
+
+    from django_scotty.helpers import load_scotty_urls
+
+    started = time.perf_counter()
+    urlpatterns = load_scotty_urls("benchapp")
+    load_seconds = time.perf_counter() - started
+    return {
+        "django_setup_ms": round(setup_seconds * 1000, 3),
+        "load_scotty_urls_ms": round(load_seconds * 1000, 3),
+        "urls": len(urlpatterns),
+        "views_imported": "benchapp.scotty.pedidos" in sys.modules,
+    }
+
+
+TASKS = {
+    "generate": task_generate,
+    "list": task_list,
+    "filtered": task_filtered,
+    "bulk": task_bulk,
+    "export": task_export,
+    "manifest": task_manifest,
+    "startup": task_startup,
+}
+
+
+def run_worker(args):
+    if args.task != "startup":
+        setup_django(args.rows, installed=args.installed)
+    result = TASKS[args.task](args)
+    print(f"{RESULT_PREFIX}{json.dumps(result)}")
+
+
+# --- Orquestación ----------------------------------------------------------
+
+
+def run_task(task, args, rows, *extra):
+    command = [
+        sys.executable,
+        os.path.abspath(__file__),
+        "--task",
+        task,
+        "--rows",
+        str(rows),
+        "--repeat",
+        str(args.repeat),
+        "--seed",
+        str(args.seed),
+        *extra,
+    ]
+    if args.installed:
+        command.append("--installed")
+    completed = subprocess.run(command, stdout=subprocess.PIPE, text=True, check=True)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX) :])
+    raise RuntimeError(f"La tarea {task} no devolvió resultado")
+
+
+def get_environment(args):
+    import importlib.metadata
+    import tomllib
+
+    with open(os.path.join(REPO_DIR, "pyproject.toml"), "rb") as pyproject:
+        scotty_version = tomllib.load(pyproject)["project"]["version"]
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            cwd=REPO_DIR,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    packages = {}
+    for package in ("django", "django-tables2", "django-filter", "tablib", "openpyxl"):
+        try:
+            packages[package] = importlib.metadata.version(package)
+        except importlib.metadata.PackageNotFoundError:
+            packages[package] = None
+    return {
+        "scotty_version": scotty_version,
+        "scotty_source": "installed" if args.installed else "repo",
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "packages": packages,
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+
+
+def print_summary(results):
+    for rows, dataset in results["datasets"].items():
+        print(f"\n== {rows} filas")
+        for item in dataset["list"]:
+            print(f"  lista {item['name']:<28} {item['median_ms']:>9.1f} ms")
+        for item in dataset["filtered"]:
+            print(
+                f"  filtro {item['name']:<27} count {item['count']['median_ms']:>7.1f} ms"
+                f"  página {item['page']['median_ms']:>7.1f} ms"
+            )
+        for item in dataset["export"]:
+            print(
+                f"  export {item['name']:<27} {item['rows_per_sec']:>9} filas/s"
+                f"  pico {item['peak_rss_mb']} MB"
+            )
+        for item in dataset["bulk"]:
+            print(f"  bulk {item['name']:<29} {item['rows_per_sec']:>9} filas/s")
+    for item in results["startup"]:
+        print(f"\n  arranque ({item['name']}) {item['load_scotty_urls_ms']:.1f} ms")
+
+
+def run(args):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    results = {"environment": get_environment(args), "datasets": {}, "startup": []}
+
+    for rows in args.rows:
+        db_path = get_db_path(rows)
+        if args.rebuild and os.path.exists(db_path):
+            os.remove(db_path)
+        print(f"[{rows}] datos", file=sys.stderr)
+        dataset = {"generate": run_task("generate", args, rows)}
+        for task in ("list", "filtered", "bulk"):
+            print(f"[{rows}] {task}", file=sys.stderr)
+            dataset[task] = run_task(task, args, rows)
+        dataset["export"] = []
+        for view, export_format in EXPORTS:
+            if view == "pedidotablib" and rows > TABLIB_MAX_ROWS:
+                continue
+            print(f"[{rows}] export {view} {export_format}", file=sys.stderr)
+            dataset["export"].append(
+                run_task(
+                    "export", args, rows, "--view", view, "--format", export_format
+                )
+            )
+        results["datasets"][str(rows)] = dataset
+
+    # El arranque no depende del tamaño de los datos
+    rows = args.rows[0]
+    print("arranque", file=sys.stderr)
+    for mode in ("importación", "manifiesto"):
+        if mode == "manifiesto":
+            run_task("manifest", args, rows)
+        try:
+            samples = [run_task("startup", args, rows) for _ in range(args.repeat)]
+        finally:
+            if mode == "manifiesto":
+                run_task("manifest", args, rows, "--delete")
+        results["startup"].append(
+            {
+                "name": mode,
+                "urls": samples[0]["urls"],
+                "views_imported": samples[0]["views_imported"],
+                "django_setup_ms": statistics.median(
+                    sample["django_setup_ms"] for sample in samples
+                ),
+                "load_scotty_urls_ms": statistics.median(
+                    sample["load_scotty_urls_ms"] for sample in samples
+                ),
+            }
+        )
+
+    output = args.output
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.datetime.now().strftime("%Y%m%d-%H%M%S")
+        commit = (results["environment"]["git_commit"] or "local")[:8]
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{commit}.json")
+    with open(output, "w") as output_file:
+        json.dump(results, output_file, indent=2, ensure_ascii=False)
+
+    print_summary(results)
+    print(f"\nResultados en {output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--rows",
+        nargs="+",
+        type=parse_rows,
+        default=[10_000],
+        help="Tamaños de dataset, por ejemplo 10k 100k 1m (por defecto 10k).",
+    )
+    parser.add_argument(
+        "--repeat", type=int, default=5, help="Repeticiones por medición."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Archivo JSON de resultados.")
+    parser.add_argument(
+        "--rebuild", action="store_true", help="Regenerar las bases de datos."
+    )
+    parser.add_argument(
+        "--installed",
+        action="store_true",
+        help="Medir el django_scotty instalado en vez del código del repo.",
+    )
+    # Uso interno: proceso hijo que corre una sola tarea
+    parser.add_argument("--task", choices=sorted(TASKS), help=argparse.SUPPRESS)
+    parser.add_argument("--view", help=argparse.SUPPRESS)
+    parser.add_argument("--format", help=argparse.SUPPRESS)
+    parser.add_argument("--delete", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.task:
+        args.rows = args.rows[0]
+        run_worker(args)
+    else:
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+"""Correr los tests: python runtests.py [tests.test_modulo ...]"""
+
+import os
+import sys
+
+import django
+from django.conf import settings
+from django.test.utils import get_runner
+
+if __name__ == "__main__":
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    sys.path[:0] = [base_dir, os.path.join(base_dir, "src")]
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "tests.settings")
+    django.setup()
+    runner = get_runner(settings)()
+    failures = runner.run_tests(sys.argv[1:] or ["tests"])
+    sys.exit(bool(failures))
@@ -0,0 +1,486 @@
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.dispatch import Signal
+from django.shortcuts import render
+from django_htmx.http import HttpResponseClientRedirect, trigger_client_event
+
+from .exports import STREAMING_FORMATS
+
+logger = logging.getLogger(__name__)
+
+# Se envía con sender=clase de la vista por cada export rechazado o degradado
+export_admission = Signal()
+
+REJECTED = "rejected"
+DOWNGRADED = "downgraded"
+
+TOO_MANY_ROWS = "too_many_rows"
+BUSY = "busy"
+RATE_LIMITED = "rate_limited"
+XLSX_TOO_LARGE = "xlsx_too_large"
+
+STATS_KEY = "scotty:export-stats"
+TICKET_KEY = "scotty:export-ticket"
+# Evento htmx (cabecera HX-Trigger) con el motivo y el mensaje
+CLIENT_EVENT = "scottyExport"
+
+_semaphore = None
+_semaphore_size = None
+_semaphore_lock = threading.Lock()
+
+
+def get_export_semaphore():
+    """Semáforo del proceso para `SCOTTY_EXPORT_MAX_CONCURRENT`, o None sin límite."""
+    global _semaphore, _semaphore_size
+    size = getattr(settings, "SCOTTY_EXPORT_MAX_CONCURRENT", None)
+    if size is None:
+        return None
+    with _semaphore_lock:
+        if _semaphore is None or _semaphore_size != size:
+            _semaphore = threading.BoundedSemaphore(size)
+            _semaphore_size = size
+        return _semaphore
+
+
+class ExportSlot:
+    """Lugar tomado en el semáforo de exports; se libera una sola vez."""
+
+    def __init__(self, semaphore):
+        self.semaphore = semaphore
+
+    def release(self):
+        semaphore, self.semaphore = self.semaphore, None
+        if semaphore is not None:
+            semaphore.release()
+
+
+def acquire_export_slot(timeout=0):
+    """Tomar un lugar para exportar. Devuelve el ExportSlot o None si no hay."""
+    semaphore = get_export_semaphore()
+    if semaphore is None:
+        return ExportSlot(None)
+    acquired = (
+        semaphore.acquire(timeout=timeout) if timeout else semaphore.acquire(False)
+    )
+    if not acquired:
+        return None
+    return ExportSlot(semaphore)
+
+
+def hit_rate_limit(scope, limit, window):
+    """Contar un export de `scope` en la ventana actual de `window` segundos.
+
+    Devuelve los segundos que faltan para la próxima ventana si ya se pasó
+    de `limit`, o None si el export entra.
+    """
+    now = time.time()
+    key = f"scotty:export-rate:{scope}:{int(now // window)}"
+    cache.add(key, 0, window)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Se venció entre el add y el incr
+        cache.set(key, 1, window)
+        count = 1
+    if count > limit:
+        return int(window - now % window) + 1
+    return None
+
+
+def count_up_to(queryset, limit):
+    """Contar las filas de `queryset` sin pasar de `limit`.
+
+    El COUNT va sobre un subquery con LIMIT: cuesta lo mismo con diez mil
+    filas que con diez millones.
+    """
+    if hasattr(queryset, "order_by"):
+        return queryset.order_by()[:limit].count()
+    return min(len(queryset), limit)
+
+
+class ReleasingContent:
+    """Contenido de una respuesta en streaming que libera el lugar al terminar.
+
+    Libera al agotarse, si falla o cuando Django cierra la respuesta (que
+    llama a `close()` del contenido, también si el cliente corta la descarga
+    o si nunca se empezó a leer).
+    """
+
+    def __init__(self, content, release):
+        self.content = iter(content)
+        self.release = release
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return next(self.content)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        try:
+            if hasattr(self.content, "close"):
+                self.content.close()
+        finally:
+            self.release()
+
+
+class AsyncReleasingContent:
+    """ReleasingContent para el contenido async de las vistas async.
+
+    No tiene `__iter__`: Django decide si el contenido es async probando
+    primero `iter()`.
+    """
+
+    def __init__(self, content, release):
+        self.content = aiter(content)
+        self.release = release
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await anext(self.content)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        # Django cierra la respuesta desde código sync: el generador async
+        # no se puede cerrar acá, solo se libera el lugar
+        self.release()
+
+
+def release_after_streaming(response, release):
+    """Llamar a `release` cuando termine de enviarse `response` (en streaming)."""
+    content_class = AsyncReleasingContent if response.is_async else ReleasingContent
+    response.streaming_content = content_class(response.streaming_content, release)
+    return response
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_export_admission_stats():
+    """Devolver los exports rechazados y degradados por motivo."""
+    reasons = (TOO_MANY_ROWS, BUSY, RATE_LIMITED, XLSX_TOO_LARGE)
+    return {reason: cache.get(f"{STATS_KEY}:{reason}", 0) for reason in reasons}
+
+
+class ExportAdmission:
+    """Resultado de admitir un export: el formato final y el lugar tomado.
+
+    Si se rechazó, `response` es la respuesta con el mensaje.
+    """
+
+    def __init__(self, requested_format):
+        self.requested_format = requested_format
+        self.export_format = requested_format
+        self.rows = None
+        self.slot = None
+        self.response = None
+        self.message = None
+
+    @property
+    def downgraded(self):
+        return self.export_format != self.requested_format
+
+    def release(self):
+        if self.slot is not None:
+            self.slot.release()
+
+    def finish(self, response):
+        """Liberar el lugar al terminar de enviar la respuesta."""
+        if self.slot is not None:
+            if getattr(response, "streaming", False):
+                release_after_streaming(response, self.slot.release)
+            else:
+                self.slot.release()
+        if self.downgraded:
+            trigger_client_event(
+                response,
+                CLIENT_EVENT,
+                {
+                    "status": DOWNGRADED,
+                    "reason": XLSX_TOO_LARGE,
+                    "message": self.message,
+                },
+            )
+        return response
+
+
+class ExportAdmissionMixin:
+    """Control de admisión para los exports de CottonTableView.
+
+    Antes de empezar un export se revisa, en este orden:
+
+    - `export_rate_limit = (exports, segundos)`: límite por usuario (o por
+      IP si es anónimo), contado en el cache.
+    - `export_max_rows`: máximo de filas, contado con un COUNT acotado.
+    - `export_xlsx_max_rows`: por encima, el XLSX se entrega como CSV en
+      streaming.
+    - el setting `SCOTTY_EXPORT_MAX_CONCURRENT`: exports a la vez en el
+      proceso. Los trabajos en segundo plano no ocupan lugar.
+
+    El botón de exportar pide el export por htmx: si se admite, la
+    respuesta redirige (HX-Redirect) a la descarga con un ticket de un solo
+    uso que ya pasó los controles, y si se rechaza o cambia de formato el
+    aviso llega a la página. Pedido sin htmx, un rechazo responde una
+    página completa con el mensaje. Todo rechazo o cambio de formato se
+    registra en el log, en los contadores de `get_export_admission_stats()`
+    y con la señal `export_admission`.
+    """
+
+    export_rate_limit = None
+    export_max_rows = None
+    export_xlsx_max_rows = None
+    # Segundos a esperar un lugar libre antes de rechazar por exceso de exports
+    export_slot_timeout = 0
+    export_rejected_template = "django_tables2/export_rejected.html"
+    # Página completa para los rechazos de pedidos sin htmx
+    export_rejected_page_template = "django_tables2/export_rejected_page.html"
+    export_ticket_param = "_export_ticket"
+    # Segundos que vale el ticket de descarga de un export ya admitido
+    export_ticket_timeout = 60
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Sin ningún control el botón descarga directo, como siempre
+        context["export_admission"] = self.has_export_limits()
+        return context
+
+    def has_export_limits(self):
+        """Si hay configurado algún control de admisión."""
+        return (
+            bool(self.export_rate_limit)
+            or self.export_max_rows is not None
+            or self.export_xlsx_max_rows is not None
+            or getattr(settings, "SCOTTY_EXPORT_MAX_CONCURRENT", None) is not None
+        )
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.export_trigger_param)
+        if export_format is None or not self.export_class.is_valid_format(
+            export_format
+        ):
+            return super().get(request, *args, **kwargs)
+        admission = self.admit_request(export_format)
+        if admission.response is not None:
+            return admission.response
+        if self.is_export_preflight(admission):
+            return self.export_ticket_response(admission)
+        return self.admitted_export(admission, request, *args, **kwargs)
+
+    def admit_request(self, export_format):
+        """Admitir el export, o canjear el ticket de una admisión anterior."""
+        token = self.request.GET.get(self.export_ticket_param)
+        ticket = self.redeem_export_ticket(token) if token else None
+        if ticket is None:
+            return self.admit_export(export_format)
+        admission = ExportAdmission(ticket["requested_format"])
+        admission.export_format = ticket["export_format"]
+        admission.rows = ticket["rows"]
+        admission.message = ticket["message"]
+        return self.acquire_export_slot(admission)
+
+    def is_export_preflight(self, admission):
+        """Si el pedido es htmx: se responde el ticket en lugar del archivo."""
+        return bool(
+            getattr(self.request, "htmx", False)
+        ) and not self.exports_in_background(admission.export_format)
+
+    def export_ticket_response(self, admission):
+        """Redirigir a la descarga con un ticket de un solo uso."""
+        # El lugar se vuelve a tomar al descargar
+        admission.release()
+        admission.slot = None
+        token = uuid.uuid4().hex
+        cache.set(
+            f"{TICKET_KEY}:{token}",
+            {
+                "view": type(self).__name__,
+                "scope": self.get_export_rate_scope(),
+                "query": self.get_export_query_key(),
+                "requested_format": admission.requested_format,
+                "export_format": admission.export_format,
+                "rows": admission.rows,
+                "message": admission.message,
+            },
+            self.export_ticket_timeout,
+        )
+        query = self.get_export_query()
+        query[self.export_trigger_param] = admission.export_format
+        query[self.export_ticket_param] = token
+        response = HttpResponseClientRedirect(
+            f"{self.request.path}?{query.urlencode()}"
+        )
+        return admission.finish(response)
+
+    def redeem_export_ticket(self, token):
+        """Devolver los datos del ticket (y borrarlo) si es de este pedido."""
+        key = f"{TICKET_KEY}:{token}"
+        ticket = cache.get(key)
+        if ticket is None:
+            return None
+        cache.delete(key)
+        if (
+            ticket["view"] != type(self).__name__
+            or ticket["scope"] != self.get_export_rate_scope()
+            or ticket["query"] != self.get_export_query_key()
+        ):
+            return None
+        return ticket
+
+    def get_export_query(self):
+        """Los parámetros del pedido sin los del export."""
+        query = self.request.GET.copy()
+        query.pop(self.export_trigger_param, None)
+        query.pop(self.export_ticket_param, None)
+        return query
+
+    def get_export_query_key(self):
+        return sorted(self.get_export_query().lists())
+
+    def admitted_export(self, admission, request, *args, **kwargs):
+        try:
+            if not admission.downgraded:
+                response = super().get(request, *args, **kwargs)
+            elif self.exports_in_background(admission.export_format):
+                response = self.enqueue_export(admission.export_format)
+            else:
+                self.object_list = self.get_export_queryset()
+                response = self.create_streaming_export(admission.export_format)
+        except BaseException:
+            admission.release()
+            raise
+        return admission.finish(response)
+
+    def exports_in_background(self, export_format):
+        return (
+            getattr(self, "async_export", False) and export_format in STREAMING_FORMATS
+        )
+
+    def admit_export(self, export_format):
+        admission = ExportAdmission(export_format)
+
+        if self.export_rate_limit:
+            limit, window = self.export_rate_limit
+            retry_after = hit_rate_limit(self.get_export_rate_scope(), limit, window)
+            if retry_after is not None:
+                return self.reject_export(
+                    admission,
+                    RATE_LIMITED,
+                    f"Se alcanzó el límite de {limit} exportaciones cada "
+                    f"{window} segundos. Intente de nuevo en {retry_after} segundos.",
+                    retry_after=retry_after,
+                )
+
+        limits = [
+            limit
+            for limit in (
+                self.export_max_rows,
+                self.export_xlsx_max_rows if export_format == "xlsx" else None,
+            )
+            if limit is not None
+        ]
+        if limits:
+            self.object_list = self.get_export_queryset()
+            admission.rows = count_up_to(self.object_list, max(limits) + 1)
+            max_rows = self.export_max_rows
+            if max_rows is not None and admission.rows > max_rows:
+                return self.reject_export(
+                    admission,
+                    TOO_MANY_ROWS,
+                    f"La exportación supera el máximo de {max_rows} "
+                    f"registros. Aplique más filtros para exportar menos.",
+                )
+            if (
+                export_format == "xlsx"
+                and self.export_xlsx_max_rows is not None
+                and admission.rows > self.export_xlsx_max_rows
+            ):
+                admission.export_format = "csv"
+                admission.message = (
+                    f"La exportación supera los {self.export_xlsx_max_rows} "
+                    f"registros: se genera en CSV en lugar de XLSX."
+                )
+                self.record_export_admission(DOWNGRADED, XLSX_TOO_LARGE, admission)
+
+        return self.acquire_export_slot(admission)
+
+    def acquire_export_slot(self, admission):
+        if not self.exports_in_background(admission.export_format):
+            admission.slot = acquire_export_slot(self.export_slot_timeout)
+            if admission.slot is None:
+                return self.reject_export(
+                    admission,
+                    BUSY,
+                    "Hay demasiadas exportaciones en curso. "
+                    "Intente de nuevo en unos segundos.",
+                    retry_after=max(int(self.export_slot_timeout), 5),
+                )
+        return admission
+
+    def get_export_rate_scope(self):
+        user = getattr(self.request, "user", None)
+        if user is not None and user.is_authenticated:
+            return f"user:{user.pk}"
+        return f"ip:{self.request.META.get('REMOTE_ADDR', '')}"
+
+    def reject_export(self, admission, reason, message, retry_after=None):
+        admission.message = message
+        self.record_export_admission(REJECTED, reason, admission)
+        context = {"message": message, "reason": reason}
+        if getattr(self.request, "htmx", None):
+            # htmx no reemplaza el contenido de las respuestas 4xx
+            response = render(self.request, self.export_rejected_template, context)
+        else:
+            query = self.get_export_query()
+            context["back_url"] = (
+                f"{self.request.path}?{query.urlencode()}"
+                if query
+                else self.request.path
+            )
+            response = render(
+                self.request,
+                self.export_rejected_page_template,
+                context,
+                status=422 if reason == TOO_MANY_ROWS else 429,
+            )
+        if retry_after is not None:
+            response["Retry-After"] = str(retry_after)
+        admission.response = trigger_client_event(
+            response,
+            CLIENT_EVENT,
+            {"status": REJECTED, "reason": reason, "message": message},
+        )
+        return admission
+
+    def record_export_admission(self, outcome, reason, admission):
+        logger.warning(
+            f"[SCOTTY EXPORT] {type(self).__name__}: export "
+            f"{admission.requested_format} {outcome} ({reason}, "
+            f"{admission.rows} filas) para {self.request.get_full_path()}"
+        )
+        _incr(f"{STATS_KEY}:{reason}")
+        export_admission.send(
+            sender=type(self),
+            outcome=outcome,
+            reason=reason,
+            export_format=admission.requested_format,
+            rows=admission.rows,
+            request=self.request,
+        )
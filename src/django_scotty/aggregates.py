@@ -0,0 +1,284 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import Avg, Count, Max, Min, Sum
+from django.utils import formats
+
+from .filter_cache import normalize_filter_data
+
+FUNCTIONS = {"sum": Sum, "avg": Avg, "min": Min, "max": Max, "count": Count}
+LABELS = {
+    "sum": "Total",
+    "avg": "Promedio",
+    "min": "Mínimo",
+    "max": "Máximo",
+    "count": "Cantidad",
+}
+# Alias del COUNT(*) que viaja en el mismo aggregate() que los totales
+COUNT_ALIAS = "scotty_count"
+
+
+def normalize_spec(spec):
+    """`{"monto": "sum"}` o `{"monto": ("sum", "avg")}` -> `{"monto": ("sum", "avg")}`."""
+    normalized = {}
+    for column, functions in spec.items():
+        if isinstance(functions, str):
+            functions = (functions,)
+        for function in functions:
+            if function not in FUNCTIONS:
+                raise ImproperlyConfigured(
+                    f"Agregado desconocido {function!r} en la columna {column!r}; "
+                    f"opciones: {', '.join(FUNCTIONS)}"
+                )
+        normalized[column] = tuple(functions)
+    return normalized
+
+
+def column_field(table_class, name):
+    """Path ORM (a__b) de la columna `name` de la tabla."""
+    try:
+        column = table_class.base_columns[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"{table_class.__name__} no tiene la columna {name!r} para agregar"
+        )
+    return str(column.accessor or name).replace(".", "__")
+
+
+def group_labels(model, path):
+    """Etiquetas de los choices del campo en `path`, si las tiene."""
+    field, current = None, model
+    for part in path.split("__"):
+        try:
+            field = current._meta.get_field(part)
+        except FieldDoesNotExist:
+            return {}
+        if field.is_relation and field.related_model is not None:
+            current = field.related_model
+    if field is None or not field.choices:
+        return {}
+    return {value: str(label) for value, label in field.flatchoices}
+
+
+def _round(value, decimal_places):
+    if isinstance(value, Decimal):
+        return value.quantize(Decimal(1).scaleb(-decimal_places))
+    if isinstance(value, float):
+        return round(value, decimal_places)
+    return value
+
+
+class Aggregates:
+    """Totales, subtotales por grupo y el conteo del QuerySet filtrado.
+
+    `totals` es `{columna: {función: valor}}` y `groups` una lista de
+    `(etiqueta, {columna: {función: valor}})`.
+    """
+
+    def __init__(self, totals, groups, count):
+        self.totals = totals
+        self.groups = groups
+        self.count = count
+
+    @property
+    def functions(self):
+        functions = []
+        for column_functions in self.totals.values():
+            for function in column_functions:
+                if function not in functions:
+                    functions.append(function)
+        return functions
+
+    def __repr__(self):
+        return f"<Aggregates {self.count} filas: {self.totals}>"
+
+
+def compute_aggregates(
+    queryset, fields, spec, group_by=None, group_limit=50, decimal_places=2
+):
+    """Calcular los agregados de `spec` en la base.
+
+    Los totales y el conteo salen de un único `aggregate()`; con `group_by`
+    los subtotales salen de un `values().annotate()` (una query más), hasta
+    `group_limit` grupos.
+    """
+    aliases = {}
+    expressions = {}
+    for column, functions in spec.items():
+        for function in functions:
+            alias = f"scotty_{len(aliases)}"
+            aliases[alias] = (column, function)
+            expressions[alias] = FUNCTIONS[function](fields[column])
+
+    def unflatten(row):
+        values = {}
+        for alias, (column, function) in aliases.items():
+            values.setdefault(column, {})[function] = _round(
+                row[alias], decimal_places
+            )
+        return values
+
+    queryset = queryset.order_by()
+    row = queryset.aggregate(**{COUNT_ALIAS: Count("*")}, **expressions)
+    groups = []
+    if group_by:
+        labels = group_labels(queryset.model, group_by)
+        grouped = (
+            queryset.values(group_by).annotate(**expressions).order_by(group_by)
+        )
+        for group in grouped[:group_limit]:
+            value = group[group_by]
+            groups.append((labels.get(value, value), unflatten(group)))
+    return Aggregates(unflatten(row), groups, row[COUNT_ALIAS])
+
+
+def format_cell(values):
+    """Contenido de una celda de totales: el valor solo, o cada función con su nombre.
+
+    En los dos casos el valor se localiza igual (separador decimal y de miles).
+    """
+    if not values:
+        return ""
+    if len(values) == 1:
+        return _localize(next(iter(values.values())))
+    return " · ".join(
+        f"{LABELS[function]}: {_localize(value)}" for function, value in values.items()
+    )
+
+
+def _localize(value):
+    return "" if value is None else formats.localize(value)
+
+
+def export_rows(aggregates, label_column, total_label):
+    """Filas del pie para los exports: `{columna: valor}`, una por función.
+
+    Primero los subtotales y al final los totales, con valores sin
+    formatear para que la planilla los tome como números.
+    """
+    rows = []
+    functions = aggregates.functions
+    for label, values in [*aggregates.groups, (total_label, aggregates.totals)]:
+        for function in functions:
+            row = {
+                column: column_values[function]
+                for column, column_values in values.items()
+                if function in column_values
+            }
+            if label_column is not None:
+                row[label_column] = (
+                    label if function == "sum" else f"{label} ({LABELS[function]})"
+                )
+            rows.append(row)
+    return rows
+
+
+class ColumnAggregatesMixin:
+    """Totales por columna calculados en la base, para el pie de la tabla.
+
+    `column_aggregates = {"monto": "sum", "cantidad": ("sum", "avg")}` con
+    funciones sum, avg, min, max y count sobre el accessor de cada columna.
+    Con `aggregate_group_by` (un path ORM) se agregan subtotales por grupo.
+    Se calcula una vez por request sobre `object_list` (el QuerySet
+    filtrado) y el mismo aggregate() trae el COUNT de la paginación. Con
+    `aggregate_cache_timeout` se cachea por filtros y versión del modelo,
+    como el cache de resultados de filtros.
+    """
+
+    column_aggregates = None
+    aggregate_group_by = None
+    aggregate_group_limit = 50
+    aggregate_cache_timeout = None
+    aggregate_decimal_places = 2
+    aggregate_total_label = "Total"
+    _aggregates = None
+
+    def get_column_aggregates(self):
+        return normalize_spec(self.column_aggregates or {})
+
+    def get_aggregates(self):
+        """Los Aggregates del request, o None si la vista no define agregados."""
+        if self._aggregates is None:
+            spec = self.get_column_aggregates()
+            if not spec:
+                return None
+            with self.scotty_profile.phase("agregados"):
+                self._aggregates = self.load_aggregates(spec)
+        return self._aggregates
+
+    def load_aggregates(self, spec):
+        table_class = self.get_table_class()
+        fields = {column: column_field(table_class, column) for column in spec}
+
+        def compute():
+            return compute_aggregates(
+                self.object_list,
+                fields,
+                spec,
+                group_by=self.aggregate_group_by,
+                group_limit=self.aggregate_group_limit,
+                decimal_places=self.aggregate_decimal_places,
+            )
+
+        key = self.get_aggregate_cache_key(spec)
+        if key is None:
+            return compute()
+        return cache.get_or_set(key, compute, self.aggregate_cache_timeout)
+
+    def get_aggregate_cache_key(self, spec):
+        if self.aggregate_cache_timeout is None:
+            return None
+        filters = ""
+        filterset = getattr(self, "filterset", None)
+        if filterset is not None and filterset.is_bound:
+            if not filterset.is_valid():
+                # Sin filas: no hay nada que valga la pena cachear
+                return None
+            filters = normalize_filter_data(filterset.form.cleaned_data)
+        return self.get_filter_result_cache_key(
+            self.object_list.model,
+            f"{filters}|{sorted(spec.items())}|{self.aggregate_group_by}",
+            prefix="scotty:aggregates",
+        )
+
+    def apply_aggregates(self, table):
+        """Poner los totales en el pie de la tabla y en `export_footer_rows`."""
+        aggregates = self.get_aggregates()
+        if aggregates is None:
+            return
+        table.aggregates = aggregates
+        columns = list(table.columns)
+        # Las etiquetas ("Total", cada grupo) van en la primera columna libre
+        label_column = next(
+            (
+                bound_column.name
+                for bound_column in columns
+                if bound_column.name not in aggregates.totals
+                and not bound_column.has_footer()
+            ),
+            None,
+        )
+
+        for bound_column in columns:
+            if bound_column.name in aggregates.totals:
+                bound_column.column._footer = format_cell(
+                    aggregates.totals[bound_column.name]
+                )
+            elif bound_column.name == label_column:
+                bound_column.column._footer = self.aggregate_total_label
+            elif not bound_column.has_footer():
+                bound_column.column._footer = ""
+
+        table.subtotal_rows = [
+            [
+                label
+                if bound_column.name == label_column
+                else format_cell(values.get(bound_column.name))
+                for bound_column in columns
+            ]
+            for label, values in aggregates.groups
+        ]
+        table.export_footer_rows = export_rows(
+            aggregates, label_column, self.aggregate_total_label
+        )
@@ -0,0 +1,394 @@
+import asyncio
+import functools
+import itertools
+from inspect import iscoroutinefunction
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.conf import settings
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import QuerySet
+from django.http import Http404
+from django_htmx.http import push_url
+from django_tables2.config import RequestConfig
+from django_tables2.rows import BoundRows
+
+from . import counts, pagination
+from .exports import STREAMING_FORMATS
+from .helpers import CottonTableView, DictTableView
+from .instrumentation import NULL_PROFILE
+from .sources import TableSourceData
+
+# Atributos de una acción que también pueden ser corrutinas
+ACTION_CALLABLES = ("condition", "condition_many", "bulk")
+
+
+def _close_thread_connections():
+    # Lo mismo que hace Django al terminar un request: respeta CONN_MAX_AGE
+    for connection in connections.all(initialized_only=True):
+        connection.close_if_unusable_or_obsolete()
+
+
+async def run_concurrently(funcs, profile=NULL_PROFILE):
+    """Correr funciones sync que consultan la base, cada una en su thread.
+
+    Las funciones del ORM async (`acount`, `async for`) pasan todas por el
+    mismo thread del request, así que nunca corren a la vez. Acá cada
+    función usa un thread del pool con su propia conexión, y las consultas
+    independientes se superponen. Devuelve los resultados en orden.
+    """
+
+    def isolated(func):
+        def run():
+            try:
+                with profile.count_thread_queries():
+                    return func()
+            finally:
+                _close_thread_connections()
+
+        return sync_to_async(run, thread_sensitive=False)
+
+    return await asyncio.gather(*(isolated(func)() for func in funcs))
+
+
+async def aiterate(iterator, batch_size=500):
+    """Recorrer un generador sync de un export desde un StreamingHttpResponse async.
+
+    Cada lote de `batch_size` elementos se lee en el thread del request
+    (sync_to_async), el mismo donde se abrió el cursor del `.iterator()`, y
+    se envía unido en un solo bloque.
+    """
+    next_batch = sync_to_async(lambda: list(itertools.islice(iterator, batch_size)))
+    try:
+        while batch := await next_batch():
+            yield "".join(batch) if isinstance(batch[0], str) else b"".join(batch)
+    finally:
+        # Cerrar el cursor en el mismo thread que lo abrió
+        await sync_to_async(iterator.close)()
+
+
+def adapt_action(action_method):
+    """Versión sync de una acción cuyo método, condición o `bulk` es async.
+
+    El POST corre la lógica de acciones en un thread; las corrutinas se
+    ejecutan con async_to_sync en el event loop y sus queries vuelven al
+    mismo thread, dentro de la transacción del lote. Las acciones sync se
+    devuelven tal cual.
+    """
+    parts = {attr: getattr(action_method, attr, None) for attr in ACTION_CALLABLES}
+    if not iscoroutinefunction(action_method) and not any(
+        iscoroutinefunction(part) for part in parts.values()
+    ):
+        return action_method
+
+    run = (
+        async_to_sync(action_method)
+        if iscoroutinefunction(action_method)
+        else action_method
+    )
+
+    @functools.wraps(action_method)
+    def adapted(*args, **kwargs):
+        return run(*args, **kwargs)
+
+    for attr, part in parts.items():
+        if part is not None:
+            setattr(
+                adapted,
+                attr,
+                async_to_sync(part) if iscoroutinefunction(part) else part,
+            )
+    return adapted
+
+
+def requested_page(view, table):
+    """`(offset, per_page)` de la página que va a pedir RequestConfig.
+
+    Aplica además el orden del request a `table`. Devuelve `(None, None)`
+    sin paginación o con otro paginador u `orphans`, que pueden partir las
+    páginas distinto.
+    """
+    RequestConfig(view.request, paginate=False).configure(table)
+    paginate = view.get_table_pagination(table)
+    if paginate is False:
+        return None, None
+    options = dict(paginate) if hasattr(paginate, "items") else {}
+    if options.get("paginator_class", Paginator) is not Paginator or options.get(
+        "orphans"
+    ):
+        return None, None
+    for arg in ("page", "per_page"):
+        name = getattr(table, f"prefixed_{arg}_field")
+        try:
+            options[arg] = int(view.request.GET[name])
+        except (ValueError, KeyError):
+            pass
+    page = options.get("page", 1)
+    per_page = options.get("per_page") or table._meta.per_page
+    if page < 1 or per_page < 1:
+        return None, None
+    return (page - 1) * per_page, per_page
+
+
+class AsyncViewMixin:
+    """Lo común de las vistas async: consultas previas y export en streaming.
+
+    Todo el código sync de la vista (filtros, tabla, plantilla) corre con
+    sync_to_async; lo async es la coordinación. Antes de armar el contexto
+    `prefetch_queries()` lanza juntas las consultas que no dependen entre
+    sí y deja los resultados en `self.prefetched`, donde los buscan los
+    métodos que de otro modo harían esas mismas consultas.
+    """
+
+    # Superponer las consultas independientes en threads con su propia
+    # conexión; con False van una tras otra, como con el ORM async
+    concurrent_queries = True
+    # Líneas de CSV por bloque enviado en los exports en streaming
+    export_stream_batch_size = 500
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.prefetched = {}
+        self.prefetched_page = None
+
+    def get_prefetch_queries(self):
+        """Consultas a adelantar: nombre -> función sync sin argumentos."""
+        return {}
+
+    async def prefetch_queries(self):
+        queries = await sync_to_async(self.get_prefetch_queries)()
+        if not queries:
+            return
+        with self.scotty_profile.phase("consultas"):
+            if self.concurrent_queries:
+                results = await run_concurrently(
+                    list(queries.values()), self.scotty_profile
+                )
+            else:
+                results = [await sync_to_async(func)() for func in queries.values()]
+        self.prefetched = dict(zip(queries, results))
+
+    def is_streaming_export(self, export_format):
+        return self.streaming_export and export_format in STREAMING_FORMATS
+
+    async def astreaming_export(self, export_format):
+        def build():
+            self.object_list = self.get_export_queryset()
+            with self.scotty_profile.phase("exportacion"):
+                return self.get_streaming_content(export_format)
+
+        content = await sync_to_async(build)()
+        # El XLSX se entrega en bloques de 64 KB: se mandan de a uno
+        batch_size = self.export_stream_batch_size if export_format == "csv" else 1
+        return self.streaming_export_response(
+            aiterate(content, batch_size), export_format
+        )
+
+
+class AsyncCottonTableView(AsyncViewMixin, CottonTableView):
+    """CottonTableView para ASGI: el COUNT, la página y el total sin filtrar
+    se consultan a la vez.
+
+    El resultado es el mismo que el de CottonTableView. Los caminos poco
+    frecuentes (exports por tablib o en segundo plano, el total lazy y el
+    aviso de `query_count_warning_threshold`) usan la implementación sync
+    en un thread. Las acciones pueden ser `async def`, igual que sus
+    `condition`, `condition_many` y `bulk`.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.export_trigger_param)
+        if (
+            export_format is not None
+            and not self.async_export
+            and self.export_class.is_valid_format(export_format)
+        ):
+            return await self.aadmitted_export(request, export_format, *args, **kwargs)
+        if (
+            export_format is not None
+            or request.GET.get(self.export_job_param) is not None
+            or request.GET.get(self.unfiltered_count_param) is not None
+            or (self.query_count_warning_threshold is not None and settings.DEBUG)
+        ):
+            return await sync_to_async(CottonTableView.get)(
+                self, request, *args, **kwargs
+            )
+
+        try:
+            await sync_to_async(self.filter_object_list)()
+            await self.prefetch_queries()
+            response = await sync_to_async(self.render_table_response)()
+        except (EmptyPage, Http404):
+            return await sync_to_async(self.pagination_redirect)(request)
+        if self.partial_unique_id:
+            # El navegador queda en la URL con los filtros/orden/página actuales
+            push_url(response, request.get_full_path())
+        return response
+
+    async def aadmitted_export(self, request, export_format, *args, **kwargs):
+        """Admitir el export y, si va en streaming, enviarlo en async."""
+        admission = await sync_to_async(self.admit_request)(export_format)
+        if admission.response is not None:
+            return admission.response
+        if self.is_export_preflight(admission):
+            return await sync_to_async(self.export_ticket_response)(admission)
+        if not (admission.downgraded or self.is_streaming_export(export_format)):
+            # tablib arma el archivo entero en memoria: en un thread
+            return await sync_to_async(self.admitted_export)(
+                admission, request, *args, **kwargs
+            )
+        try:
+            response = await self.astreaming_export(admission.export_format)
+        except BaseException:
+            admission.release()
+            raise
+        return admission.finish(response)
+
+    async def post(self, request, *args, **kwargs):
+        return await sync_to_async(CottonTableView.post)(
+            self, request, *args, **kwargs
+        )
+
+    def filter_object_list(self):
+        self.object_list = self.get_filtered_queryset()
+
+    def render_table_response(self):
+        """El final de FilterView.get, con `object_list` ya filtrado."""
+        context = self.get_context_data(
+            filter=self.filterset, object_list=self.object_list
+        )
+        return self.render_to_response(context)
+
+    def get_action(self, name):
+        return adapt_action(super().get_action(name))
+
+    def get_prefetch_queries(self):
+        queries = {}
+        if not isinstance(self.object_list, QuerySet):
+            return queries
+        if self.get_column_aggregates():
+            # El mismo aggregate() trae los totales y el COUNT de la paginación
+            queries["aggregates"] = self.get_aggregates
+        if self.get_paginate_by(self.object_list):
+            if "aggregates" not in queries:
+                queries["count"] = self.object_list.count
+            # Con el fragmento en cache puede que las filas no hagan falta
+            page_queryset = (
+                None if self.cache_table_fragment else self.get_page_queryset()
+            )
+            if page_queryset is not None:
+                self.prefetched_page = page_queryset
+                queries["rows"] = lambda: list(page_queryset)
+        if (
+            self.pagination_mode != pagination.CURSOR
+            and self.unfiltered_count_strategy != counts.LAZY
+            and not (
+                self.partial_unique_id
+                and self.get_unfiltered_from_header() is not None
+            )
+        ):
+            queries["unfiltered"] = self.count_unfiltered
+        return queries
+
+    def get_page_queryset(self):
+        """QuerySet de la página que va a mostrar la tabla, o None.
+
+        Arma una tabla descartable solo para aplicar el orden del request.
+        """
+        table = self.get_table_class()(
+            data=self.object_list, **self.get_table_kwargs()
+        )
+        offset, per_page = requested_page(self, table)
+        queryset = table.data.data
+        if per_page is None or not isinstance(queryset, QuerySet):
+            return None
+        return queryset[offset : offset + per_page]
+
+    def get_paginator(self, queryset, per_page, *args, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, *args, **kwargs)
+        if "count" in self.prefetched and queryset is self.object_list:
+            paginator.count = self.prefetched["count"]
+        return paginator
+
+    def count_unfiltered(self):
+        if "unfiltered" in self.prefetched:
+            return self.prefetched["unfiltered"]
+        return super().count_unfiltered()
+
+    def get_table(self, **kwargs):
+        table = super().get_table(**kwargs)
+        self.prime_page_rows(table)
+        return table
+
+    def prime_page_rows(self, table):
+        """Mostrar en la página de la tabla las filas ya leídas, si coinciden.
+
+        Solo se usan si la página quedó igual a la adelantada (mismo
+        desplazamiento, orden y cantidad); si no, la plantilla hace su query.
+        """
+        rows = self.prefetched.get("rows")
+        page = getattr(table, "page", None)
+        queryset = getattr(getattr(page, "object_list", None), "data", None)
+        if rows is None or not isinstance(queryset, QuerySet):
+            return
+        query, prefetched = queryset.query, self.prefetched_page.query
+        if (
+            queryset.model is self.prefetched_page.model
+            and query.high_mark is not None
+            and query.low_mark == prefetched.low_mark
+            and query.order_by == prefetched.order_by
+            and query.high_mark - query.low_mark == len(rows)
+        ):
+            page.object_list = BoundRows(
+                rows, table=table, pinned_data=page.object_list.pinned_data
+            )
+
+
+class AsyncDictTableView(AsyncViewMixin, DictTableView):
+    """DictTableView para ASGI.
+
+    Con un DataSource el COUNT y la página se consultan a la vez; las listas
+    en memoria no consultan nada y se arman en un thread como en la versión
+    sync.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.export_trigger_param)
+        if export_format is not None and self.is_streaming_export(export_format):
+            return await self.astreaming_export(export_format)
+        if export_format is None:
+            await self.prefetch_queries()
+        return await sync_to_async(DictTableView.get)(self, request, *args, **kwargs)
+
+    def get_prefetch_queries(self):
+        source = self.get_data_source()
+        if source is None:
+            return {}
+        queries = {"count": source.count}
+        page = None if self.cache_table_fragment else self.get_source_page(source)
+        if page is not None:
+            self.prefetched_page = page
+            queries["rows"] = functools.partial(source.slice, *page)
+        return queries
+
+    def get_source_page(self, source):
+        """`(offset, limit, orden)` de la página pedida, o None."""
+        table = self.get_table_class()(
+            data=TableSourceData(source), **self.get_table_kwargs()
+        )
+        offset, per_page = requested_page(self, table)
+        if per_page is None:
+            return None
+        return offset, per_page, table.data._order_by
+
+    def build_table_data(self, data):
+        data = super().build_table_data(data)
+        if isinstance(data, TableSourceData) and self.prefetched:
+            offset, _, order_by = self.prefetched_page or (None, None, None)
+            data.prime(
+                length=self.prefetched.get("count"),
+                offset=offset,
+                records=self.prefetched.get("rows"),
+                order_by=order_by,
+            )
+        return data
@@ -0,0 +1,220 @@
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+def check_bulk_action(action_method):
+    """Una acción con `condition` por objeto necesita su `bulk_condition`.
+
+    Sin ella el update en bloque alcanzaría filas que la condición excluye.
+    """
+    if (
+        getattr(action_method, "condition", None) is not None
+        and getattr(action_method, "bulk_condition", None) is None
+    ):
+        raise ImproperlyConfigured(
+            f"La acción {action_method.__name__} declara `condition` y `bulk` "
+            f"pero no `bulk_condition`: agregar el Q equivalente (o Q() si "
+            f"la condición no excluye filas)"
+        )
+
+
+def get_bulk_condition(action_method, request):
+    """Devolver la condición de la acción como Q (o None si no tiene).
+
+    `bulk_condition` puede ser un Q o un callable que recibe el request.
+    """
+    check_bulk_action(action_method)
+    condition = getattr(action_method, "bulk_condition", None)
+    if callable(condition):
+        condition = condition(request)
+    return condition
+
+
+def iter_pk_batches(queryset, batch_size):
+    """Recorrer los pks del queryset en lotes, paginando por pk (keyset)."""
+    last_pk = None
+    while True:
+        batch_qs = queryset.order_by("pk")
+        if last_pk is not None:
+            batch_qs = batch_qs.filter(pk__gt=last_pk)
+        batch = list(batch_qs.values_list("pk", flat=True)[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1]
+
+
+def run_bulk_action(action_method, queryset, request, batch_size=None):
+    """Ejecutar una acción a nivel QuerySet.
+
+    La acción declara `bulk(queryset, request)` (normalmente un `update()` o
+    `bulk_update()`) y, opcionalmente, `bulk_condition` como Q. Todo corre en
+    una transacción; si se indica `batch_size` el queryset se procesa en
+    lotes de ese tamaño en vez de una sola llamada.
+    """
+    condition = get_bulk_condition(action_method, request)
+    if condition is not None:
+        queryset = queryset.filter(condition)
+
+    results = []
+    with transaction.atomic(using=queryset.db):
+        if batch_size is None:
+            batches = [queryset]
+        else:
+            manager = queryset.model._base_manager
+            batches = (
+                manager.filter(pk__in=batch)
+                for batch in iter_pk_batches(queryset, batch_size)
+            )
+        for batch_qs in batches:
+            result = action_method.bulk(batch_qs, request)
+            if result is not None:
+                results.append(result)
+    return results
+
+
+class BulkRun:
+    """Progreso de una acción sobre el QuerySet filtrado completo.
+
+    Se guarda en el cache después de cada lote, así una ejecución
+    interrumpida puede retomarse desde el último pk procesado.
+    """
+
+    cache_prefix = "scotty:bulk-run:"
+    # Cantidad de tiempos por lote que se conservan
+    max_chunk_timings = 50
+
+    def __init__(self, run_id, action, ttl):
+        self.id = run_id
+        self.action = action
+        self.ttl = ttl
+        self.last_pk = None
+        self.processed = 0
+        self.succeeded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.chunk_timings = []
+        self.done = False
+
+    @staticmethod
+    def make_id(action, filter_query_string, user_id):
+        """Id determinístico: repetir el mismo pedido retoma la ejecución."""
+        raw = f"{user_id}|{action}|{filter_query_string}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    @classmethod
+    def start(cls, run_id, action, ttl):
+        """Retomar una ejecución sin terminar o empezar una nueva."""
+        state = cache.get(f"{cls.cache_prefix}{run_id}")
+        run = cls(run_id, action, ttl)
+        if state and not state["done"] and state["action"] == action:
+            run.__dict__.update(state)
+        return run
+
+    def save(self):
+        cache.set(f"{self.cache_prefix}{self.id}", self.__dict__.copy(), self.ttl)
+
+    def record_chunk(self, rows, seconds):
+        self.chunk_timings.append({"rows": rows, "seconds": round(seconds, 4)})
+        del self.chunk_timings[: -self.max_chunk_timings]
+
+    @property
+    def average_chunk_seconds(self):
+        if not self.chunk_timings:
+            return None
+        total = sum(timing["seconds"] for timing in self.chunk_timings)
+        return total / len(self.chunk_timings)
+
+
+def _run_chunk_bulk(action_method, queryset, pks, request, run):
+    chunk_qs = queryset.model._base_manager.filter(pk__in=pks)
+    condition = get_bulk_condition(action_method, request)
+    if condition is not None:
+        chunk_qs = chunk_qs.filter(condition)
+        matched = chunk_qs.count()
+    else:
+        matched = len(pks)
+
+    result = action_method.bulk(chunk_qs, request)
+    run.succeeded += matched
+    run.skipped += len(pks) - matched
+    return [] if result is None else [result]
+
+
+def _run_chunk_per_object(action_method, queryset, pks, request, run):
+    results = []
+    for obj in queryset.filter(pk__in=pks).order_by("pk"):
+        try:
+            if not action_method.condition(obj, request):
+                run.skipped += 1
+                continue
+            # Un savepoint por objeto: un error no invalida el resto del lote
+            with transaction.atomic(using=queryset.db):
+                results.append(action_method(obj))
+            run.succeeded += 1
+        except Exception:
+            logger.exception(
+                f"[SCOTTY BULK] Falló {run.action} sobre {obj.pk} (run {run.id})"
+            )
+            run.failed += 1
+    return results
+
+
+def run_chunked_action(
+    action_method, queryset, request, run, chunk_size, time_budget=None
+):
+    """Procesar el queryset en lotes por pk, cada uno en su propia transacción.
+
+    Después de cada lote se guarda el checkpoint en `run`. Si se indica
+    `time_budget` (segundos) se corta al superarlo y la ejecución queda
+    pendiente para retomarse.
+    """
+    if getattr(action_method, "bulk", None) is not None:
+        # Antes del primer lote: dentro del lote se contaría como fila fallida
+        check_bulk_action(action_method)
+        run_chunk = _run_chunk_bulk
+    else:
+        run_chunk = _run_chunk_per_object
+
+    if run.last_pk is not None:
+        queryset = queryset.filter(pk__gt=run.last_pk)
+
+    started = time.perf_counter()
+    results = []
+    for pks in iter_pk_batches(queryset, chunk_size):
+        chunk_started = time.perf_counter()
+        counts = (run.succeeded, run.skipped, run.failed)
+        try:
+            with transaction.atomic(using=queryset.db):
+                results.extend(run_chunk(action_method, queryset, pks, request, run))
+        except Exception:
+            logger.exception(
+                f"[SCOTTY BULK] Falló un lote de {run.action} desde el pk {pks[0]} "
+                f"(run {run.id})"
+            )
+            # El lote se revirtió completo: cuenta todo como fallido
+            run.succeeded, run.skipped, run.failed = counts
+            run.failed += len(pks)
+
+        seconds = time.perf_counter() - chunk_started
+        run.processed += len(pks)
+        run.last_pk = pks[-1]
+        run.record_chunk(len(pks), seconds)
+        run.save()
+        logger.debug(
+            f"[SCOTTY BULK] {run.action}: lote de {len(pks)} en {seconds:.3f}s"
+        )
+
+        if time_budget is not None and time.perf_counter() - started > time_budget:
+            return results
+
+    run.done = True
+    run.save()
+    return results
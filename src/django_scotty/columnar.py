@@ -0,0 +1,288 @@
+import logging
+import math
+import sys
+from array import array
+
+from django_tables2.data import TableData
+from django_tables2.utils import OrderBy
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover - numpy es opcional
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+INT_MIN, INT_MAX = -(2**63), 2**63 - 1
+
+
+class _ColumnBuilder:
+    """Acumula los valores de una columna en el tipo más compacto posible.
+
+    Una columna solo de enteros va en un array "q" y una solo de floats en
+    uno "d". Si se mezclan enteros y floats, o aparece cualquier otra cosa
+    (texto, fechas, None), pasa a lista: los valores se guardan tal cual
+    vinieron, sin convertir `100` en `100.0`. Los textos se internan:
+    valores repetidos comparten un solo objeto.
+    """
+
+    def __init__(self, missing=0):
+        # Una columna que aparece tarde: las filas anteriores no la tenían
+        self.values = [None] * missing if missing else array("q")
+
+    def append(self, value):
+        values = self.values
+        if isinstance(values, array):
+            if values.typecode == "q":
+                # type() y no isinstance(): los bool no van al array
+                if type(value) is int and INT_MIN <= value <= INT_MAX:
+                    values.append(value)
+                    return
+                if type(value) is float and not values:
+                    self.values = values = array("d", [value])
+                    return
+            elif type(value) is float:
+                values.append(value)
+                return
+            self.values = values = list(values)
+
+        if type(value) is str:
+            value = sys.intern(value)
+        values.append(value)
+
+
+class ColumnarData:
+    """Datos guardados por columna en vez de una lista de dicts.
+
+    Cada columna es un `array.array` tipado (enteros o floats) o una lista
+    con los textos internados. Un dict por fila repite las claves y guarda
+    cada número como objeto; por columnas, una tabla ancha ocupa una
+    fracción de eso. Con NumPy instalado, ordenar y filtrar columnas
+    numéricas se hace vectorizado.
+    """
+
+    def __init__(self, columns, length, version=None):
+        self.columns = columns
+        self.length = length
+        # Identifica el contenido; los índices se guardan por versión
+        self.version = version
+        self._indexes = {}
+        self._indexes_version = version
+
+    @classmethod
+    def from_records(cls, records, names=None, version=None):
+        """Armar las columnas consumiendo `records` (dicts) de a uno.
+
+        `records` puede ser un generador: nunca se guarda la lista de dicts.
+        Sin `names` las columnas son la unión de las claves de todos los
+        registros, en el orden en que aparecen; donde falta una clave queda
+        None.
+        """
+        collect_names = names is None
+        builders = {name: _ColumnBuilder() for name in names or ()}
+        length = 0
+        for record in records:
+            if collect_names:
+                for name in record:
+                    if name not in builders:
+                        builders[name] = _ColumnBuilder(missing=length)
+            for name, builder in builders.items():
+                builder.append(record.get(name))
+            length += 1
+
+        columns = {name: builder.values for name, builder in builders.items()}
+        return cls(columns, length, version=version)
+
+    def __len__(self):
+        return self.length
+
+    def get_index(self, key, build):
+        """Devolver el índice `key`, armándolo con `build()` la primera vez.
+
+        Si cambió `version` los índices anteriores se descartan.
+        """
+        if self._indexes_version != self.version:
+            self._indexes = {}
+            self._indexes_version = self.version
+        try:
+            return self._indexes[key]
+        except KeyError:
+            index = self._indexes[key] = build()
+            return index
+
+    def names(self):
+        return list(self.columns)
+
+    def record(self, i):
+        return {name: values[i] for name, values in self.columns.items()}
+
+    def is_numeric(self, name):
+        return isinstance(self.columns[name], array)
+
+    def as_numpy(self, name):
+        """Vista NumPy de una columna numérica (sin copiar), o None."""
+        values = self.columns[name]
+        if numpy is None or not isinstance(values, array):
+            return None
+        return numpy.frombuffer(values, dtype=values.typecode)
+
+    def argsort(self, keys, index=None):
+        """Índices de las filas ordenadas por `keys` [(columna, descendente)].
+
+        Se ordena por la última clave primero con sorts estables, así cada
+        columna se ordena con su propio tipo (vectorizado si es numérica).
+        Con o sin NumPy el resultado es el mismo: los nulos (None y NaN) van
+        al final en orden ascendente y al principio en descendente, y los
+        empates conservan el orden previo.
+        """
+        if index is None:
+            index = array("q", range(self.length))
+        for name, descending in reversed(keys):
+            column = self.as_numpy(name)
+            if column is not None:
+                positions = numpy.frombuffer(index, dtype="q")
+                values = column[positions]
+                if descending:
+                    # Ascendente sobre la columna invertida y vuelta a invertir:
+                    # descendente estable, sin negar (-INT_MIN desborda)
+                    order = numpy.argsort(values[::-1], kind="stable")
+                    order = (len(values) - 1 - order)[::-1]
+                else:
+                    order = numpy.argsort(values, kind="stable")
+                index = array("q", positions[order].tobytes())
+            else:
+                index = array("q", self._sort_list(name, index, descending))
+        return index
+
+    def _sort_list(self, name, index, descending):
+        values = self.columns[name]
+        try:
+            return sorted(
+                index, key=lambda i: _sort_key(values[i]), reverse=descending
+            )
+        except TypeError:
+            # Tipos mezclados en la columna: se agrupan por tipo
+            return sorted(
+                index,
+                key=lambda i: _mixed_sort_key(values[i]),
+                reverse=descending,
+            )
+
+    def where(self, name, predicate, index=None):
+        """Índices de las filas cuyo valor en `name` cumple `predicate`.
+
+        El predicado se evalúa una vez por valor distinto en las columnas
+        de texto (internadas, se repiten mucho) y no una vez por fila.
+        """
+        values = self.columns[name]
+        if index is None:
+            index = range(self.length)
+        if isinstance(values, array):
+            return array("q", (i for i in index if predicate(values[i])))
+
+        results = {}
+        selected = array("q")
+        for i in index:
+            value = values[i]
+            try:
+                matches = results[value]
+            except KeyError:
+                matches = results[value] = bool(predicate(value))
+            except TypeError:  # valor no hasheable
+                matches = bool(predicate(value))
+            if matches:
+                selected.append(i)
+        return selected
+
+    def where_array(self, name, mask_function, index=None):
+        """Como `where` pero con una función sobre el array NumPy completo.
+
+        `mask_function` recibe la columna y devuelve un array de booleanos,
+        por ejemplo `lambda col: col >= 10`. Sin NumPy o en columnas no
+        numéricas devuelve None para que el llamador use `where`.
+        """
+        column = self.as_numpy(name)
+        if column is None:
+            return None
+        if index is None:
+            return array("q", numpy.flatnonzero(mask_function(column)).tobytes())
+        positions = numpy.frombuffer(index, dtype="q")
+        mask = mask_function(column[positions])
+        return array("q", positions[mask].tobytes())
+
+
+def _is_null(value):
+    # NaN se trata como nulo, igual que lo ordena NumPy
+    return value is None or (type(value) is float and math.isnan(value))
+
+
+def _sort_key(value):
+    # Nulos al final en orden ascendente, sin compararlos con otros valores
+    if _is_null(value):
+        return (True, 0)
+    return (False, value)
+
+
+def _mixed_sort_key(value):
+    if _is_null(value):
+        return (True, "", 0)
+    return (False, type(value).__name__, value)
+
+
+class TableColumnarData(TableData):
+    """TableData de django_tables2 sobre ColumnarData.
+
+    Ordenar y filtrar solo reordenan un array de índices; los dicts de las
+    filas se arman recién al mostrar la página o al exportar, de a uno.
+    """
+
+    def __init__(self, data, index=None):
+        if not isinstance(data, ColumnarData):
+            data = ColumnarData.from_records(data)
+        super().__init__(data)
+        self.index = array("q", range(len(data)) if index is None else index)
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.data.record(i) for i in self.index[key]]
+        return self.data.record(self.index[key])
+
+    def __iter__(self):
+        record = self.data.record
+        for i in self.index:
+            yield record(i)
+
+    def iterator(self, chunk_size=None):
+        """Recorrido completo en el orden de la tabla, para exportar."""
+        return iter(self)
+
+    def filter(self, name, predicate):
+        """Dejar solo las filas cuyo valor en `name` cumple `predicate`."""
+        self.index = self.data.where(name, predicate, self.index)
+        return self
+
+    def order_by(self, aliases):
+        """Ordenar por los alias de la tabla, como TableListData.
+
+        Solo se puede ordenar por columnas guardadas; los accessors con
+        relaciones (a.b) se ignoran.
+        """
+        keys = []
+        for alias in aliases:
+            bound_column = self.table.columns[OrderBy(alias).bare]
+            if alias[0] != bound_column.order_by_alias[0]:
+                accessors = bound_column.order_by.opposite
+            else:
+                accessors = bound_column.order_by
+            for accessor in accessors:
+                if accessor.bare not in self.data.columns:
+                    logger.warning(
+                        f"[SCOTTY COLUMNAR] No se puede ordenar por {accessor.bare}"
+                    )
+                    continue
+                keys.append((accessor.bare, accessor.is_descending))
+        if keys:
+            self.index = self.data.argsort(keys, self.index)
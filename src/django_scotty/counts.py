@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import time
+
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db import DatabaseError, connections
+from django.db.models.signals import post_delete, post_save
+
+logger = logging.getLogger(__name__)
+
+EXACT = "exact"
+CACHED = "cached"
+ESTIMATED = "estimated"
+LAZY = "lazy"
+STRATEGIES = (EXACT, CACHED, ESTIMATED, LAZY)
+
+
+def _version_key(model):
+    return f"scotty:model-version:{model._meta.label_lower}"
+
+
+def get_model_version(model):
+    """Devolver el contador de versión del modelo, creándolo si hace falta.
+
+    Arranca en un valor basado en la hora para que, si el cache lo descarta,
+    las claves viejas no vuelvan a coincidir.
+    """
+    key = _version_key(model)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_model_version(model):
+    """Invalidar todo lo cacheado para el modelo."""
+    try:
+        cache.incr(_version_key(model))
+    except ValueError:
+        get_model_version(model)
+
+
+def _bump_on_signal(sender, **kwargs):
+    bump_model_version(sender)
+
+
+def connect_model_invalidation(model):
+    """Subir la versión del modelo en cada save/delete. Se puede llamar varias veces."""
+    uid = f"scotty-model-version-{model._meta.label_lower}"
+    post_save.connect(_bump_on_signal, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(_bump_on_signal, sender=model, weak=False, dispatch_uid=uid)
+
+
+def exact_count(queryset):
+    return queryset.count()
+
+
+def cached_count(queryset, timeout):
+    """COUNT(*) cacheado por `timeout` segundos e invalidado por las señales del modelo.
+
+    La clave incluye el SQL del queryset: dos querysets del mismo modelo con
+    distintos filtros (por ejemplo, según el usuario) no comparten el total.
+    """
+    model = queryset.model
+    try:
+        sql = str(queryset.query)
+    except EmptyResultSet:
+        # .none() o un filtro que nunca matchea: Django no va a la base
+        return queryset.count()
+    connect_model_invalidation(model)
+    query_hash = hashlib.sha1(f"{queryset.db}|{sql}".encode()).hexdigest()
+    key = (
+        f"scotty:count:{model._meta.label_lower}:{get_model_version(model)}:"
+        f"{query_hash}"
+    )
+    return cache.get_or_set(key, queryset.count, timeout)
+
+
+def _planner_estimate(model, using):
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass",
+                [connection.ops.quote_name(table)],
+            )
+            row = cursor.fetchone()
+            # reltuples vale -1 si la tabla nunca fue analizada
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == "sqlite":
+            # Existe solo después de correr ANALYZE
+            cursor.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = %s AND idx IS NULL",
+                [table],
+            )
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute("SELECT stat FROM sqlite_stat1 WHERE tbl = %s", [table])
+                row = cursor.fetchone()
+            return int(row[0].split()[0]) if row else None
+    return None
+
+
+def estimated_count(queryset):
+    """Cantidad estimada según las estadísticas del planificador.
+
+    Devuelve `(cantidad, es_estimada)`; si el motor no tiene estadísticas
+    se cae a un COUNT(*) exacto.
+    """
+    try:
+        estimate = _planner_estimate(queryset.model, queryset.db)
+    except DatabaseError:
+        logger.debug(f"[SCOTTY COUNT] Sin estadísticas para {queryset.model}")
+        estimate = None
+    if estimate is None:
+        return queryset.count(), False
+    return estimate, True
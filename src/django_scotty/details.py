@@ -0,0 +1,113 @@
+import threading
+
+from django.core.signals import setting_changed
+from django.db.models.signals import class_prepared
+from django.utils.functional import Promise, lazy
+
+# (clase de la vista, modelo, campos excluidos) -> FieldPlan
+_plans = {}
+_plans_lock = threading.Lock()
+
+_capitalize_lazy = lazy(lambda text: str(text).capitalize(), str)
+
+
+def _label(field):
+    label = getattr(field, "verbose_name", None) or field.name
+    if isinstance(label, Promise):
+        # Traducible: se capitaliza al renderizar, en el idioma del request
+        return _capitalize_lazy(label)
+    return str(label).capitalize()
+
+
+class PlanField:
+    """Un campo del detalle: nombre, etiqueta y método de display (o None)."""
+
+    __slots__ = ("name", "label", "display_method")
+
+    def __init__(self, name, label, display_method=None):
+        self.name = name
+        self.label = label
+        self.display_method = display_method
+
+    def __repr__(self):
+        return f"<PlanField {self.name}>"
+
+
+class FieldPlan:
+    """Qué campos muestra GenericDetailView para un modelo y cómo traerlos.
+
+    Se arma una vez recorriendo `_meta.get_fields()`: los campos concretos
+    en orden (sin M2M ni los excluidos), con su etiqueta ya capitalizada y
+    el `get_<campo>_display` a usar si existe. De ahí salen también el
+    `only()` y el `select_related()` de la query del detalle.
+    """
+
+    def __init__(self, model, exclude_fields=()):
+        self.model = model
+        self.excluded = frozenset(exclude_fields)
+        fields = []
+        related = []
+        for field in model._meta.get_fields():
+            # Many to many por ahora no manejamos
+            if not field.concrete or field.many_to_many:
+                continue
+            if field.name in self.excluded:
+                continue
+            display_method = f"get_{field.name}_display"
+            fields.append(
+                PlanField(
+                    field.name,
+                    _label(field),
+                    display_method if hasattr(model, display_method) else None,
+                )
+            )
+            if field.many_to_one or field.one_to_one:
+                related.append(field.name)
+        self.fields = tuple(fields)
+        self.field_names = tuple(field.name for field in fields)
+        self.select_related = tuple(related)
+
+    def __repr__(self):
+        return f"<FieldPlan {self.model._meta.label}: {', '.join(self.field_names)}>"
+
+    def optimize(self, queryset, use_only=True):
+        """Restringir la query a los campos del plan (y sus FK, completas)."""
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if use_only and self.field_names:
+            queryset = queryset.only(*self.field_names)
+        return queryset
+
+
+def get_field_plan(view_class, model, exclude_fields=None):
+    """Devolver el plan de `view_class` para `model`, armándolo la primera vez.
+
+    `exclude_fields` es el de la instancia (puede venir de `as_view()`); si
+    no se pasa se usa el de la clase.
+    """
+    if exclude_fields is None:
+        exclude_fields = view_class.exclude_fields
+    excluded = frozenset(exclude_fields)
+    key = (view_class, model, excluded)
+    plan = _plans.get(key)
+    if plan is None:
+        plan = FieldPlan(model, excluded)
+        with _plans_lock:
+            _plans.setdefault(key, plan)
+    return plan
+
+
+def clear_field_plans(**kwargs):
+    with _plans_lock:
+        _plans.clear()
+
+
+def _clear_on_installed_apps(setting, **kwargs):
+    if setting == "INSTALLED_APPS":
+        clear_field_plans()
+
+
+# Un modelo nuevo o recargado, o cambios en INSTALLED_APPS (override_settings
+# en tests), pueden cambiar los campos: se descartan todos los planes
+class_prepared.connect(clear_field_plans, dispatch_uid="scotty_field_plans")
+setting_changed.connect(_clear_on_installed_apps, dispatch_uid="scotty_field_plans")
@@ -0,0 +1,425 @@
+import datetime
+import itertools
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from decimal import Decimal
+
+import django_filters
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import capfirst
+
+from .columnar import ColumnarData, numpy
+
+logger = logging.getLogger(__name__)
+
+LOOKUP_SEP = "__"
+
+STRING_LOOKUPS = {
+    "iexact": lambda value, term: value.lower() == term.lower(),
+    "contains": lambda value, term: term in value,
+    "icontains": lambda value, term: term.lower() in value.lower(),
+    "startswith": lambda value, term: value.startswith(term),
+    "istartswith": lambda value, term: value.lower().startswith(term.lower()),
+    "endswith": lambda value, term: value.endswith(term),
+    "iendswith": lambda value, term: value.lower().endswith(term.lower()),
+}
+RANGE_LOOKUPS = {"gt", "gte", "lt", "lte", "range"}
+LOOKUPS = {"exact", "in", "isnull"} | RANGE_LOOKUPS | set(STRING_LOOKUPS)
+
+
+def _to_date(value):
+    if isinstance(value, datetime.datetime):
+        if timezone.is_aware(value):
+            value = timezone.localtime(value)
+        return value.date()
+    return value
+
+
+TRANSFORMS = {
+    "date": _to_date,
+    "year": lambda value: value.year,
+    "month": lambda value: value.month,
+    "day": lambda value: value.day,
+}
+
+
+# Si quedan menos de 1/N filas candidatas, conviene recorrerlas que usar índices
+SCAN_RATIO = 8
+
+
+def _positions(values):
+    if numpy is not None and isinstance(values, array):
+        return array("q", numpy.sort(numpy.frombuffer(values, dtype="q")).tobytes())
+    return array("q", sorted(values))
+
+
+def _intersect(a, b):
+    if numpy is not None:
+        result = numpy.intersect1d(
+            numpy.frombuffer(a, dtype="q"),
+            numpy.frombuffer(b, dtype="q"),
+            assume_unique=True,
+        )
+        return array("q", result.tobytes())
+    return _positions(set(a).intersection(b))
+
+
+def _union(parts, disjoint=False):
+    """Unir posiciones ordenadas; `disjoint` si no se repiten entre partes."""
+    parts = [part for part in parts if len(part)]
+    if len(parts) == 1:
+        return parts[0]
+    if numpy is not None and parts:
+        merged = numpy.concatenate([numpy.frombuffer(p, dtype="q") for p in parts])
+        merged = numpy.sort(merged)
+        if not disjoint and len(merged):
+            merged = merged[numpy.concatenate(([True], merged[1:] != merged[:-1]))]
+        return array("q", merged.tobytes())
+    if disjoint:
+        return array("q", sorted(itertools.chain.from_iterable(parts)))
+    return _positions(set().union(*parts))
+
+
+def _complement(positions, length):
+    excluded = set(positions)
+    return array("q", (i for i in range(length) if i not in excluded))
+
+
+def _coerce(value, sample):
+    """Llevar el valor del formulario al tipo de la columna para comparar."""
+    if value is None or sample is None:
+        return value
+    if isinstance(sample, datetime.datetime):
+        if isinstance(value, datetime.datetime):
+            if timezone.is_aware(sample) and timezone.is_naive(value):
+                return timezone.make_aware(value)
+            if timezone.is_naive(sample) and timezone.is_aware(value):
+                return timezone.make_naive(value)
+        elif isinstance(value, datetime.date):
+            value = datetime.datetime.combine(value, datetime.time.min)
+            if timezone.is_aware(sample):
+                # Igual que Django: la medianoche en la zona horaria actual
+                value = timezone.make_aware(value)
+        return value
+    if isinstance(sample, datetime.date) and isinstance(value, datetime.datetime):
+        return _to_date(value)
+    if isinstance(value, Decimal) and isinstance(sample, (int, float)):
+        return float(value) if isinstance(sample, float) else value
+    if isinstance(value, str) and type(sample) in (int, float):
+        # ChoiceFilter devuelve texto aunque la columna sea numérica
+        try:
+            return type(sample)(value)
+        except ValueError:
+            return value
+    if isinstance(sample, str) and not isinstance(value, str):
+        return str(value)
+    return value
+
+
+class ColumnarQuerySet:
+    """Interfaz mínima de QuerySet sobre ColumnarData para django-filter.
+
+    Los filtros de django-filter llaman a `filter(**{"campo__lookup": valor})`,
+    `exclude()`, `distinct()` y combinan Q; acá cada condición se resuelve
+    por columna y devuelve posiciones de filas. Con `use_indexes` (por
+    defecto) se arma, la primera vez que se usa, un índice hash por valor
+    (exact, in, isnull y los lookups de texto, que se evalúan una vez por
+    valor distinto) o un índice ordenado (gt, gte, lt, lte, range), que
+    quedan guardados en el ColumnarData para su `version`.
+    """
+
+    model = None
+
+    def __init__(self, data, index=None, use_indexes=True):
+        if not isinstance(data, ColumnarData):
+            data = ColumnarData.from_records(data)
+        self.data = data
+        self.index = index
+        self.use_indexes = use_indexes
+
+    def _clone(self, index):
+        return type(self)(self.data, index, use_indexes=self.use_indexes)
+
+    def all(self):
+        return self
+
+    def none(self):
+        return self._clone(array("q"))
+
+    def distinct(self):
+        return self
+
+    def filter(self, *args, **kwargs):
+        matched = self._match(Q(*args, **kwargs), candidates=self.index)
+        return self._clone(self._narrow(matched))
+
+    def exclude(self, *args, **kwargs):
+        excluded = self._match(Q(*args, **kwargs))
+        return self._clone(self._narrow(_complement(excluded, len(self.data))))
+
+    def count(self):
+        return len(self)
+
+    def __len__(self):
+        return len(self.data) if self.index is None else len(self.index)
+
+    def __iter__(self):
+        index = range(len(self.data)) if self.index is None else self.index
+        for i in index:
+            yield self.data.record(i)
+
+    def _narrow(self, positions):
+        if self.index is None:
+            return positions
+        return _intersect(self.index, positions)
+
+    def _match(self, q, candidates=None):
+        """Posiciones (ordenadas) de las filas que cumplen el Q.
+
+        Con `candidates` alcanza con resolver el Q dentro de esas filas.
+        """
+        if q.negated:
+            candidates = None
+        parts = []
+        for child in q.children:
+            if isinstance(child, Q):
+                parts.append(self._match(child, candidates))
+            else:
+                parts.append(self._lookup(*child, candidates=candidates))
+            if q.connector == Q.AND and not q.negated:
+                candidates = parts[-1]
+
+        if not parts:
+            result = array("q", range(len(self.data)))
+        elif q.connector == Q.OR:
+            result = _union(parts)
+        else:
+            result = parts[0]
+            for part in parts[1:]:
+                result = _intersect(result, part)
+        if q.negated:
+            result = _complement(result, len(self.data))
+        return result
+
+    # --- Lookups ---------------------------------------------------------
+
+    def _parse(self, lookup):
+        parts = lookup.split(LOOKUP_SEP)
+        name = parts.pop(0)
+        if name not in self.data.columns:
+            raise ValueError(f"Columna desconocida para filtrar: {name}")
+        lookup_name = "exact"
+        if parts and parts[-1] in LOOKUPS:
+            lookup_name = parts.pop()
+        for transform in parts:
+            if transform not in TRANSFORMS:
+                raise ValueError(f"Lookup no soportado: {lookup}")
+        return name, tuple(parts), lookup_name
+
+    def _values(self, name, transforms):
+        values = self.data.columns[name]
+        if not transforms:
+            return values
+
+        def build():
+            transformed = list(values)
+            for transform in transforms:
+                function = TRANSFORMS[transform]
+                transformed = [
+                    None if value is None else function(value)
+                    for value in transformed
+                ]
+            return transformed
+
+        return self.data.get_index(("transform", name, transforms), build)
+
+    def _sample(self, name, transforms):
+        values = self._values(name, transforms)
+        return self.data.get_index(
+            ("sample", name, transforms),
+            lambda: next((value for value in values if value is not None), None),
+        )
+
+    def _lookup(self, lookup, value, candidates=None):
+        name, transforms, lookup_name = self._parse(lookup)
+        sample = self._sample(name, transforms)
+        if lookup_name == "in":
+            value = [_coerce(v, sample) for v in value]
+        elif lookup_name == "range":
+            value = tuple(_coerce(v, sample) for v in value)
+        elif lookup_name != "isnull":
+            value = _coerce(value, sample)
+
+        if candidates is not None and len(candidates) * SCAN_RATIO < len(self.data):
+            return self._lookup_scan(name, transforms, lookup_name, value, candidates)
+        if self.use_indexes:
+            try:
+                return self._lookup_index(name, transforms, lookup_name, value)
+            except TypeError:
+                # Columna sin índice posible o valor no comparable
+                logger.debug(f"[SCOTTY FILTER] Sin índice para {lookup}")
+        return self._lookup_scan(name, transforms, lookup_name, value)
+
+    def _hash_index(self, name, transforms):
+        values = self._values(name, transforms)
+
+        def build():
+            buckets = {}
+            try:
+                for i, value in enumerate(values):
+                    buckets.setdefault(value, array("q")).append(i)
+            except TypeError:
+                return None  # Valores no hasheables
+            return buckets
+
+        buckets = self.data.get_index(("hash", name, transforms), build)
+        if buckets is None:
+            raise TypeError(f"La columna {name} no admite índice hash")
+        return buckets
+
+    def _sorted_index(self, name, transforms):
+        values = self._values(name, transforms)
+
+        def build():
+            try:
+                order = sorted(
+                    (i for i in range(len(values)) if values[i] is not None),
+                    key=values.__getitem__,
+                )
+            except TypeError:
+                return None  # Tipos mezclados, no se pueden ordenar
+            return [values[i] for i in order], array("q", order)
+
+        index = self.data.get_index(("sorted", name, transforms), build)
+        if index is None:
+            raise TypeError(f"La columna {name} no admite índice ordenado")
+        return index
+
+    def _lookup_index(self, name, transforms, lookup_name, value):
+        if lookup_name in RANGE_LOOKUPS:
+            keys, order = self._sorted_index(name, transforms)
+            low, high = 0, len(keys)
+            if lookup_name == "gt":
+                low = bisect_right(keys, value)
+            elif lookup_name == "gte":
+                low = bisect_left(keys, value)
+            elif lookup_name == "lt":
+                high = bisect_left(keys, value)
+            elif lookup_name == "lte":
+                high = bisect_right(keys, value)
+            else:
+                low, high = bisect_left(keys, value[0]), bisect_right(keys, value[1])
+            return _positions(order[low:high])
+
+        buckets = self._hash_index(name, transforms)
+        empty = array("q")
+        if lookup_name == "exact":
+            return buckets.get(value, empty)
+        if lookup_name == "in":
+            return _union([buckets.get(v, empty) for v in set(value)], disjoint=True)
+        if lookup_name == "isnull":
+            nulls = buckets.get(None, empty)
+            return nulls if value else _complement(nulls, len(self.data))
+
+        # Lookups de texto: una evaluación por valor distinto
+        test = STRING_LOOKUPS[lookup_name]
+        term = str(value)
+        return _union(
+            [
+                positions
+                for key, positions in buckets.items()
+                if key is not None and test(str(key), term)
+            ],
+            disjoint=True,
+        )
+
+    def _lookup_scan(self, name, transforms, lookup_name, value, candidates=None):
+        if not transforms and self.data.as_numpy(name) is not None:
+            mask_function = self._mask_function(lookup_name, value)
+            if mask_function is not None:
+                return self.data.where_array(name, mask_function, candidates)
+        predicate = self._predicate(lookup_name, value)
+        if not transforms:
+            return self.data.where(name, predicate, candidates)
+        values = self._values(name, transforms)
+        if candidates is None:
+            candidates = range(len(values))
+        return array("q", (i for i in candidates if predicate(values[i])))
+
+    @staticmethod
+    def _mask_function(lookup_name, value):
+        """Comparación vectorizada para columnas numéricas, o None."""
+        if lookup_name == "isnull":
+            return None
+        values = value if lookup_name in ("in", "range") else (value,)
+        if not all(type(v) in (int, float, Decimal) for v in values):
+            return None
+        values = [float(v) if isinstance(v, Decimal) else v for v in values]
+        if lookup_name == "exact":
+            return lambda column: column == values[0]
+        if lookup_name == "in":
+            return lambda column: numpy.isin(column, values)
+        if lookup_name == "gt":
+            return lambda column: column > values[0]
+        if lookup_name == "gte":
+            return lambda column: column >= values[0]
+        if lookup_name == "lt":
+            return lambda column: column < values[0]
+        if lookup_name == "lte":
+            return lambda column: column <= values[0]
+        if lookup_name == "range":
+            return lambda column: (column >= values[0]) & (column <= values[1])
+        return None
+
+    @staticmethod
+    def _predicate(lookup_name, value):
+        if lookup_name == "exact":
+            return lambda v: v == value
+        if lookup_name == "in":
+            members = set(value)
+            return lambda v: v in members
+        if lookup_name == "isnull":
+            return lambda v: (v is None) == bool(value)
+        if lookup_name == "gt":
+            return lambda v: v is not None and v > value
+        if lookup_name == "gte":
+            return lambda v: v is not None and v >= value
+        if lookup_name == "lt":
+            return lambda v: v is not None and v < value
+        if lookup_name == "lte":
+            return lambda v: v is not None and v <= value
+        if lookup_name == "range":
+            return lambda v: v is not None and value[0] <= v <= value[1]
+        test = STRING_LOOKUPS[lookup_name]
+        term = str(value)
+        return lambda v: v is not None and test(str(v), term)
+
+
+class DictFilterSet(django_filters.FilterSet):
+    """FilterSet de django-filter para DictTableView.
+
+    Se declaran los filtros igual que en un FilterSet común (CharFilter,
+    NumberFilter, ChoiceFilter, MultipleChoiceFilter, RangeFilter,
+    DateFromToRangeFilter, etc.), indicando `field_name` cuando no coincide
+    con la columna. Sin modelo, los filtros se toman solo de los declarados.
+    El formulario es el de django-filter, así las plantillas de filtros
+    funcionan sin cambios; `qs` devuelve un ColumnarQuerySet.
+    """
+
+    def __init__(self, data=None, queryset=None, *, request=None, prefix=None):
+        if not isinstance(queryset, ColumnarQuerySet):
+            queryset = ColumnarQuerySet(queryset or [])
+        super().__init__(data, queryset, request=request, prefix=prefix)
+        for filter_ in self.filters.values():
+            # Sin modelo, django-filter no puede deducir la etiqueta
+            del filter_.model
+            if filter_.label is None:
+                filter_.label = capfirst(filter_.field_name.replace("_", " "))
+
+    def filter_queryset(self, queryset):
+        # django-filter exige un QuerySet de Django en cada paso
+        for name, value in self.form.cleaned_data.items():
+            queryset = self.filters[name].filter(queryset, value)
+        return queryset
@@ -0,0 +1,130 @@
+import functools
+import importlib
+import json
+import logging
+import os
+import pkgutil
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_NAME = "scotty_manifest.json"
+MANIFEST_VERSION = 2
+
+LIST = "list"
+DETAIL = "detail"
+
+
+def get_scotty_dir(app_name):
+    """Ruta de `<app>/scotty/`, o None si la app no tiene vistas Scotty."""
+    app_module = importlib.import_module(app_name)
+    scotty_dir = os.path.join(os.path.dirname(app_module.__file__), "scotty")
+    return scotty_dir if os.path.isdir(scotty_dir) else None
+
+
+def iter_module_names(scotty_dir):
+    for module_info in pkgutil.iter_modules([scotty_dir]):
+        if module_info.name != "__init__":
+            yield module_info.name
+
+
+def get_manifest_path(scotty_dir):
+    return os.path.join(scotty_dir, MANIFEST_NAME)
+
+
+def _module_mtimes(scotty_dir, module_names):
+    mtimes = {}
+    for name in module_names:
+        module_path = os.path.join(scotty_dir, f"{name}.py")
+        if not os.path.exists(module_path):
+            # Subpaquete
+            module_path = os.path.join(scotty_dir, name, "__init__.py")
+        try:
+            mtimes[name] = os.stat(module_path).st_mtime
+        except OSError:
+            mtimes[name] = None
+    return mtimes
+
+
+def write_manifest(app_name, scotty_dir, entries):
+    """Guardar las entradas de URL de la app junto a sus módulos scotty."""
+    module_names = sorted(iter_module_names(scotty_dir))
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "app": app_name,
+        "modules": _module_mtimes(scotty_dir, module_names),
+        "entries": entries,
+    }
+    manifest_path = get_manifest_path(scotty_dir)
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as manifest_file:
+        json.dump(manifest, manifest_file, indent=2, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+    return manifest_path
+
+
+def read_manifest(scotty_dir):
+    """Devolver las entradas del manifiesto, o None si no hay o está viejo.
+
+    El manifiesto se descarta si cambió la lista de módulos o alguno se
+    modificó después de generarlo: así nunca se sirven URLs desactualizadas.
+    """
+    manifest_path = get_manifest_path(scotty_dir)
+    try:
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+    except ValueError as err:
+        logger.warning(f"[SCOTTY LOADER] Manifiesto inválido {manifest_path} {err}")
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return None
+    module_names = sorted(iter_module_names(scotty_dir))
+    if manifest.get("modules") != _module_mtimes(scotty_dir, module_names):
+        logger.warning(
+            f"[SCOTTY LOADER] Manifiesto desactualizado {manifest_path}, "
+            f"regenerar con `manage.py scotty_manifest`"
+        )
+        return None
+    return manifest.get("entries")
+
+
+def resolve_class(module_path, class_name):
+    """Importar la clase `class_name` (un `__qualname__`, quizá anidado)."""
+    module = importlib.import_module(module_path)
+    return functools.reduce(getattr, class_name.split("."), module)
+
+
+def lazy_view(module_path, class_name, kind, is_async=False):
+    """Vista que importa el módulo de la clase recién en el primer request.
+
+    Con `is_async` la vista es una corrutina, para que Django no la corra
+    en un thread como si fuera sync.
+    """
+    resolved = None
+
+    def resolve():
+        nonlocal resolved
+        if resolved is None:
+            cls = resolve_class(module_path, class_name)
+            if kind == DETAIL:
+                resolved = cls.as_view(model=cls.model)
+            else:
+                resolved = cls.as_view()
+        return resolved
+
+    if is_async:
+
+        async def view(request, *args, **kwargs):
+            return await resolve()(request, *args, **kwargs)
+
+    else:
+
+        def view(request, *args, **kwargs):
+            return resolve()(request, *args, **kwargs)
+
+    view.__name__ = class_name
+    view.__module__ = module_path
+    view.scotty_lazy = True
+    return view
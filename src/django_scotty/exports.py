@@ -0,0 +1,417 @@
+import contextlib
+import csv
+import datetime
+import logging
+import queue
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+from django.http import FileResponse, HttpRequest, QueryDict, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.encoding import force_str
+from django_tables2.config import RequestConfig
+from django_tables2.export import TableExport
+from django_tables2.rows import BoundRow
+from openpyxl import Workbook
+
+from .instrumentation import NULL_PROFILE
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+STREAMING_FORMATS = tuple(CONTENT_TYPES)
+
+logger = logging.getLogger(__name__)
+
+# Caracteres que Excel no acepta en el nombre de una hoja
+INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+class _Echo:
+    """Pseudo-buffer para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def _excel_value(value):
+    """Excel no soporta zonas horarias, pasamos los datetime a hora local naive."""
+    if isinstance(value, datetime.datetime) and timezone.is_aware(value):
+        return timezone.make_naive(value)
+    return value
+
+
+def iter_table_rows(table, exclude_columns=(), chunk_size=2000):
+    """Recorrer la tabla fila por fila, cabecera incluida, sin materializarla.
+
+    Si los datos son un QuerySet se leen en bloques con `.iterator()`, así
+    la memoria usada no depende de la cantidad de registros.
+    """
+    columns = [
+        column
+        for column in table.columns.iterall()
+        if not (column.column.exclude_from_export or column.name in exclude_columns)
+    ]
+    yield [force_str(column.header, strings_only=True) for column in columns]
+
+    data = table.data.data
+    if hasattr(table.data, "iterator"):
+        # TableData que sabe recorrerse en el orden de la tabla (DataSource)
+        records = table.data.iterator(chunk_size=chunk_size)
+    elif hasattr(data, "iterator"):
+        records = data.iterator(chunk_size=chunk_size)
+    else:
+        records = iter(data)
+
+    for record in records:
+        row = BoundRow(record, table=table)
+        yield [
+            force_str(row.get_cell_value(column.name), strings_only=True)
+            for column in columns
+        ]
+    yield from footer_rows(table, columns)
+
+
+def count_footer_rows(table):
+    """Cuántas de las filas de `iter_table_rows` son de pie y no registros."""
+    return len(getattr(table, "export_footer_rows", ()))
+
+
+def footer_rows(table, columns):
+    """Filas de pie (`table.export_footer_rows`) alineadas con `columns`.
+
+    Las arma quien ya tiene los valores, por ejemplo los totales de
+    aggregates.py, así el export no vuelve a recorrer los registros.
+    """
+    for footer in getattr(table, "export_footer_rows", ()):
+        yield [
+            force_str(footer.get(column.name, ""), strings_only=True)
+            for column in columns
+        ]
+
+
+class FooterTableExport(TableExport):
+    """TableExport de django_tables2 que agrega las filas de pie de la tabla."""
+
+    def table_to_dataset(self, table, exclude_columns, dataset_kwargs=None):
+        dataset = super().table_to_dataset(table, exclude_columns, dataset_kwargs)
+        columns = [
+            column
+            for column in table.columns.iterall()
+            if not (
+                column.column.exclude_from_export
+                or column.name in (exclude_columns or ())
+            )
+        ]
+        for row in footer_rows(table, columns):
+            dataset.append(row)
+        return dataset
+
+
+def stream_csv(rows):
+    """Generar el CSV línea por línea."""
+    writer = csv.writer(_Echo())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_xlsx(rows, title=None, block_size=64 * 1024):
+    """Generar un XLSX con un workbook write-only de openpyxl.
+
+    El workbook write-only vuelca cada fila a disco a medida que se agrega,
+    el archivo final se entrega en bloques de `block_size` bytes.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title[:31] if title else None)
+    for row in rows:
+        sheet.append([_excel_value(value) for value in row])
+
+    with tempfile.TemporaryFile() as tmp:
+        workbook.save(tmp)
+        tmp.seek(0)
+        while chunk := tmp.read(block_size):
+            yield chunk
+
+
+class StreamingExportMixin:
+    """Exportación en streaming para vistas con ExportMixin.
+
+    Con `streaming_export = True` los formatos CSV y XLSX no pasan por tablib:
+    se recorre el QuerySet en bloques de `export_chunk_size` registros y se
+    devuelve un StreamingHttpResponse. El resto de los formatos siguen por
+    el ExportMixin de django_tables2.
+    """
+
+    streaming_export = False
+    export_chunk_size = 2000
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.GET.get(self.export_trigger_param, None)
+        if self.streaming_export and export_format in STREAMING_FORMATS:
+            self.object_list = self.get_export_queryset()
+            return self.create_streaming_export(export_format)
+        return super().get(request, *args, **kwargs)
+
+    def get_export_queryset(self):
+        """Devolver los datos a exportar, sin paginar."""
+        return self.get_queryset()
+
+    def get_export_table(self):
+        """Construir la tabla ordenada según el request, pero sin paginación."""
+        table_class = self.get_table_class()
+        table = table_class(data=self.get_table_data(), **self.get_table_kwargs())
+        RequestConfig(self.request, paginate=False).configure(table)
+        return table
+
+    def create_export(self, export_format):
+        profile = getattr(self, "scotty_profile", NULL_PROFILE)
+        with profile.phase("exportacion"):
+            return super().create_export(export_format)
+
+    def create_streaming_export(self, export_format):
+        profile = getattr(self, "scotty_profile", NULL_PROFILE)
+        with profile.phase("exportacion"):
+            return self.build_streaming_export(export_format)
+
+    def build_streaming_export(self, export_format):
+        return self.streaming_export_response(
+            self.get_streaming_content(export_format), export_format
+        )
+
+    def get_streaming_content(self, export_format):
+        """Generador con el contenido del archivo; consulta recién al recorrerlo."""
+        rows = iter_table_rows(
+            self.get_export_table(),
+            exclude_columns=self.exclude_columns,
+            chunk_size=self.export_chunk_size,
+        )
+        if export_format == "csv":
+            return stream_csv(rows)
+        title = (self.get_dataset_kwargs() or {}).get("title")
+        return stream_xlsx(rows, title=title)
+
+    def streaming_export_response(self, content, export_format):
+        response = StreamingHttpResponse(
+            content, content_type=CONTENT_TYPES[export_format]
+        )
+        filename = self.get_export_filename(export_format)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class SheetResult:
+    """Resultado de una hoja del workbook: filas escritas y segundos de armado."""
+
+    def __init__(self, title, view_class, query_string):
+        self.title = title
+        self.view_class = view_class
+        self.query_string = query_string
+        self.rows = 0
+        # Filas escritas que no son registros: cabecera y pie
+        self.extra_rows = 1
+        self.seconds = None
+        self.error = None
+
+    def __repr__(self):
+        return f"<SheetResult {self.title}: {self.rows} filas en {self.seconds}s>"
+
+
+class WorkbookExportError(Exception):
+    """Falló el armado de una de las hojas del workbook."""
+
+    def __init__(self, result):
+        self.result = result
+        super().__init__(f"Falló la hoja {result.title}: {result.error}")
+
+
+_SHEET_DONE = object()
+
+
+def _sheet_title(title, used):
+    title = INVALID_SHEET_CHARS.sub("", str(title)).strip() or "Hoja"
+    title = title[:31]
+    candidate, n = title, 2
+    while candidate.lower() in used:
+        suffix = f" ({n})"
+        candidate = f"{title[: 31 - len(suffix)]}{suffix}"
+        n += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def _sheet_request(query_string, request=None):
+    sheet_request = HttpRequest()
+    sheet_request.method = "GET"
+    sheet_request.GET = QueryDict(query_string)
+    if request is not None:
+        sheet_request.path = sheet_request.path_info = request.path
+        sheet_request.META = dict(request.META)
+        if hasattr(request, "user"):
+            sheet_request.user = request.user
+    return sheet_request
+
+
+def _produce_sheet(index, result, request, out, cancelled, chunk_size, batch_size):
+    """Armar las filas de una hoja y mandarlas en lotes a la cola `out`.
+
+    Corre en un thread del pool: Django le da su propia conexión a la base,
+    que se cierra al terminar para no dejarla abierta en el thread.
+    """
+
+    def put(item):
+        while not cancelled.is_set():
+            try:
+                out.put((index, item), timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    started = time.perf_counter()
+    rows = None
+    try:
+        view = result.view_class()
+        view.setup(_sheet_request(result.query_string, request))
+        view.object_list = view.get_export_queryset()
+        table = view.get_export_table()
+        rows = iter_table_rows(
+            table,
+            exclude_columns=view.exclude_columns,
+            chunk_size=chunk_size,
+        )
+        batch = []
+        for row in rows:
+            batch.append([_excel_value(value) for value in row])
+            if len(batch) >= batch_size:
+                if not put(batch):
+                    return
+                batch = []
+        if batch and not put(batch):
+            return
+        result.extra_rows = 1 + count_footer_rows(table)
+        result.seconds = time.perf_counter() - started
+        put(_SHEET_DONE)
+    except Exception as err:
+        result.error = err
+        result.seconds = time.perf_counter() - started
+        put(_SHEET_DONE)
+    finally:
+        if rows is not None:
+            # Cerrar el cursor del iterator antes que la conexión
+            rows.close()
+        connections.close_all()
+
+
+def write_workbook(
+    sheets,
+    output,
+    request=None,
+    max_workers=None,
+    chunk_size=2000,
+    batch_size=500,
+    max_pending_batches=16,
+):
+    """Escribir en `output` un XLSX con una hoja por vista.
+
+    `sheets` es una lista de `(view_class, query_string)` o
+    `(view_class, query_string, title)`; cada vista (CottonTableView o
+    DictTableView) aplica sus filtros y orden sobre el query string como si
+    fuera el request de su exportación. Las hojas se arman en paralelo en un
+    pool de threads y el thread actual las vuelca a un único workbook
+    write-only de openpyxl (que no es thread-safe). La cola entre ambos
+    está acotada a `max_pending_batches` lotes de `batch_size` filas, así
+    la memoria no crece con el tamaño de las tablas.
+
+    Devuelve la lista de SheetResult. Si una hoja falla, se cancelan las
+    demás y se lanza WorkbookExportError.
+    """
+    used_titles = set()
+    results = []
+    for spec in sheets:
+        view_class, query_string = spec[0], spec[1] or ""
+        title = spec[2] if len(spec) > 2 else None
+        if title is None:
+            title = getattr(view_class, "title", None)
+            if not title or title == "Listado":
+                title = view_class.__name__.removesuffix("View")
+        results.append(
+            SheetResult(_sheet_title(title, used_titles), view_class, query_string)
+        )
+
+    if max_workers is None:
+        max_workers = getattr(settings, "SCOTTY_WORKBOOK_MAX_WORKERS", 4)
+    max_workers = max(1, min(max_workers, len(results)))
+
+    workbook = Workbook(write_only=True)
+    worksheets = [workbook.create_sheet(title=result.title) for result in results]
+    out = queue.Queue(maxsize=max_pending_batches)
+    cancelled = threading.Event()
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers, thread_name_prefix="scotty-sheet"
+    ) as executor:
+        for index, result in enumerate(results):
+            executor.submit(
+                _produce_sheet,
+                index,
+                result,
+                request,
+                out,
+                cancelled,
+                chunk_size,
+                batch_size,
+            )
+        try:
+            pending = len(results)
+            while pending:
+                index, item = out.get()
+                result = results[index]
+                if item is _SHEET_DONE:
+                    pending -= 1
+                    if result.error is not None:
+                        raise WorkbookExportError(result) from result.error
+                    continue
+                for row in item:
+                    worksheets[index].append(row)
+                result.rows += len(item)
+        except BaseException:
+            cancelled.set()
+            raise
+
+    for result in results:
+        result.rows = max(result.rows - result.extra_rows, 0)
+        logger.info(
+            f"[SCOTTY EXPORT] Hoja {result.title}: {result.rows} filas "
+            f"en {result.seconds:.2f}s"
+        )
+    workbook.save(output)
+    return results
+
+
+def workbook_response(sheets, request, filename="export.xlsx", **kwargs):
+    """Responder el XLSX de `write_workbook` como descarga.
+
+    El workbook se arma antes de responder para que un error en una hoja
+    termine en una excepción normal y no en una descarga cortada. Los
+    resultados por hoja quedan en `response.sheet_results`.
+    """
+    with contextlib.ExitStack() as on_error:
+        tmp = on_error.enter_context(tempfile.TemporaryFile())
+        results = write_workbook(sheets, tmp, request=request, **kwargs)
+        # Salió bien: el archivo lo cierra la respuesta al terminar de enviarlo
+        on_error.pop_all()
+    tmp.seek(0)
+    response = FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=filename,
+        content_type=CONTENT_TYPES["xlsx"],
+    )
+    response.sheet_results = results
+    return response
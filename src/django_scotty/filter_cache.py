@@ -0,0 +1,217 @@
+import array
+import datetime
+import decimal
+import functools
+import hashlib
+import logging
+
+from django.core.cache import cache
+from django.db import connections
+from django.db.models import Model, QuerySet
+
+from .counts import bump_model_version, connect_model_invalidation, get_model_version
+
+logger = logging.getLogger(__name__)
+
+# Se guarda en lugar de los pks cuando el filtro trae más de los que se cachean
+TOO_MANY = "too-many"
+# Parámetros que deja libres el `pk__in` en motores con límite (SQLite: 999)
+RESERVED_QUERY_PARAMS = 50
+
+
+def canonical_value(value):
+    """Valor limpio de un filtro como texto estable, o None si está vacío.
+
+    Las listas conservan su orden (un OrderingFilter depende de él); los
+    conjuntos y QuerySets se ordenan.
+    """
+    if value is None or value == "" or value == [] or value == ():
+        return None
+    if isinstance(value, Model):
+        return str(value.pk)
+    if isinstance(value, QuerySet):
+        # ModelMultipleChoiceField ya lo evaluó al validar: no hay query
+        return ",".join(sorted(str(obj.pk) for obj in value))
+    if isinstance(value, (set, frozenset)):
+        return ",".join(sorted(canonical_value(item) or "" for item in value))
+    if isinstance(value, (list, tuple)):
+        return ",".join(canonical_value(item) or "" for item in value)
+    if isinstance(value, slice):
+        if value.start is None and value.stop is None:
+            return None
+        return f"{canonical_value(value.start) or ''}:{canonical_value(value.stop) or ''}"
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value.normalize())
+    return str(value)
+
+
+def normalize_filter_data(cleaned_data):
+    """Clave canónica de los filtros aplicados, a partir de `form.cleaned_data`.
+
+    Sale del formulario ya validado, así `?estado=n&page=2`, el export con
+    los mismos filtros y el `filter_query_string` de un POST dan la misma
+    clave: la paginación, el orden de la tabla, los valores vacíos y las
+    distintas formas de escribir un valor no cuentan. Devuelve "" si no hay
+    ningún filtro activo.
+    """
+    parts = []
+    for name in sorted(cleaned_data):
+        value = canonical_value(cleaned_data[name])
+        if value is not None:
+            parts.append(f"{name}={value}")
+    return "&".join(parts)
+
+
+def pack_pks(pks):
+    """Guardar los pks enteros en un array de 64 bits (8 bytes por pk)."""
+    try:
+        return array.array("q", pks)
+    except (TypeError, OverflowError):
+        return list(pks)
+
+
+def get_max_pks(queryset, max_pks):
+    """Cuántos pks se pueden cachear y volver a pasar en un `pk__in`."""
+    max_params = connections[queryset.db].features.max_query_params
+    if max_params is None:
+        return max_pks
+    return min(max_pks, max_params - RESERVED_QUERY_PARAMS)
+
+
+def get_filtered_pks(key, queryset, timeout, max_pks):
+    """Devolver los pks de `queryset` cacheados en `key`, o None si son demasiados.
+
+    Si no están en el cache se consultan una sola vez, sin orden y con
+    LIMIT, y se guardan por `timeout` segundos.
+    """
+    cached = cache.get(key)
+    if cached == TOO_MANY:
+        return None
+    if cached is not None:
+        logger.debug(f"[SCOTTY FILTERS] Pks de {key} desde el cache")
+        return list(cached)
+
+    pks = list(queryset.order_by().values_list("pk", flat=True)[: max_pks + 1])
+    if len(pks) > max_pks:
+        cache.set(key, TOO_MANY, timeout)
+        return None
+    cache.set(key, pack_pks(pks), timeout)
+    return pks
+
+
+def invalidate_filter_results(model):
+    """Descartar los resultados cacheados de los filtros sobre `model`.
+
+    Los saves y deletes del modelo ya lo hacen solos; hace falta después
+    de un `update()` o SQL directo.
+    """
+    bump_model_version(model)
+
+
+class ResultCacheFilterSetMixin:
+    """FilterSet cuyo `qs` sale del cache de resultados de la vista.
+
+    FilterView.get, los exports y las acciones leen `filterset.qs`; así
+    todos reciben el `pk__in` cacheado sin que la vista lo reemplace.
+    """
+
+    result_cache_view = None
+
+    @functools.cached_property
+    def qs(self):
+        view = self.result_cache_view
+        queryset = None if view is None else view.get_cached_filter_queryset(self)
+        return super().qs if queryset is None else queryset
+
+
+@functools.cache
+def result_cache_filterset_class(filterset_class):
+    """Subclase de `filterset_class` con ResultCacheFilterSetMixin, una por clase."""
+    return type(filterset_class)(
+        filterset_class.__name__,
+        (ResultCacheFilterSetMixin, filterset_class),
+        {"__module__": filterset_class.__module__},
+    )
+
+
+class FilterResultCacheMixin:
+    """Cache corto de los pks que cumplen los filtros de la vista.
+
+    Con `filter_result_cache = True` el filtro se evalúa una vez y el
+    QuerySet filtrado pasa a ser `pk__in` de esos pks. El conteo, las
+    páginas, la redirección de página inválida, los exports y las acciones
+    sobre el filtrado lo reusan mientras no cambie la versión del modelo
+    (saves, deletes y acciones en bulk) ni venza el timeout. Los filtros que
+    agregan anotaciones no se cachean. Si el filtro usa modelos
+    relacionados, listarlos en `filter_result_cache_models` para que sus
+    cambios también invaliden.
+    """
+
+    filter_result_cache = False
+    filter_result_cache_timeout = 30
+    # Hasta cuántos pks se cachean (acotado además por el motor)
+    filter_result_cache_max_pks = 10000
+    filter_result_cache_models = ()
+
+    def get_filter_result_cache_scope(self):
+        """Alcance del cache: get_queryset() suele depender del usuario."""
+        user = getattr(self.request, "user", None)
+        if user is None or not user.is_authenticated:
+            return "anon"
+        return user.pk
+
+    def get_filter_result_cache_key(self, model, filters, prefix="scotty:filter-pks"):
+        versions = []
+        for related in (model, *self.filter_result_cache_models):
+            connect_model_invalidation(related)
+            versions.append(f"{related._meta.label_lower}:{get_model_version(related)}")
+        raw = "|".join(
+            (
+                type(self).__module__,
+                type(self).__qualname__,
+                str(self.get_filter_result_cache_scope()),
+                *versions,
+                filters,
+            )
+        )
+        return f"{prefix}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    def get_result_cache_filterset(self, filterset_class, **kwargs):
+        """Instanciar el filterset; con el cache, uno que lo consulta en `qs`."""
+        if not self.filter_result_cache:
+            return filterset_class(**kwargs)
+        filterset = result_cache_filterset_class(filterset_class)(**kwargs)
+        filterset.result_cache_view = self
+        return filterset
+
+    def get_cached_filter_queryset(self, filterset):
+        """QuerySet `pk__in` de los pks cacheados de `filterset`, o None.
+
+        Con None el filterset aplica sus filtros como siempre.
+        """
+        if not filterset.is_bound or not filterset.is_valid():
+            return None
+        filters = normalize_filter_data(filterset.form.cleaned_data)
+        if not filters:
+            # Sin filtros no hay nada caro que ahorrar
+            return None
+        base = filterset.queryset
+        filtered = filterset.filter_queryset(base.all())
+        if filtered.query.annotations.keys() != base.query.annotations.keys():
+            return None
+
+        pks = get_filtered_pks(
+            self.get_filter_result_cache_key(base.model, filters),
+            filtered,
+            self.filter_result_cache_timeout,
+            get_max_pks(filtered, self.filter_result_cache_max_pks),
+        )
+        if pks is None:
+            return None
+        queryset = base.filter(pk__in=pks)
+        if filtered.query.order_by:
+            # Un OrderingFilter del filterset sigue mandando
+            queryset = queryset.order_by(*filtered.query.order_by)
+        return queryset
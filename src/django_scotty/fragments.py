@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.utils.safestring import mark_safe
+
+from .counts import connect_model_invalidation, get_model_version
+from .queries import get_column_paths, get_related_models
+
+logger = logging.getLogger(__name__)
+
+# El id único de la tabla cambia en cada render: se guarda con esta marca
+UNIQUE_ID_PLACEHOLDER = "__scotty_table_id__"
+
+HITS_KEY = "scotty:fragment-stats:hits"
+MISSES_KEY = "scotty:fragment-stats:misses"
+
+
+def make_fragment_key(*parts):
+    raw = "|".join(str(part) for part in parts)
+    return f"scotty:fragment:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+def _incr(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_fragment_cache_stats():
+    """Devolver los aciertos y fallos acumulados del cache de fragmentos."""
+    return {
+        "hits": cache.get(HITS_KEY, 0),
+        "misses": cache.get(MISSES_KEY, 0),
+    }
+
+
+def _restore(html, unique_id):
+    if unique_id:
+        html = html.replace(UNIQUE_ID_PLACEHOLDER, unique_id)
+    return mark_safe(html)
+
+
+def get_or_render(key, render, unique_id, timeout, lock_timeout=10, lock_wait=2):
+    """Devolver el fragmento cacheado en `key` o renderizarlo con `render()`.
+
+    Para evitar la estampida, solo el request que toma el lock renderiza;
+    los demás esperan hasta `lock_wait` segundos a que aparezca en el cache
+    y, si no aparece, renderizan por su cuenta.
+    """
+    cached = cache.get(key)
+    if cached is not None:
+        _incr(HITS_KEY)
+        return _restore(cached, unique_id)
+
+    lock_key = f"{key}:lock"
+    has_lock = cache.add(lock_key, 1, lock_timeout)
+    if not has_lock:
+        deadline = time.monotonic() + lock_wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            cached = cache.get(key)
+            if cached is not None:
+                _incr(HITS_KEY)
+                return _restore(cached, unique_id)
+
+    _incr(MISSES_KEY)
+    try:
+        html = str(render())
+        stored = html.replace(unique_id, UNIQUE_ID_PLACEHOLDER) if unique_id else html
+        cache.set(key, stored, timeout)
+    finally:
+        if has_lock:
+            cache.delete(lock_key)
+    logger.debug(f"[SCOTTY CACHE] Fragmento renderizado {key}")
+    return mark_safe(html)
+
+
+class TableFragmentCacheMixin:
+    """Cache opcional del HTML de la tabla (filas + paginación).
+
+    La clave combina la vista, el query string normalizado, el alcance del
+    usuario y las versiones del modelo y de los modelos relacionados que
+    muestran las columnas (y los de `filter_result_cache_models`), que
+    suben con cada save/delete y con las acciones en bulk. Las plantillas
+    lo aplican con `{% cache_table %}`.
+    """
+
+    cache_table_fragment = False
+    table_fragment_cache_timeout = 60
+
+    def get_table_fragment_cache_scope(self):
+        """Alcance del cache: por defecto, cada usuario tiene el suyo."""
+        user = getattr(self.request, "user", None)
+        if user is None or not user.is_authenticated:
+            return "anon"
+        return user.pk
+
+    def get_table_fragment_cache_models(self):
+        """El modelo de la vista y los relacionados cuyos cambios se ven en la tabla."""
+        model = getattr(self, "model", None)
+        if model is None:
+            return []
+        models = [model]
+        paths = get_column_paths(self.get_table_class())
+        for related in (
+            *get_related_models(model, paths),
+            *getattr(self, "filter_result_cache_models", ()),
+        ):
+            if related not in models:
+                models.append(related)
+        return models
+
+    def get_table_fragment_cache_version(self):
+        versions = []
+        for model in self.get_table_fragment_cache_models():
+            connect_model_invalidation(model)
+            versions.append(f"{model._meta.label_lower}:{get_model_version(model)}")
+        return "|".join(versions)
+
+    def get_table_fragment_cache_key(self):
+        # Se ordenan las claves pero no los valores: sort=a&sort=b importa
+        query = sorted(self.request.GET.lists())
+        return make_fragment_key(
+            type(self).__module__,
+            type(self).__qualname__,
+            self.request.path,
+            urlencode(query, doseq=True),
+            self.get_table_fragment_cache_scope(),
+            self.get_table_fragment_cache_version(),
+        )
+
+    def configure_table_fragment_cache(self, table):
+        if self.cache_table_fragment:
+            table.fragment_cache_key = self.get_table_fragment_cache_key()
+            table.fragment_cache_timeout = self.table_fragment_cache_timeout
@@ -1,27 +1,51 @@
 import importlib
-import inspect
 import logging
-import os
-import pkgutil
 import re
+import sys
+import itertools
+import time
 import uuid
 
 from typing import List
-from urllib.parse import parse_qs
 
 from crispy_forms.helper import FormHelper
+from django.conf import settings
 from django.core.paginator import EmptyPage, Paginator
+from django.db import connections, router
 from django.db.models import QuerySet
-from django.http import Http404
-from django.shortcuts import redirect
+from django.http import Http404, HttpResponse, QueryDict
+from django.shortcuts import redirect, render
 from django.urls import path, reverse
 from django.utils.safestring import SafeText
 from django.views.generic import DetailView
 from django_filters.views import FilterView
+from django_htmx.http import push_url
+from django_tables2.data import TableData, TableQuerysetData
 from django_tables2.export.views import ExportMixin
 from django_tables2.views import SingleTableMixin, SingleTableView
 import django_tables2 as tables
 
+from . import counts, details, discovery, pagination, queries
+from .admission import ExportAdmissionMixin
+from .aggregates import ColumnAggregatesMixin
+from .columnar import ColumnarData, TableColumnarData
+from .dict_filters import ColumnarQuerySet
+from .bulk import BulkRun, run_bulk_action, run_chunked_action
+from .exports import FooterTableExport, StreamingExportMixin
+from .filter_cache import FilterResultCacheMixin
+from .fragments import TableFragmentCacheMixin
+from .instrumentation import NULL_PROFILE, InstrumentationMixin
+from .jobs import AsyncExportMixin
+from .registry import ViewMetaMixin, collect_actions, get_url_name
+from .sources import DataSource, TableSourceData
+
+
+# Marca para partir el HTML precompilado de una acción alrededor del pk
+PK_PLACEHOLDER = "\x00pk\x00"
+# Sufijo del contenedor con el cuerpo de la tabla (filas + paginación)
+PARTIAL_SUFFIX = "-body"
+UNFILTERED_HEADER = "X-Scotty-Unfiltered"
+
 
 class ActionTable(tables.Table):
     def __init__(self, *args, **kwargs):
@@ -34,72 +58,107 @@ class ActionTable(tables.Table):
         """Mostrar un link a una url con un boton de ver."""
         return SafeText(f'<a href="{url}" class="btn boton-ver"></a>')
 
-    # TODO: Test
-    def render_acciones(self, record):
-        """Renderizar todas las acciones disponibles.
-        Si es una sola en forma de botón, si es más de una
-        como botones agrupados."""
-
-        if getattr(self, "url_action_method", None) is None:
-            return ""
+    def compile_actions(self):
+        """Resolver la URL y las acciones una sola vez por render de la tabla.
 
-        rendered_actions = SafeText("")
+        Cada acción queda como HTML ya armado, partido en dos alrededor del pk
+        del registro, junto con su método para evaluar la condición.
+        """
         url = reverse(self.url_action_method)
-        if len(self.action_columns) == 1:
-            accion = self.action_columns[0]
-            accion_method = getattr(self.view, accion[0])
-
-            # TODO: Test
-            try:
-                condition_result = accion_method.condition(record, self.request)
-                if not condition_result:
-                    return ""
-            except Exception:
-                return ""
-
-            show_confirm = getattr(accion_method, "show_confirm", False)
+        confirm = 'hx-confirm="¿Está seguro que desea realizar esta acción?"'
+        compiled = []
+        for accion in self.action_columns:
+            accion_method = self.view.get_action(accion[0])
             confirm_attr = (
-                'hx-confirm="¿Está seguro que desea realizar esta acción?"'
-                if show_confirm
-                else ""
+                confirm if getattr(accion_method, "show_confirm", False) else ""
             )
-            button_html = f"""<button hx-post=\"{url}?pk={record.pk}&action={accion[0]}\"
+            if len(self.action_columns) == 1:
+                action_html = f"""<button hx-post=\"{url}?pk={PK_PLACEHOLDER}&action={accion[0]}\"
                     hx-trigger=\"click\"
                     hx-swap=\"outerHTML\"
                     class=\"btn btn-primary\"
                     hx-indicator=\"#spinner-load\"
                     type=\"btn\"
                     {confirm_attr}>{accion[1]}</button>"""
-            return SafeText(button_html)
-        elif len(self.action_columns) > 1:
-            rendered_actions = SafeText("")
-            for accion in self.action_columns:
-                accion_method = getattr(self.view, accion[0])
-
-                try:
-                    condition_result = accion_method.condition(record, self.request)
-                    if not condition_result:
-                        continue
-                except Exception:
-                    pass
-
-                show_confirm = getattr(accion_method, "show_confirm", False)
-                confirm_attr = (
-                    'hx-confirm="¿Está seguro que desea realizar esta acción?"'
-                    if show_confirm
-                    else ""
-                )
+            else:
                 action_html = f"""<li>
-                    <a hx-post=\"{url}?pk={record.pk}&action={accion[0]}\"
+                    <a hx-post=\"{url}?pk={PK_PLACEHOLDER}&action={accion[0]}\"
                     hx-trigger=\"click\"
                     hx-swap=\"outerHTML\"
                     hx-indicator=\"#spinner-load\"
                     class=\"dropdown-item\"
                     {confirm_attr}>{accion[1]}</a>
                     </li>"""
-                rendered_actions += SafeText(action_html)
+            head, tail = action_html.split(PK_PLACEHOLDER)
+            compiled.append((accion_method, head, tail))
+        return compiled
+
+    def get_allowed_pks(self, accion_method):
+        """Evaluar `condition_many(records, request)` para toda la página.
+
+        Devuelve el conjunto de pks habilitados, o None si la acción no tiene
+        condición en lote (o si falló) y hay que evaluar fila por fila.
+        """
+        if not hasattr(accion_method, "condition_many"):
+            return None
+        records = [row.record for row in self.paginated_rows]
+        try:
+            return set(accion_method.condition_many(records, self.request))
+        except Exception:
+            logging.exception(
+                f"[SCOTTY ACTIONS] Falló condition_many de {accion_method.__name__}"
+            )
+            return None
 
-            return SafeText(f"""
+    def is_action_allowed(self, accion_method, allowed_pks, record, on_error):
+        if allowed_pks is not None:
+            return record.pk in allowed_pks
+        # TODO: Test
+        try:
+            return bool(accion_method.condition(record, self.request))
+        except Exception:
+            return on_error
+
+    @property
+    def scotty_profile(self):
+        return getattr(getattr(self, "view", None), "scotty_profile", NULL_PROFILE)
+
+    # TODO: Test
+    def render_acciones(self, record):
+        """Renderizar todas las acciones disponibles.
+        Si es una sola en forma de botón, si es más de una
+        como botones agrupados."""
+
+        with self.scotty_profile.phase("acciones"):
+            return self._render_acciones(record)
+
+    def _render_acciones(self, record):
+        if getattr(self, "url_action_method", None) is None:
+            return ""
+        if not self.action_columns:
+            return ""
+
+        if getattr(self, "_compiled_actions", None) is None:
+            self._compiled_actions = [
+                (accion_method, head, tail, self.get_allowed_pks(accion_method))
+                for accion_method, head, tail in self.compile_actions()
+            ]
+
+        pk = str(record.pk)
+        if len(self._compiled_actions) == 1:
+            accion_method, head, tail, allowed_pks = self._compiled_actions[0]
+            if not self.is_action_allowed(
+                accion_method, allowed_pks, record, on_error=False
+            ):
+                return ""
+            return SafeText(f"{head}{pk}{tail}")
+
+        rendered_actions = "".join(
+            f"{head}{pk}{tail}"
+            for accion_method, head, tail, allowed_pks in self._compiled_actions
+            if self.is_action_allowed(accion_method, allowed_pks, record, on_error=True)
+        )
+        return SafeText(f"""
                             <div class="btn-group">
                             <button type="button"
                             class="btn btn-primary dropdown-toggle"
@@ -110,8 +169,17 @@ class ActionTable(tables.Table):
                                 {rendered_actions}
                             </ul>
                             </div>""")
-        else:
-            return ""
+
+
+class CountedTableQuerysetData(TableQuerysetData):
+    """TableQuerysetData con el total ya contado: la tabla no repite el COUNT."""
+
+    def __init__(self, data, count):
+        super().__init__(data)
+        self.count = count
+
+    def __len__(self):
+        return self.count
 
 
 # TODO: Test
@@ -124,33 +192,50 @@ class PaginationFixMixin:
         try:
             return super().get(request, *args, **kwargs)
         except (EmptyPage, Http404):
-            try:
-                queryset = self.get_queryset()
+            return self.pagination_redirect(request)
 
-                if hasattr(self, "get_filterset") and hasattr(self, "filterset_class"):
-                    filterset = self.get_filterset(self.filterset_class)
-                    if filterset.is_valid():
-                        queryset = filterset.qs
+    def pagination_redirect(self, request):
+        """Redirigir a la última página válida para los filtros del request."""
+        try:
+            queryset = self.get_queryset()
 
-                paginator = Paginator(queryset, self.paginate_by)
-                total_pages = paginator.num_pages
+            if hasattr(self, "get_filterset") and hasattr(self, "filterset_class"):
+                filterset = self.get_filterset(self.filterset_class)
+                if filterset.is_valid():
+                    queryset = filterset.qs
 
-                if total_pages > 0:
-                    target_page = total_pages
-                else:
-                    target_page = 1
+            paginator = Paginator(queryset, self.paginate_by)
+            total_pages = paginator.num_pages
 
-            except Exception:
+            if total_pages > 0:
+                target_page = total_pages
+            else:
                 target_page = 1
 
-            get_params = request.GET.copy()
-            get_params["page"] = str(target_page)
-
-            redirect_url = f"{request.path}?{get_params.urlencode()}"
-            return redirect(redirect_url)
-
-
-class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterView):
+        except Exception:
+            target_page = 1
+
+        get_params = request.GET.copy()
+        get_params["page"] = str(target_page)
+
+        redirect_url = f"{request.path}?{get_params.urlencode()}"
+        return redirect(redirect_url)
+
+
+class CottonTableView(
+    InstrumentationMixin,
+    ViewMetaMixin,
+    PaginationFixMixin,
+    TableFragmentCacheMixin,
+    FilterResultCacheMixin,
+    ColumnAggregatesMixin,
+    ExportAdmissionMixin,
+    AsyncExportMixin,
+    StreamingExportMixin,
+    ExportMixin,
+    SingleTableMixin,
+    FilterView,
+):
     """Base View for django tables with bootstrap and filters."""
 
     template_name = "django_tables2/base_django_tables2.html"
@@ -167,6 +252,98 @@ class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterV
         "filtrar",
         "exportar_xls",
     ]
+    filter_button_attributes = (
+        "available_filter_buttons",
+        "show_filter_line",
+        "show_export_xls",
+    )
+    # Tamaño de lote para acciones con `bulk`; None para una sola llamada
+    bulk_batch_size = 5000
+    # Acciones sobre el QuerySet filtrado completo: lotes por pk con checkpoint
+    bulk_chunk_size = 1000
+    # Segundos por request antes de cortar y continuar en otro (None: sin límite)
+    bulk_time_budget = None
+    bulk_run_ttl = 60 * 60 * 24
+    bulk_progress_template = "django_tables2/bulk_progress.html"
+    # Estrategia para el total sin filtrar: "exact", "cached", "estimated" o "lazy"
+    unfiltered_count_strategy = counts.EXACT
+    unfiltered_count_cache_timeout = 60 * 5
+    # Con "lazy" el total se pide en un segundo request htmx con este parámetro
+    unfiltered_count_param = "_scotty_count"
+    # "offset" (?page=N) o "cursor" (keyset, sin COUNT ni OFFSET)
+    pagination_mode = pagination.OFFSET
+    cursor_param = "cursor"
+    # select_related/prefetch_related automático según las columnas de la tabla
+    auto_select_related = True
+    # Restringir además las columnas con only(); ojo con render_* y condiciones
+    # que usen otros campos: cada acceso diferido es una query más por fila
+    auto_only_fields = False
+    # Con DEBUG, avisar si una página ejecuta más queries que este número
+    query_count_warning_threshold = None
+    # Plantilla con solo el cuerpo de la tabla, para filtrar/ordenar/paginar
+    # por htmx sin volver a renderizar el formulario de filtros
+    partial_template_name = "django_tables2/partial_django_tables2.html"
+    partial_unique_id = None
+    # Los exports por tablib incluyen el pie de la tabla (totales)
+    export_class = FooterTableExport
+
+    def setup(self, request, *args, **kwargs):
+        super().setup(request, *args, **kwargs)
+        self.partial_unique_id = self.get_partial_unique_id()
+
+    def get_partial_unique_id(self):
+        """Id de la tabla si el request htmx apunta a su cuerpo, si no None."""
+        htmx = getattr(self.request, "htmx", None)
+        if not htmx or self.request.method != "GET":
+            return None
+        target = htmx.target or ""
+        if not (
+            target.startswith("django-table-") and target.endswith(PARTIAL_SUFFIX)
+        ):
+            return None
+        return target[: -len(PARTIAL_SUFFIX)]
+
+    def get_template_names(self):
+        if self.partial_unique_id:
+            return [self.partial_template_name]
+        return super().get_template_names()
+
+    def get(self, request, *args, **kwargs):
+        if request.GET.get(self.unfiltered_count_param) is not None:
+            return self.unfiltered_count_response()
+        response = self.get_response(request, *args, **kwargs)
+        if self.partial_unique_id:
+            # El navegador queda en la URL con los filtros/orden/página actuales
+            push_url(response, request.get_full_path())
+        return response
+
+    def get_response(self, request, *args, **kwargs):
+        if self.query_count_warning_threshold is None or not settings.DEBUG:
+            return super().get(request, *args, **kwargs)
+
+        connection = connections[router.db_for_read(self.model)]
+        with queries.QueryCounter(connection) as counter:
+            response = super().get(request, *args, **kwargs)
+            # Las queries de las filas corren al renderizar la plantilla
+            if hasattr(response, "render"):
+                response.render()
+        if counter.count > self.query_count_warning_threshold:
+            logging.warning(
+                f"[SCOTTY QUERIES] {self.__class__.__name__} ejecutó "
+                f"{counter.count} queries para {request.get_full_path()} "
+                f"(límite {self.query_count_warning_threshold})"
+            )
+        return response
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.auto_select_related:
+            queryset = queries.optimize_queryset(
+                queryset,
+                queries.get_column_paths(self.get_table_class()),
+                use_only=self.auto_only_fields,
+            )
+        return queryset
 
     def get_table_kwargs(self):
         kwargs = super().get_table_kwargs()
@@ -176,28 +353,84 @@ class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterV
         )
 
         if view_only:
-            kwargs["available_actions"] = []
+            kwargs["available_actions"] = ()
         else:
-            available_actions = list(self.available_actions)
-            kwargs["available_actions"] = available_actions
+            kwargs["available_actions"] = self.available_actions
 
         return kwargs
 
+    def paginate_queryset(self, queryset, page_size):
+        with self.scotty_profile.phase("conteo"):
+            paginated = super().paginate_queryset(queryset, page_size)
+        # El COUNT de ListView se reusa en la tabla (ver get_table_data)
+        self.list_paginator = paginated[0]
+        return paginated
+
+    def get_paginator(self, queryset, per_page, *args, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, *args, **kwargs)
+        if queryset is self.object_list:
+            # El aggregate() de los totales ya trae el COUNT
+            aggregates = self.get_aggregates()
+            if aggregates is not None:
+                paginator.count = aggregates.count
+        return paginator
+
+    def get_table_data(self):
+        data = super().get_table_data()
+        paginator = getattr(self, "list_paginator", None)
+        if paginator is not None and paginator.object_list is data:
+            data = CountedTableQuerysetData(data, paginator.count)
+        return data
+
+    def get_paginate_by(self, queryset):
+        # Con cursor no hay paginación de ListView (ni su COUNT)
+        if self.pagination_mode == pagination.CURSOR:
+            return None
+        return super().get_paginate_by(queryset)
+
+    def get_table_pagination(self, table):
+        if self.pagination_mode == pagination.CURSOR:
+            return False
+        return super().get_table_pagination(table)
+
     def get_table(self, **kwargs):
         # Sobreescribe get_table para pasar la instancia de la vista
-        table = super().get_table(**kwargs)
-        table.view = self  # Pasa la instancia de la vista a la tabla
+        with self.scotty_profile.phase("tabla"):
+            table = super().get_table(**kwargs)
+            table.view = self  # Pasa la instancia de la vista a la tabla
+            table.cursor_pagination = self.pagination_mode == pagination.CURSOR
+            if table.cursor_pagination:
+                table.prefixed_cursor_field = f"{table.prefix}{self.cursor_param}"
+                pagination.paginate_by_cursor(
+                    table,
+                    self.request.GET.get(table.prefixed_cursor_field),
+                    per_page=self.paginate_by,
+                )
+            self.apply_aggregates(table)
+        return table
+
+    def get_export_table(self):
+        table = super().get_export_table()
+        self.apply_aggregates(table)
         return table
 
     def get_filterset(self, filterset_class):
-        kwargs = self.get_filterset_kwargs(filterset_class)
-        true_filters = {}
-        if kwargs["data"]:
-            for key, value in kwargs["data"].items():
-                true_filters[key] = value
-            kwargs["data"] = true_filters
-        filterset = filterset_class(**kwargs)
-        filterset.form.helper = self.formhelper_class()
+        return self.build_filterset(filterset_class, self.request.GET or None)
+
+    def build_filterset(self, filterset_class, data):
+        """Armar el filterset sobre `data`, un QueryDict o None.
+
+        Es el único camino para GET, exports y acciones sobre el filtrado,
+        así todos aplican los filtros igual y comparten el cache de
+        resultados (ver filter_cache.py).
+        """
+        with self.scotty_profile.phase("filtros"):
+            kwargs = self.get_filterset_kwargs(filterset_class)
+            kwargs["data"] = data
+            filterset = self.get_result_cache_filterset(filterset_class, **kwargs)
+            if not self.partial_unique_id:
+                # El cuerpo parcial no pinta el formulario
+                filterset.form.helper = self.formhelper_class()
         return filterset
 
     def get_context_data(self, **kwargs):
@@ -209,49 +442,146 @@ class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterV
         # `ControlIngresoEgreso.objects.all()` nos da el QuerySet completo
         #
         orig_table = context["table"]
-        orig_table.unfiltered_records = self.model.objects.all().count()
+        if orig_table.cursor_pagination:
+            # Paginando por cursor no se cuenta nada
+            orig_table.unfiltered_records = None
+        elif not (
+            self.partial_unique_id and self.set_unfiltered_from_header(orig_table)
+        ):
+            with self.scotty_profile.phase("conteo_total"):
+                self.set_unfiltered_records(orig_table)
         # TODO: Test view only
         view_only = (
             True if self.request.GET.get("view_only", False) == "true" else False
         )
         if view_only:
-            orig_table.available_actions = []
+            orig_table.available_actions = ()
         else:
             orig_table.available_actions = self.available_actions
-        trimed_view_name = self.get_slugname()
-        orig_table.url_action_method = f"list-view-{trimed_view_name}"
-        orig_table.unique_id = get_unique_id("django-table-")
+        orig_table.url_action_method = self.scotty_meta.url_name
+        # En un render parcial se conserva el id del contenedor que se reemplaza
+        orig_table.unique_id = self.partial_unique_id or get_unique_id("django-table-")
         orig_table.title = self.title
         orig_table.view_only = view_only
         orig_table.show_boton_nuevo = self.show_boton_nuevo
         orig_table.create_url = self.create_url
+        self.configure_table_fragment_cache(orig_table)
+        if self.scotty_profile.enabled and not self.cache_table_fragment:
+            self.load_page_rows(orig_table)
         context["table"] = orig_table
 
         # Agregar control para mostrar/ocultar acciones masivas
         context["show_bulk_actions"] = self.show_bulk_actions
+        context["async_export"] = self.async_export
+        context["partial_render"] = bool(self.partial_unique_id)
 
-        # Sistema unificado de botones de filtros
-        if (
-            hasattr(self, "available_filter_buttons")
-            and self.available_filter_buttons is not None
-        ):
-            context["show_action_buttons"] = self.available_filter_buttons
+        context["show_action_buttons"] = self.filter_buttons
+        return context
+
+    def load_page_rows(self, table):
+        """Evaluar ya el QuerySet de la página, para medirlo aparte del render.
+
+        Solo con instrumentación: la plantilla reusa el resultado.
+        """
+        rows = getattr(getattr(table, "page", None), "object_list", None)
+        queryset = getattr(rows, "data", None)
+        if isinstance(queryset, QuerySet):
+            with self.scotty_profile.phase("filas"):
+                len(queryset)
+
+    def get_unfiltered_queryset(self):
+        return self.model.objects.all()
+
+    def set_unfiltered_records(self, table):
+        """Calcular el total sin filtrar según `unfiltered_count_strategy`."""
+        table.unfiltered_records = None
+        table.unfiltered_records_estimated = False
+        table.unfiltered_count_url = None
+
+        if self.unfiltered_count_strategy == counts.LAZY:
+            # Lazy: la tabla se pinta ya y el total llega en otro request
+            paginator = getattr(table, "paginator", None)
+            filtered = paginator.count if paginator is not None else ""
+            table.unfiltered_count_url = (
+                f"{self.request.path}?{self.unfiltered_count_param}=1"
+                f"&filtered={filtered}"
+            )
         else:
-            # Fallback: construir botones basado en flags individuales
-            buttons = []
-            if hasattr(self, "show_filter_line") and self.show_filter_line:
-                buttons.extend(["filtrar", "limpiar"])
-            if hasattr(self, "show_export_xls") and self.show_export_xls:
-                buttons.append("exportar_xls")
-            context["show_action_buttons"] = buttons
+            (
+                table.unfiltered_records,
+                table.unfiltered_records_estimated,
+            ) = self.count_unfiltered()
 
-        # Lógica unificada: cuando se incluye 'filtrar', automáticamente se incluye 'limpiar'
-        action_buttons = context["show_action_buttons"]
-        if "filtrar" in action_buttons and "limpiar" not in action_buttons:
-            action_buttons = list(action_buttons) + ["limpiar"]
-            context["show_action_buttons"] = action_buttons
+    def count_unfiltered(self):
+        """Devolver `(total, estimado)` sin filtrar según la estrategia.
 
-        return context
+        Con la estrategia lazy no se cuenta nada y devuelve `(None, False)`.
+        """
+        strategy = self.unfiltered_count_strategy
+        if strategy not in counts.STRATEGIES:
+            raise ValueError(f"Estrategia de conteo desconocida: {strategy}")
+
+        queryset = self.get_unfiltered_queryset()
+        if strategy == counts.EXACT:
+            return counts.exact_count(queryset), False
+        if strategy == counts.CACHED:
+            return (
+                counts.cached_count(queryset, self.unfiltered_count_cache_timeout),
+                False,
+            )
+        if strategy == counts.ESTIMATED:
+            return counts.estimated_count(queryset)
+        return None, False
+
+    def set_unfiltered_from_header(self, table):
+        """Reusar el total sin filtrar que el cliente mandó en X-Scotty-Unfiltered.
+
+        La página completa lo deja en `hx-headers`; los renders parciales lo
+        reciben y se ahorran el COUNT. El valor solo se muestra como texto,
+        así que no importa que venga del cliente. Devuelve False si no hay
+        un valor válido.
+        """
+        unfiltered = self.get_unfiltered_from_header()
+        if unfiltered is None:
+            return False
+        table.unfiltered_records, table.unfiltered_records_estimated = unfiltered
+        table.unfiltered_count_url = None
+        return True
+
+    def get_unfiltered_from_header(self):
+        """`(total, estimado)` de X-Scotty-Unfiltered, o None si no sirve."""
+        if self.unfiltered_count_strategy == counts.LAZY:
+            return None
+        value = self.request.headers.get(UNFILTERED_HEADER, "")
+        estimated = value.startswith("~")
+        try:
+            return int(value.lstrip("~")), estimated
+        except ValueError:
+            return None
+
+    def unfiltered_count_response(self):
+        """Responder el fragmento con el total sin filtrar (estrategia lazy)."""
+        total = counts.cached_count(
+            self.get_unfiltered_queryset(), self.unfiltered_count_cache_timeout
+        )
+        if self.request.GET.get("filtered") == str(total):
+            return HttpResponse("")
+        return HttpResponse(f"(filtrado de un total de {total})")
+
+    def get_export_queryset(self):
+        """Devolver el QuerySet filtrado igual que FilterView.get, sin paginar."""
+        return self.get_filtered_queryset()
+
+    def get_filtered_queryset(self):
+        """Aplicar el filterset del request como FilterView.get."""
+        self.filterset = self.get_filterset(self.get_filterset_class())
+        return self.filterset_queryset(self.filterset)
+
+    def filterset_queryset(self, filterset):
+        # Igual que FilterView: con el formulario inválido no hay filas
+        if not filterset.is_bound or filterset.is_valid() or not self.get_strict():
+            return filterset.qs
+        return filterset.queryset.none()
 
     def get_export_filename(self, export_format):
         """Generar nombre de archivo basado en el nombre de la clase de la vista."""
@@ -260,23 +590,40 @@ class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterV
         filename = re.sub(r"[-\s]+", "_", filename)
         return f"{filename}.{export_format}"
 
-    # TODO: Test
+    @classmethod
+    def get_filter_buttons(cls, view=None):
+        """Botones de la línea de filtros; se arman una vez por clase (ver registry.py)."""
+        view = cls if view is None else view
+        # Sistema unificado de botones de filtros
+        if getattr(view, "available_filter_buttons", None) is not None:
+            buttons = list(view.available_filter_buttons)
+        else:
+            # Fallback: construir botones basado en flags individuales
+            buttons = []
+            if getattr(view, "show_filter_line", False):
+                buttons.extend(["filtrar", "limpiar"])
+            if getattr(view, "show_export_xls", False):
+                buttons.append("exportar_xls")
+
+        # Lógica unificada: cuando se incluye 'filtrar', automáticamente se incluye 'limpiar'
+        if "filtrar" in buttons and "limpiar" not in buttons:
+            buttons.append("limpiar")
+        return buttons
+
     @property
     def available_actions(self):
-        """Devolver el short name de una acción, si existe."""
-        if self.available_action_names is not None:
-            for action in self.available_action_names:
-                if hasattr(self, action):
-                    action_method = getattr(self, action)
-                    verbose_name = getattr(action_method, "verbose_name", None)
-                    show_on_bulk = getattr(action_method, "show_on_bulk", True)
-                    show_confirm = getattr(action_method, "show_on_bulk", False)
-                    if verbose_name is None:
-                        verbose_name = action.replace("_", " ").capitalize()
-
-                    yield action, verbose_name, show_on_bulk, show_confirm
-        else:
-            return []
+        """Tuplas (nombre, verbose_name, show_on_bulk, show_confirm) de las acciones.
+
+        Salen del ViewMeta de la clase; solo se recorren de nuevo si la
+        instancia recibió otras `available_action_names` (por `as_view()`).
+        """
+        if "available_action_names" in vars(self):
+            return collect_actions(self, self.available_action_names)
+        return self.scotty_meta.actions
+
+    def get_action(self, name):
+        """Devolver el método de la acción `name` tal como se va a ejecutar."""
+        return getattr(self, name)
 
     # TODO: Test
     # TODO: Agregar que sea posible aplicar toda la seleccion al queryset filtrado
@@ -300,37 +647,50 @@ class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterV
             queryset_to_act_on = self.model.objects.filter(pk__in=selected_pks)
         elif "filter_query_string" in request.POST:
             # Caso 2: Acción sobre el QuerySet filtrado completo
-            # Recreamos el QuerySet filtrado sin la paginación
-            filter_params = parse_qs(request.POST["filter_query_string"])
-            # Limpiamos los parámetros de paginación para obtener todo el QuerySet
-            filter_params.pop("page", None)
-            filter_params.pop("per_page", None)
-
-            # Usamos el mismo filtro que en la vista GET
-            filterset = self.filterset_class(
-                filter_params, queryset=self.get_queryset()
+            # Usamos el mismo filtro que en la vista GET; la paginación y el
+            # orden del query string no cambian qué registros entran
+            filterset = self.build_filterset(
+                self.get_filterset_class(),
+                QueryDict(request.POST["filter_query_string"]),
             )
-            queryset_to_act_on = filterset.qs
+            with self.scotty_profile.phase("accion"):
+                results = self.run_on_filtered_queryset(
+                    action,
+                    request.POST["filter_query_string"],
+                    self.filterset_queryset(filterset),
+                )
+            # update() no dispara señales: invalidamos el cache a mano
+            counts.bump_model_version(self.model)
+            if results and hasattr(results[0], "status_code"):
+                return results[0]
+            if getattr(request, "htmx", False):
+                return render(
+                    request,
+                    self.bulk_progress_template,
+                    {
+                        "run": self.bulk_run,
+                        "filter_query_string": request.POST["filter_query_string"],
+                    },
+                )
+            return redirect(request.path)
 
         # Ejecutar la acción si tenemos un QuerySet para procesar
         if queryset_to_act_on is not None:
-            results = []
-            for obj in queryset_to_act_on:
-                action_method = getattr(self, action)
-
-                # TODO: Test if
-                try:
-                    condition_result = action_method.condition(obj, self.request)
-                    if condition_result:
-                        result = getattr(self, action)(obj)
-                        results.append(result)
-                    else:
-                        # Fixme: Add messages
-                        # messages.warning(request, 'No se pudo realizar la accion')
-                        pass
-                except Exception:
-                    # NO ejecutar la acción de nuevo si hay error
-                    pass
+            action_method = self.get_action(action)
+            with self.scotty_profile.phase("accion"):
+                if getattr(action_method, "bulk", None) is not None:
+                    # La acción sabe operar sobre el QuerySet completo
+                    results = run_bulk_action(
+                        action_method,
+                        queryset_to_act_on,
+                        request,
+                        batch_size=self.bulk_batch_size,
+                    )
+                else:
+                    results = self.run_action_per_object(
+                        action_method, queryset_to_act_on
+                    )
+            counts.bump_model_version(self.model)
 
             # FIXME: Mejorar esta lógica. De momento si una acción pide
             # hacer un redirect, no se ejecutaran las siguientes llamadas
@@ -344,6 +704,51 @@ class CottonTableView(PaginationFixMixin, ExportMixin, SingleTableMixin, FilterV
                     return results[0]
         return redirect(request.path)
 
+    def run_on_filtered_queryset(self, action, filter_query_string, queryset):
+        """Aplicar la acción al QuerySet filtrado completo, en lotes por pk.
+
+        Cada lote se confirma por separado y deja un checkpoint en el cache:
+        repetir el mismo pedido (misma acción y filtros) retoma desde ahí.
+        El progreso queda en `self.bulk_run`. `bulk_time_budget` solo se
+        aplica a los pedidos htmx, que encadenan el resto desde el fragmento
+        de progreso; un POST común termina la ejecución antes de redirigir.
+        """
+        user = getattr(self.request, "user", None)
+        run_id = BulkRun.make_id(action, filter_query_string, getattr(user, "pk", None))
+        self.bulk_run = BulkRun.start(run_id, action, self.bulk_run_ttl)
+        return run_chunked_action(
+            self.get_action(action),
+            queryset,
+            self.request,
+            self.bulk_run,
+            chunk_size=self.bulk_chunk_size,
+            time_budget=(
+                self.bulk_time_budget if getattr(self.request, "htmx", False) else None
+            ),
+        )
+
+    def run_action_per_object(self, action_method, queryset):
+        """Ejecutar la acción objeto por objeto, evaluando su condición.
+
+        Es el camino para las acciones que no declaran `bulk`.
+        """
+        results = []
+        for obj in queryset:
+            # TODO: Test if
+            try:
+                condition_result = action_method.condition(obj, self.request)
+                if condition_result:
+                    result = action_method(obj)
+                    results.append(result)
+                else:
+                    # Fixme: Add messages
+                    # messages.warning(request, 'No se pudo realizar la accion')
+                    pass
+            except Exception:
+                # NO ejecutar la acción de nuevo si hay error
+                pass
+        return results
+
     # TODO: Test
     @classmethod
     def get_slugname(cls):
@@ -372,15 +777,20 @@ def generar_id_valido(base_id):
     return id_valido
 
 
+# Parte aleatoria por proceso, así los ids de distintos workers no coinciden
+_UNIQUE_ID_SEED = uuid.uuid4().hex[:6]
+_unique_ids = itertools.count()
+
+
 # TODO: Test
 def get_unique_id(prefix=""):
     """Generar un ID único con un prefijo opcional"""
-    component_id = uuid.uuid1().__str__().replace("-", "")[2:8]
+    component_id = f"{_UNIQUE_ID_SEED}{next(_unique_ids):x}"
     sanitized_id = generar_id_valido(component_id)
     return f"{prefix}{sanitized_id}"
 
 
-class GenericDetailView(DetailView):
+class GenericDetailView(InstrumentationMixin, ViewMetaMixin, DetailView):
     """
     Una DetailView genérica que automáticamente genera una lista de campos y valores
     del objeto para ser renderizados por una plantilla.
@@ -389,33 +799,47 @@ class GenericDetailView(DetailView):
 
     # Apuntamos a nuestra plantilla genérica
     template_name = "django_tables2/generic_detail.html"
+    scotty_kind = discovery.DETAIL
 
     # Opcional: define campos que nunca quieres mostrar
     exclude_fields = ["id"]
+    # Traer solo los campos que se muestran; desactivar si la plantilla
+    # personalizada usa otros (cada campo diferido es una query más)
+    auto_only_fields = True
+
+    def get_field_plan(self, model=None):
+        """Plan de campos de la vista, cacheado por clase, modelo y exclusiones."""
+        return details.get_field_plan(
+            type(self), model or self.model, self.exclude_fields
+        )
+
+    def get_queryset(self):
+        """Traer en una sola query exactamente los campos del detalle."""
+        queryset = super().get_queryset()
+        plan = self.get_field_plan(queryset.model)
+        return plan.optimize(queryset, use_only=self.auto_only_fields)
+
+    def get_object(self, queryset=None):
+        with self.scotty_profile.phase("objeto"):
+            return super().get_object(queryset)
 
     def get_context_data(self, **kwargs):
         """
         Sobrescribimos este método para inyectar nuestra lista de campos en el contexto.
         """
-        context = super().get_context_data(**kwargs)
+        with self.scotty_profile.phase("campos"):
+            return self.get_field_context(super().get_context_data(**kwargs))
+
+    def get_field_context(self, context):
+        """Agregar al contexto la lista de campos del objeto y el título."""
         instance = context["object"]
 
         field_list = []
-        # Iteramos sobre todos los campos definidos en el modelo
-        for field in instance._meta.get_fields():
-            # Many to many por ahora no manejamos
-            if not field.concrete or field.many_to_many:
-                continue
-
-            # Sacamos los campos excluidos
-            if field.name in self.exclude_fields:
-                continue
-
-            value = getattr(instance, field.name)
-
-            get_display_method = f"get_{field.name}_display"
-            if hasattr(instance, get_display_method):
-                value = getattr(instance, get_display_method)()
+        for plan_field in self.get_field_plan(type(instance)).fields:
+            if plan_field.display_method is not None:
+                value = getattr(instance, plan_field.display_method)()
+            else:
+                value = getattr(instance, plan_field.name)
 
             if value is None:
                 value = "—"
@@ -423,20 +847,7 @@ class GenericDetailView(DetailView):
             if isinstance(value, bool):
                 value = "Sí" if value else "No"
 
-            try:
-                field_list.append(
-                    {
-                        "label": field.verbose_name.capitalize(),
-                        "value": value,
-                    }
-                )
-            except Exception:
-                field_list.append(
-                    {
-                        "label": field.name.capitalize(),
-                        "value": value,
-                    }
-                )
+            field_list.append({"label": plan_field.label, "value": value})
 
         # Agregamos la lista y un título al contexto
         context["field_list"] = field_list
@@ -453,10 +864,25 @@ class GenericDetailView(DetailView):
         return trimed_view_name
 
 
-class DictTableView(ExportMixin, SingleTableView):
+class DictTableView(
+    InstrumentationMixin,
+    ViewMetaMixin,
+    TableFragmentCacheMixin,
+    StreamingExportMixin,
+    ExportMixin,
+    SingleTableView,
+):
     template_name = "django_tables2/base_django_tables2_dict.html"
     show_export_xls = False
     show_filter_line = False
+    filter_button_attributes = ("show_export_xls",)
+    # Origen de datos paginado/ordenado del lado del servidor (ver sources.py)
+    data_source = None
+    # Guardar la lista de dicts por columnas (ver columnar.py)
+    columnar_data = False
+    # DictFilterSet para filtrar por columnas (implica columnar_data)
+    filterset_class = None
+    formhelper_class = FormHelper
 
     # TODO: Test
     @classmethod
@@ -465,6 +891,80 @@ class DictTableView(ExportMixin, SingleTableView):
         trimed_view_name = cls.__name__.lower().removesuffix("view")
         return trimed_view_name
 
+    @classmethod
+    def get_filter_buttons(cls, view=None):
+        """Botones de la línea de filtros cuando la vista tiene `filterset_class`."""
+        view = cls if view is None else view
+        buttons = ["filtrar", "limpiar"]
+        if view.show_export_xls:
+            buttons.append("exportar_xls")
+        return buttons
+
+    def get_data_source(self):
+        """Devolver el DataSource de la vista, o None para usar get_queryset()."""
+        return self.data_source
+
+    def get_queryset(self):
+        data_source = self.get_data_source()
+        if data_source is not None:
+            return data_source
+        return super().get_queryset()
+
+    def get_data_version(self):
+        """Versión de los datos, o None si cambian en cada request.
+
+        Con una versión, las columnas y los índices de filtrado se arman una
+        vez por proceso y se reusan hasta que la versión cambie.
+        """
+        return None
+
+    def get_columnar_data(self, data):
+        version = self.get_data_version()
+        if version is None:
+            return ColumnarData.from_records(data)
+        cached = type(self).__dict__.get("_columnar_cache")
+        if cached is not None and cached.version == version:
+            return cached
+        columnar = ColumnarData.from_records(data, version=version)
+        type(self)._columnar_cache = columnar
+        return columnar
+
+    def get_filterset(self, data):
+        with self.scotty_profile.phase("filtros"):
+            filterset = self.filterset_class(
+                self.request.GET or None,
+                queryset=ColumnarQuerySet(data),
+                request=self.request,
+            )
+            filterset.form.helper = self.formhelper_class()
+        return filterset
+
+    def get_table(self, **kwargs):
+        with self.scotty_profile.phase("tabla"):
+            return super().get_table(**kwargs)
+
+    def get_table_data(self):
+        with self.scotty_profile.phase("datos"):
+            return self.build_table_data(super().get_table_data())
+
+    def build_table_data(self, data):
+        if isinstance(data, DataSource):
+            # Solo se materializa la página visible
+            return TableSourceData(data)
+        if isinstance(data, TableData):
+            return data
+        if self.filterset_class is not None:
+            self.filterset = self.get_filterset(self.get_columnar_data(data))
+            # Igual que FilterView: con el formulario inválido no hay filas
+            if not self.filterset.is_bound or self.filterset.is_valid():
+                filtered = self.filterset.qs
+            else:
+                filtered = self.filterset.queryset.none()
+            return TableColumnarData(filtered.data, index=filtered.index)
+        if self.columnar_data:
+            return TableColumnarData(self.get_columnar_data(data))
+        return data
+
     def get_context_data(self, **kwargs):
         """Agregamos el total de registros sin filtrar al contexto."""
         # Primero, obtenemos el contexto base de la clase padre
@@ -473,80 +973,134 @@ class DictTableView(ExportMixin, SingleTableView):
         # Agregar control para mostrar/ocultar acciones masivas
         context["show_export_xls"] = self.show_export_xls
         context["show_filter_line"] = self.show_filter_line
+        filterset = getattr(self, "filterset", None)
+        if filterset is not None:
+            context["filter"] = filterset
+            context["show_action_buttons"] = self.filter_buttons
+        self.configure_table_fragment_cache(context["table"])
 
         return context
 
 
-def add_urls(views_modules: List) -> List:
-    """Crear urlpatterns para módulos de CottonTableView presentes en views_modules."""
-    urlpatterns = []
+def get_url_entries(views_modules: List) -> List:
+    """Entradas de URL (tipo, módulo, clase, slug) de las vistas en views_modules.
+
+    Cada clase se registra una sola vez aunque otro módulo la importe, y las
+    clases base de django_scotty (sync o async) no generan URLs.
+    """
+    seen = set()
+    entries = []
     for module in views_modules:
-        for name, cls in inspect.getmembers(module, inspect.isclass):
-            if (
-                name != "CottonTableView"
-                and (issubclass(cls, CottonTableView) or issubclass(cls, DictTableView))
-                and hasattr(cls, "as_view")
+        for cls in vars(module).values():
+            if not isinstance(cls, type) or cls in seen:
+                continue
+            if cls.__module__.split(".")[0] == __name__.split(".")[0]:
+                continue
+            if issubclass(cls, (CottonTableView, DictTableView)) and hasattr(
+                cls, "as_view"
             ):
-                trimed_view_name = cls.get_slugname()
-                urlpatterns.append(
-                    path(
-                        f"{trimed_view_name}/",
-                        cls.as_view(),
-                        name=f"list-view-{trimed_view_name}",
-                    )
-                )
-            if issubclass(cls, GenericDetailView):
-                # Agregar el detalle de un objeto
-                # rig
-                trimed_view_name = cls.get_slugname()
-                urlpatterns.append(
-                    path(
-                        f"{trimed_view_name}/<int:pk>/",
-                        cls.as_view(model=cls.model),
-                        name=f"detail-view-{trimed_view_name}",
-                    )
-                )
+                kind = discovery.LIST
+            elif issubclass(cls, GenericDetailView):
+                kind = discovery.DETAIL
+            else:
+                continue
+            seen.add(cls)
+            entries.append(
+                {
+                    "kind": kind,
+                    "module": cls.__module__,
+                    "class": cls.__qualname__,
+                    "slug": cls.scotty_meta.slug,
+                    "is_async": cls.view_is_async,
+                }
+            )
+    return entries
+
+
+def build_urls(entries, views=None) -> List:
+    """Crear los urlpatterns de las entradas; sin `views`, con vistas lazy."""
+    urlpatterns = []
+    for entry in entries:
+        kind, slug = entry["kind"], entry["slug"]
+        if views is not None:
+            cls = views[(entry["module"], entry["class"])]
+            if kind == discovery.DETAIL:
+                view = cls.as_view(model=cls.model)
+            else:
+                view = cls.as_view()
+        else:
+            view = discovery.lazy_view(
+                entry["module"], entry["class"], kind, entry.get("is_async", False)
+            )
+
+        name = get_url_name(kind, slug)
+        if kind == discovery.DETAIL:
+            # Agregar el detalle de un objeto
+            urlpatterns.append(path(f"{slug}/<int:pk>/", view, name=name))
+        else:
+            urlpatterns.append(path(f"{slug}/", view, name=name))
     return urlpatterns
 
 
+def add_urls(views_modules: List) -> List:
+    """Crear urlpatterns para módulos de CottonTableView presentes en views_modules."""
+    entries = get_url_entries(views_modules)
+    views = {}
+    for module in views_modules:
+        for cls in vars(module).values():
+            if isinstance(cls, type):
+                views.setdefault((cls.__module__, cls.__qualname__), cls)
+    return build_urls(entries, views)
+
+
+def import_scotty_modules(app_name, scotty_dir, raise_errors=False):
+    """Importar todos los módulos de `<app>/scotty/`; los que fallan se loguean."""
+    modules_list = []
+    for module_name in discovery.iter_module_names(scotty_dir):
+        full_module_path = f"{app_name}.scotty.{module_name}"
+        try:
+            modules_list.append(importlib.import_module(full_module_path))
+        except Exception as err:
+            if raise_errors:
+                raise
+            logging.error(f"[SCOTTY LOADER] Error importando {full_module_path} {err}")
+    return modules_list
+
+
 def load_scotty_urls(app_name=None):
     """
     Auto-detecta la app actual basándose en el módulo que lo llama.
     Busca dentro de <app>/scotty/ todos los módulos .py y les aplica add_urls().
     Devuelve un unico urlpatterns combinando todo.
+
+    Si existe un manifiesto vigente (`manage.py scotty_manifest`) no se importa
+    nada: las vistas se importan recién en el primer request que las usa.
     """
     if app_name is None:
         # --- 1. Detectar desde dónde fue llamada la función ---
-        caller_frame = inspect.stack()[1]
-        caller_module = inspect.getmodule(caller_frame[0])
-        caller_module_name = caller_module.__name__  # ejemplo: "mi_app.urls"
+        # sys._getframe no arma el contexto de código fuente como inspect.stack()
+        caller_module_name = sys._getframe(1).f_globals["__name__"]
         # Derivar el nombre de la app -> "mi_app"
         app_name = caller_module_name.split(".")[0]
 
+    started = time.perf_counter()
     # --- 2. Obtener ruta del paquete de la app ---
-    app_module = importlib.import_module(app_name)
-    app_path = os.path.dirname(app_module.__file__)
-    scotty_dir = os.path.join(app_path, "scotty")
-
-    collected_urls = []
-
-    # --- 3. Buscar y cargar módulos dentro de scotty/ ---
-    if os.path.isdir(scotty_dir):
-        for module_info in pkgutil.iter_modules([scotty_dir]):
-            module_name = module_info.name
-            if module_name == "__init__":
-                continue
-
-            full_module_path = f"{app_name}.scotty.{module_name}"
-
-            modules_list = []
-            try:
-                module = importlib.import_module(full_module_path)
-                modules_list.append(module)
-            except Exception as err:
-                logging.error(
-                    f"[SCOTTY LOADER] Error importando {full_module_path} {err}"
-                )
-            collected_urls = add_urls(modules_list)
-
+    scotty_dir = discovery.get_scotty_dir(app_name)
+    if scotty_dir is None:
+        return []
+
+    # --- 3. Usar el manifiesto o buscar y cargar módulos dentro de scotty/ ---
+    entries = discovery.read_manifest(scotty_dir)
+    if entries is not None:
+        source = "manifiesto"
+        collected_urls = build_urls(entries)
+    else:
+        source = "importación"
+        collected_urls = add_urls(import_scotty_modules(app_name, scotty_dir))
+
+    elapsed = (time.perf_counter() - started) * 1000
+    logging.info(
+        f"[SCOTTY LOADER] {app_name}: {len(collected_urls)} URLs "
+        f"en {elapsed:.1f} ms ({source})"
+    )
     return collected_urls
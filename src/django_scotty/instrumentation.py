@@ -0,0 +1,379 @@
+import logging
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.dispatch import Signal
+from django.template.loader import render_to_string
+from django.utils.module_loading import import_string
+
+from .queries import QueryCounter
+
+logger = logging.getLogger(__name__)
+
+# Se envía con sender=clase de la vista y profile=Profile al terminar el request
+request_profiled = Signal()
+
+DEFAULT_SINKS = [
+    "django_scotty.instrumentation.LoggingSink",
+    "django_scotty.instrumentation.ServerTimingSink",
+    "django_scotty.instrumentation.SignalSink",
+]
+# La plantilla deja esta marca y se reemplaza por el panel ya renderizado,
+# así el panel incluye el tiempo de render
+OVERLAY_MARKER = "<!--scotty-profile-->"
+OVERLAY_TEMPLATE = "django_tables2/scotty_profile.html"
+
+
+class _NullPhase:
+    """Fase que no mide nada: es lo único que se ejecuta sin instrumentación."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+class NullProfile:
+    enabled = False
+    overlay = False
+
+    def phase(self, name):
+        return _NULL_PHASE
+
+    def count_thread_queries(self):
+        return _NULL_PHASE
+
+
+NULL_PROFILE = NullProfile()
+
+
+class PhaseTiming:
+    """Tiempo, queries y llamadas acumuladas de una fase."""
+
+    __slots__ = ("name", "depth", "seconds", "queries", "calls")
+
+    def __init__(self, name, depth):
+        self.name = name
+        self.depth = depth
+        self.seconds = 0.0
+        self.queries = 0
+        self.calls = 0
+
+    @property
+    def milliseconds(self):
+        return self.seconds * 1000
+
+    def as_dict(self):
+        return {
+            "name": self.name,
+            "depth": self.depth,
+            "ms": round(self.milliseconds, 3),
+            "queries": self.queries,
+            "calls": self.calls,
+        }
+
+
+class _Phase:
+    __slots__ = ("profile", "name", "started", "queries")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        profile = self.profile
+        if self.name not in profile.phases:
+            # Se registra al entrar: el orden es el de inicio de cada fase
+            profile.phases[self.name] = PhaseTiming(self.name, profile._depth)
+        profile._depth += 1
+        self.queries = profile.queries
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        profile = self.profile
+        profile._depth -= 1
+        profile.add(
+            self.name,
+            time.perf_counter() - self.started,
+            profile.queries - self.queries,
+        )
+        return False
+
+
+class Profile:
+    """Mediciones de un request: fases con tiempo y queries, más el total.
+
+    Las fases se abren con `with profile.phase("nombre"):` y se acumulan si
+    se repiten (por ejemplo `acciones`, una vez por fila). Pueden anidarse:
+    `depth` indica dentro de cuántas otras fases corrió cada una. Las
+    queries se cuentan en todas las conexiones configuradas.
+    """
+
+    enabled = True
+
+    def __init__(self, view, request, overlay=False):
+        self.view = view
+        self.view_name = type(view).__name__
+        self.request = request
+        self.response = None
+        self.method = request.method
+        self.path = request.get_full_path()
+        self.overlay = overlay
+        self.phases = {}
+        self.seconds = None
+        self.total_queries = None
+        self._depth = 0
+        self._counters = []
+        self._counters_lock = threading.Lock()
+        self._stack = None
+        self._started = None
+
+    @property
+    def queries(self):
+        return sum(counter.count for counter in self._counters)
+
+    @property
+    def milliseconds(self):
+        return (self.seconds or 0) * 1000
+
+    def start(self):
+        self._stack = ExitStack()
+        for alias in connections:
+            counter = self._stack.enter_context(QueryCounter(connections[alias]))
+            self._counters.append(counter)
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._stack is None:
+            return
+        self.seconds = time.perf_counter() - self._started
+        self.total_queries = self.queries
+        self._stack.close()
+        self._stack = None
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    @contextmanager
+    def count_thread_queries(self):
+        """Contar también las queries de este thread mientras dure el `with`.
+
+        Las conexiones de Django son por thread: las consultas que una vista
+        async reparte en otros threads no pasan por los contadores de
+        `start()`.
+        """
+        with ExitStack() as stack:
+            for alias in connections:
+                counter = stack.enter_context(QueryCounter(connections[alias]))
+                with self._counters_lock:
+                    self._counters.append(counter)
+            yield
+
+    def add(self, name, seconds, queries=0):
+        timing = self.phases.get(name)
+        if timing is None:
+            timing = self.phases[name] = PhaseTiming(name, self._depth)
+        timing.seconds += seconds
+        timing.queries += queries
+        timing.calls += 1
+
+    def as_dict(self):
+        return {
+            "view": self.view_name,
+            "method": self.method,
+            "path": self.path,
+            "ms": round(self.milliseconds, 3),
+            "queries": self.total_queries,
+            "phases": [timing.as_dict() for timing in self.phases.values()],
+        }
+
+    def __str__(self):
+        phases = " | ".join(
+            f"{timing.name} {timing.milliseconds:.1f}ms {timing.queries}q"
+            for timing in self.phases.values()
+        )
+        return (
+            f"{self.view_name} {self.method} {self.path} "
+            f"{self.milliseconds:.1f}ms {self.total_queries}q [{phases}]"
+        )
+
+
+class LoggingSink:
+    """Una línea de log por request con el total y cada fase."""
+
+    def emit(self, profile):
+        logger.info(f"[SCOTTY PROFILE] {profile}")
+
+
+class SignalSink:
+    """Enviar la señal `request_profiled` con el Profile."""
+
+    def emit(self, profile):
+        request_profiled.send(
+            sender=type(profile.view), profile=profile, request=profile.request
+        )
+
+
+class ServerTimingSink:
+    """Cabecera Server-Timing, visible en la pestaña Network del navegador.
+
+    En las respuestas streaming las cabeceras ya salieron cuando se termina
+    de medir, así que no se agrega nada.
+    """
+
+    def emit(self, profile):
+        response = profile.response
+        if response is None or getattr(response, "streaming", False):
+            return
+        metrics = [
+            f'{timing.name};dur={timing.milliseconds:.1f};desc="{timing.queries} q"'
+            for timing in profile.phases.values()
+        ]
+        metrics.append(
+            f'total;dur={profile.milliseconds:.1f};desc="{profile.total_queries} q"'
+        )
+        response["Server-Timing"] = ", ".join(metrics)
+
+
+_sinks_cache = {}
+
+
+def get_sinks():
+    paths = tuple(getattr(settings, "SCOTTY_INSTRUMENTATION_SINKS", DEFAULT_SINKS))
+    sinks = _sinks_cache.get(paths)
+    if sinks is None:
+        sinks = _sinks_cache[paths] = [import_string(path)() for path in paths]
+    return sinks
+
+
+def emit(profile):
+    for sink in get_sinks():
+        try:
+            sink.emit(profile)
+        except Exception as err:
+            # Un sink roto no puede tirar abajo el request
+            logger.error(f"[SCOTTY PROFILE] Falló {type(sink).__name__}: {err}")
+
+
+def render_overlay(profile):
+    return render_to_string(OVERLAY_TEMPLATE, {"profile": profile})
+
+
+class InstrumentationMixin:
+    """Medir las fases de la vista y mandar el resultado a los sinks.
+
+    Se activa con `instrumentation = True` en la vista o, si la vista lo
+    deja en None, con el setting `SCOTTY_INSTRUMENTATION`. Desactivado,
+    `scotty_profile` es NULL_PROFILE y cada fase es un `with` vacío.
+    """
+
+    instrumentation = None
+    scotty_profile = NULL_PROFILE
+
+    def instrumentation_enabled(self):
+        if self.instrumentation is not None:
+            return self.instrumentation
+        return getattr(settings, "SCOTTY_INSTRUMENTATION", False)
+
+    def dispatch(self, request, *args, **kwargs):
+        if not self.instrumentation_enabled():
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self._adispatch(request, *args, **kwargs)
+
+        profile = self.start_profile(request)
+        profile.start()
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                with profile.phase("render"):
+                    response.render()
+        except BaseException:
+            profile.stop()
+            raise
+        profile.response = response
+
+        if getattr(response, "streaming", False):
+            # El export se arma mientras se envía: se mide hasta el final
+            response.streaming_content = self._profile_stream(
+                profile, response.streaming_content
+            )
+            return response
+
+        profile.stop()
+        self.finish_profile(profile, response)
+        return response
+
+    async def _adispatch(self, request, *args, **kwargs):
+        profile = self.start_profile(request)
+        # Los contadores van en el thread de la conexión del request, el
+        # mismo donde sync_to_async corre el código sync de la vista
+        await sync_to_async(profile.start)()
+        try:
+            response = await super().dispatch(request, *args, **kwargs)
+            if hasattr(response, "render") and not response.is_rendered:
+                with profile.phase("render"):
+                    await sync_to_async(response.render)()
+        except BaseException:
+            await sync_to_async(profile.stop)()
+            raise
+        profile.response = response
+
+        if getattr(response, "streaming", False):
+            if response.is_async:
+                stream = self._aprofile_stream(profile, response.streaming_content)
+            else:
+                stream = self._profile_stream(profile, response.streaming_content)
+            response.streaming_content = stream
+            return response
+
+        await sync_to_async(profile.stop)()
+        # Los sinks (señal, overlay) pueden consultar la base
+        await sync_to_async(self.finish_profile)(profile, response)
+        return response
+
+    def start_profile(self, request):
+        overlay = getattr(settings, "SCOTTY_INSTRUMENTATION_OVERLAY", settings.DEBUG)
+        profile = self.scotty_profile = Profile(self, request, overlay=overlay)
+        return profile
+
+    def finish_profile(self, profile, response):
+        """Insertar el panel en la respuesta ya medida y mandarla a los sinks."""
+        if profile.overlay and hasattr(response, "content"):
+            content = response.content.decode(response.charset)
+            if OVERLAY_MARKER in content:
+                response.content = content.replace(
+                    OVERLAY_MARKER, render_overlay(profile), 1
+                )
+        emit(profile)
+
+    def _profile_stream(self, profile, content):
+        try:
+            with profile.phase("envio"):
+                yield from content
+        finally:
+            profile.stop()
+            emit(profile)
+
+    async def _aprofile_stream(self, profile, content):
+        try:
+            with profile.phase("envio"):
+                async for chunk in content:
+                    yield chunk
+        finally:
+            await sync_to_async(profile.stop)()
+            await sync_to_async(emit)(profile)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["scotty_profile"] = self.scotty_profile
+        return context
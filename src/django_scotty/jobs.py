@@ -0,0 +1,433 @@
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.http import FileResponse, Http404, HttpRequest, QueryDict
+from django.shortcuts import render
+from django.utils.module_loading import import_string
+
+from .exports import (
+    STREAMING_FORMATS,
+    count_footer_rows,
+    iter_table_rows,
+    stream_csv,
+    stream_xlsx,
+)
+
+logger = logging.getLogger(__name__)
+
+JOB_ID_RE = re.compile(r"^[0-9a-f]{32}$")
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ExportJobStore:
+    """Estado y archivos de las exportaciones en segundo plano.
+
+    Todo se guarda en un Storage de Django (`SCOTTY_EXPORT_STORAGE`, por defecto
+    "default") para que la vista y los workers, aunque sean otros procesos,
+    vean el mismo estado.
+    """
+
+    prefix = "scotty_exports"
+
+    def __init__(self, storage=None):
+        if storage is None:
+            storage = storages[getattr(settings, "SCOTTY_EXPORT_STORAGE", "default")]
+        self.storage = storage
+
+    def state_path(self, job_id):
+        return f"{self.prefix}/{job_id}.json"
+
+    def create(self, view_path, query_string, export_format, filename, user_id, ttl):
+        now = time.time()
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": PENDING,
+            "view": view_path,
+            "query_string": query_string,
+            "format": export_format,
+            "filename": filename,
+            "user": user_id,
+            "rows": 0,
+            "total": None,
+            "file": None,
+            "error": None,
+            "created": now,
+            # Los escribe el worker: al empezar y cada `export_chunk_size` filas
+            "started": None,
+            "heartbeat": None,
+            "expires": now + ttl,
+        }
+        self._write(job)
+        return job
+
+    def read(self, job_id):
+        if not JOB_ID_RE.match(job_id or ""):
+            return None
+        path = self.state_path(job_id)
+        if not self.storage.exists(path):
+            return None
+        with self.storage.open(path, "rb") as fh:
+            return json.loads(fh.read())
+
+    def update(self, job_id, **changes):
+        job = self.read(job_id)
+        if job is None:
+            return None
+        job.update(changes)
+        self._write(job)
+        return job
+
+    def mark_stale(self, job, stale_after, now=None):
+        """Marcar como fallido un trabajo que quedó colgado.
+
+        Si el proceso del worker muere, el trabajo queda RUNNING para
+        siempre: se da por perdido cuando pasan `stale_after` segundos sin
+        heartbeat. Uno que sigue PENDING `stale_after` segundos después de
+        creado nunca llegó a un worker (cola detenida, pool caído). Devuelve
+        el trabajo, actualizado si se marcó.
+        """
+        if job["status"] == PENDING:
+            last_seen = job["created"]
+            error = "La exportación no llegó a empezar"
+        elif job["status"] == RUNNING:
+            last_seen = job.get("heartbeat") or job.get("started") or job["created"]
+            error = "El proceso de la exportación se detuvo"
+        else:
+            return job
+        now = now or time.time()
+        if now - last_seen <= stale_after:
+            return job
+        logger.warning(
+            f"[SCOTTY EXPORT] Exportación {job['id']} ({job['status']}) sin "
+            f"novedades hace {int(now - last_seen)}s: se marca como fallida"
+        )
+        stale = self.update(job["id"], status=FAILED, error=error)
+        return stale or job
+
+    def save_file(self, job_id, filename, fileobj):
+        return self.storage.save(f"{self.prefix}/{job_id}/{filename}", File(fileobj))
+
+    def open_file(self, job):
+        return self.storage.open(job["file"], "rb")
+
+    def delete(self, job_id):
+        job = self.read(job_id)
+        if job is not None and job["file"]:
+            self.storage.delete(job["file"])
+        self.storage.delete(self.state_path(job_id))
+
+    def cleanup(self, now=None):
+        """Borrar los trabajos vencidos con sus archivos. Devuelve cuántos borró."""
+        now = now or time.time()
+        try:
+            _, files = self.storage.listdir(self.prefix)
+        except FileNotFoundError:
+            return 0
+
+        deleted = 0
+        for name in files:
+            job_id = name.removesuffix(".json")
+            job = self.read(job_id)
+            if job is not None and job["expires"] < now:
+                self.delete(job_id)
+                deleted += 1
+        return deleted
+
+    def _write(self, job):
+        path = self.state_path(job["id"])
+        content = json.dumps(job).encode()
+        try:
+            full_path = self.storage.path(path)
+        except NotImplementedError:
+            # Storage remoto: no hay escritura atómica, reemplazamos el archivo.
+            self.storage.delete(path)
+            self.storage.save(path, ContentFile(content))
+            return
+
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        tmp_path = f"{full_path}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(content)
+        os.replace(tmp_path, full_path)
+
+
+class ProcessPoolExportExecutor:
+    """Ejecutar las exportaciones en un pool de procesos local.
+
+    Se usa el contexto "spawn" para que los workers no hereden las conexiones
+    a la base de datos del proceso web.
+    """
+
+    max_workers = 2
+    _pool = None
+
+    def submit(self, job_id):
+        cls = type(self)
+        if cls._pool is None:
+            cls._pool = ProcessPoolExecutor(
+                max_workers=getattr(
+                    settings, "SCOTTY_EXPORT_MAX_WORKERS", self.max_workers
+                ),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        future = cls._pool.submit(run_export_job, job_id)
+        future.add_done_callback(functools.partial(self.job_finished, job_id))
+
+    @staticmethod
+    def job_finished(job_id, future):
+        """Marcar como fallido un trabajo cuyo worker no llegó a informar el error.
+
+        run_export_job guarda sus propios errores; acá llegan los del pool,
+        por ejemplo un worker que murió (BrokenProcessPool).
+        """
+        if future.cancelled():
+            error = "La exportación se canceló"
+        elif future.exception() is not None:
+            error = str(future.exception()) or type(future.exception()).__name__
+        else:
+            return
+        logger.error(
+            f"[SCOTTY EXPORT] Falló el worker de la exportación {job_id}: {error}"
+        )
+        ExportJobStore().update(job_id, status=FAILED, error=error)
+
+
+class FilesystemQueueExportExecutor:
+    """Encolar las exportaciones como archivos en un directorio.
+
+    Los procesa el comando `manage.py scotty_export_worker`.
+    """
+
+    def __init__(self, queue_dir=None):
+        self.queue_dir = queue_dir or get_queue_dir()
+
+    def submit(self, job_id):
+        os.makedirs(self.queue_dir, exist_ok=True)
+        tmp_path = os.path.join(self.queue_dir, f".{job_id}.tmp")
+        with open(tmp_path, "w") as fh:
+            fh.write(job_id)
+        os.replace(tmp_path, os.path.join(self.queue_dir, f"{job_id}.job"))
+
+
+def get_queue_dir():
+    return getattr(
+        settings,
+        "SCOTTY_EXPORT_QUEUE_DIR",
+        os.path.join(tempfile.gettempdir(), "scotty_export_queue"),
+    )
+
+
+def get_executor(executor_class=None):
+    """Instanciar el executor configurado (`SCOTTY_EXPORT_EXECUTOR`)."""
+    if executor_class is None:
+        executor_class = getattr(
+            settings,
+            "SCOTTY_EXPORT_EXECUTOR",
+            "django_scotty.jobs.ProcessPoolExportExecutor",
+        )
+    if isinstance(executor_class, str):
+        executor_class = import_string(executor_class)
+    return executor_class()
+
+
+def _ensure_django():
+    """En un worker "spawn" Django todavía no está inicializado."""
+    from django.apps import apps
+
+    if not apps.ready:
+        import django
+
+        django.setup()
+
+
+def _build_request(job):
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(job["query_string"])
+    try:
+        from django.contrib.auth import get_user_model
+        from django.contrib.auth.models import AnonymousUser
+    except Exception:
+        return request
+
+    user = None
+    if job["user"] is not None:
+        user = get_user_model().objects.filter(pk=job["user"]).first()
+    request.user = user or AnonymousUser()
+    return request
+
+
+def run_export_job(job_id, store=None):
+    """Generar el archivo de un trabajo de exportación y guardarlo en el Storage."""
+    _ensure_django()
+    store = store or ExportJobStore()
+    job = store.read(job_id)
+    if job is None or job["status"] != PENDING:
+        # Ya se dio por fallido (ver `mark_stale`) o lo tomó otro worker
+        return
+    now = time.time()
+    job = store.update(job_id, status=RUNNING, started=now, heartbeat=now)
+    if job is None:
+        return
+
+    try:
+        view = import_string(job["view"])()
+        view.setup(_build_request(job))
+        view.object_list = view.get_export_queryset()
+        total = (
+            view.object_list.count()
+            if hasattr(view.object_list, "count")
+            else len(view.object_list)
+        )
+        store.update(job_id, total=total, heartbeat=time.time())
+
+        table = view.get_export_table()
+        rows = _RowCounter(
+            iter_table_rows(
+                table,
+                exclude_columns=view.exclude_columns,
+                chunk_size=view.export_chunk_size,
+            ),
+            store,
+            job_id,
+            every=view.export_chunk_size,
+        )
+        if job["format"] == "csv":
+            content = (line.encode() for line in stream_csv(rows))
+        else:
+            title = (view.get_dataset_kwargs() or {}).get("title")
+            content = stream_xlsx(rows, title=title)
+
+        with tempfile.TemporaryFile() as tmp:
+            for chunk in content:
+                tmp.write(chunk)
+            # Las filas de pie (totales) no son registros
+            written = rows.written - count_footer_rows(table)
+            store.update(job_id, rows=written, heartbeat=time.time())
+            tmp.seek(0)
+            path = store.save_file(job_id, job["filename"], tmp)
+        store.update(job_id, status=DONE, file=path, rows=written)
+    except Exception as err:
+        logger.exception(f"[SCOTTY EXPORT] Falló la exportación {job_id}")
+        store.update(job_id, status=FAILED, error=str(err))
+
+
+class _RowCounter:
+    """Iterador que cuenta las filas escritas e informa el progreso cada `every`.
+
+    Cada informe es también el heartbeat del trabajo (ver `mark_stale`).
+    """
+
+    def __init__(self, rows, store, job_id, every):
+        self.rows = rows
+        self.store = store
+        self.job_id = job_id
+        self.every = every
+        self.written = -1  # La cabecera no cuenta
+
+    def __iter__(self):
+        for row in self.rows:
+            self.written += 1
+            if self.written and self.written % self.every == 0:
+                self.store.update(
+                    self.job_id, rows=self.written, heartbeat=time.time()
+                )
+            yield row
+
+
+class AsyncExportMixin:
+    """Exportación asincrónica opcional para CottonTableView.
+
+    Con `async_export = True` el botón "exportar_xls" encola un trabajo en el
+    executor configurado y la vista devuelve un fragmento htmx que consulta
+    el estado hasta que el archivo está listo para descargar.
+    """
+
+    async_export = False
+    export_executor_class = None
+    export_job_param = "_export_job"
+    export_job_ttl = 60 * 60
+    export_job_poll_interval = 2
+    # Segundos sin heartbeat tras los que un trabajo en curso se da por fallido
+    export_job_stale_after = 5 * 60
+    export_job_status_template = "django_tables2/export_job_status.html"
+
+    def get(self, request, *args, **kwargs):
+        job_id = request.GET.get(self.export_job_param)
+        if job_id is not None:
+            return self.export_job_response(job_id)
+
+        export_format = request.GET.get(self.export_trigger_param, None)
+        if self.async_export and export_format in STREAMING_FORMATS:
+            return self.enqueue_export(export_format)
+        return super().get(request, *args, **kwargs)
+
+    def get_export_job_store(self):
+        return ExportJobStore()
+
+    def enqueue_export(self, export_format):
+        store = self.get_export_job_store()
+        store.cleanup()
+
+        query = self.request.GET.copy()
+        query.pop(self.export_trigger_param, None)
+        user = getattr(self.request, "user", None)
+        job = store.create(
+            view_path=f"{type(self).__module__}.{type(self).__qualname__}",
+            query_string=query.urlencode(),
+            export_format=export_format,
+            filename=self.get_export_filename(export_format),
+            user_id=getattr(user, "pk", None),
+            ttl=self.export_job_ttl,
+        )
+        get_executor(self.export_executor_class).submit(job["id"])
+        return self.render_export_job(job)
+
+    def export_job_response(self, job_id):
+        store = self.get_export_job_store()
+        job = store.read(job_id)
+        user = getattr(self.request, "user", None)
+        if job is None or job["user"] != getattr(user, "pk", None):
+            raise Http404("Exportación inexistente")
+
+        if job["expires"] < time.time():
+            store.delete(job_id)
+            raise Http404("La exportación venció")
+
+        job = store.mark_stale(job, self.export_job_stale_after)
+        if "download" in self.request.GET and job["status"] == DONE:
+            return FileResponse(
+                store.open_file(job), as_attachment=True, filename=job["filename"]
+            )
+        return self.render_export_job(job)
+
+    def render_export_job(self, job):
+        percent = None
+        if job["total"]:
+            percent = min(100, int(job["rows"] * 100 / job["total"]))
+        return render(
+            self.request,
+            self.export_job_status_template,
+            {
+                "job": job,
+                "percent": percent,
+                "status_url": f"{self.request.path}?{self.export_job_param}={job['id']}",
+                "poll_interval": self.export_job_poll_interval,
+            },
+        )
@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from django_scotty.jobs import ExportJobStore, get_queue_dir, run_export_job
+
+
+class Command(BaseCommand):
+    help = "Procesar la cola de exportaciones de FilesystemQueueExportExecutor."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesar los trabajos pendientes y salir.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Segundos de espera entre lecturas de la cola.",
+        )
+
+    def handle(self, *args, **options):
+        queue_dir = get_queue_dir()
+        os.makedirs(queue_dir, exist_ok=True)
+        store = ExportJobStore()
+
+        while True:
+            store.cleanup()
+            for name in sorted(os.listdir(queue_dir)):
+                if not name.endswith(".job"):
+                    continue
+                job_path = os.path.join(queue_dir, name)
+                claimed_path = f"{job_path}.running"
+                try:
+                    # El rename es atómico: si otro worker lo tomó, seguimos.
+                    os.rename(job_path, claimed_path)
+                except FileNotFoundError:
+                    continue
+
+                job_id = name.removesuffix(".job")
+                self.stdout.write(f"Exportando {job_id}")
+                run_export_job(job_id, store=store)
+                os.remove(claimed_path)
+
+            if options["once"]:
+                return
+            time.sleep(options["interval"])
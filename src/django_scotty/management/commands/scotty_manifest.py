@@ -0,0 +1,60 @@
+import os
+
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from django_scotty import discovery
+from django_scotty.helpers import get_url_entries, import_scotty_modules
+
+
+class Command(BaseCommand):
+    help = (
+        "Generar el manifiesto de URLs de <app>/scotty/ para que "
+        "load_scotty_urls no importe las vistas al arrancar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "app_labels",
+            nargs="*",
+            help="Apps a procesar (por defecto, todas las que tengan scotty/).",
+        )
+        parser.add_argument(
+            "--delete",
+            action="store_true",
+            help="Borrar los manifiestos en lugar de generarlos.",
+        )
+
+    def handle(self, *args, **options):
+        if options["app_labels"]:
+            try:
+                app_configs = [
+                    apps.get_app_config(label) for label in options["app_labels"]
+                ]
+            except LookupError as err:
+                raise CommandError(err)
+        else:
+            app_configs = apps.get_app_configs()
+
+        for app_config in app_configs:
+            app_name = app_config.name
+            scotty_dir = discovery.get_scotty_dir(app_name)
+            if scotty_dir is None:
+                continue
+
+            if options["delete"]:
+                manifest_path = discovery.get_manifest_path(scotty_dir)
+                try:
+                    os.remove(manifest_path)
+                except FileNotFoundError:
+                    continue
+                self.stdout.write(f"Borrado {manifest_path}")
+                continue
+
+            # Un módulo que no importa dejaría el manifiesto incompleto
+            modules_list = import_scotty_modules(
+                app_name, scotty_dir, raise_errors=True
+            )
+            entries = get_url_entries(modules_list)
+            manifest_path = discovery.write_manifest(app_name, scotty_dir, entries)
+            self.stdout.write(f"{app_name}: {len(entries)} URLs en {manifest_path}")
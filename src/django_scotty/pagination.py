@@ -0,0 +1,169 @@
+import base64
+import binascii
+import datetime
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Model, Q
+from django_tables2.rows import BoundRows
+
+logger = logging.getLogger(__name__)
+
+OFFSET = "offset"
+CURSOR = "cursor"
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class CursorPage:
+    """Página de paginación por cursor, con la interfaz que usan las plantillas."""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+class _CursorEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder recorta los microsegundos, acá hacen falta completos."""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(fields, values, direction):
+    raw = json.dumps({"o": fields, "v": values, "d": direction}, cls=_CursorEncoder)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Devolver el cursor decodificado, o None si es inválido."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, binascii.Error):
+        return None
+    if not isinstance(data, dict) or data.get("d") not in (NEXT, PREVIOUS):
+        return None
+    return data
+
+
+def get_ordering_fields(queryset):
+    """Columnas de orden del queryset con el pk como desempate final."""
+    query = queryset.query
+    ordering = list(query.order_by)
+    if not ordering and query.default_ordering:
+        ordering = list(query.get_meta().ordering)
+
+    if not all(isinstance(field, str) and field != "?" for field in ordering):
+        # Expresiones u orden aleatorio: no se pueden usar como cursor
+        logger.warning(
+            f"[SCOTTY CURSOR] Orden no soportado {ordering}, se ordena por pk"
+        )
+        ordering = []
+
+    pk_names = {"pk", queryset.model._meta.pk.name}
+    if not any(field.lstrip("-") in pk_names for field in ordering):
+        ordering.append("pk")
+    return ordering
+
+
+def _record_value(record, field):
+    value = record
+    for part in field.lstrip("-").split("__"):
+        value = getattr(value, part)
+        if value is None:
+            return None
+    if isinstance(value, Model):
+        return value.pk
+    return value
+
+
+def _keyset_filter(fields, values, backwards, nulls_largest):
+    """Armar el filtro "después de `values`" en el sentido del recorrido.
+
+    Para (a, b, pk) queda: a > va OR (a = va AND b > vb) OR (a = va AND b = vb
+    AND pk > vpk), invirtiendo las comparaciones en las columnas descendentes.
+    """
+    result = Q(pk__in=[])
+    equal_prefix = Q()
+    for field, value in zip(fields, values):
+        name = field.lstrip("-")
+        ascending = field.startswith("-") == backwards
+        null_is_last = nulls_largest == ascending
+
+        if value is None:
+            strict = Q(pk__in=[]) if null_is_last else Q(**{f"{name}__isnull": False})
+            equal = Q(**{f"{name}__isnull": True})
+        else:
+            lookup = "gt" if ascending else "lt"
+            strict = Q(**{f"{name}__{lookup}": value})
+            if null_is_last:
+                strict |= Q(**{f"{name}__isnull": True})
+            equal = Q(**{name: value})
+
+        result |= equal_prefix & strict
+        equal_prefix &= equal
+    return result
+
+
+def _reverse_field(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def paginate_by_cursor(table, cursor, per_page):
+    """Paginar la tabla por keyset, sin COUNT ni OFFSET.
+
+    Lee `per_page + 1` registros a partir del cursor para saber si hay otra
+    página. Un cursor armado con otro orden (por ejemplo después de cambiar
+    la columna de orden) se ignora y se vuelve a la primera página.
+    """
+    queryset = table.data.data
+    fields = get_ordering_fields(queryset)
+    data = decode_cursor(cursor) if cursor else None
+    if data is not None and (
+        data.get("o") != fields or len(data.get("v") or []) != len(fields)
+    ):
+        data = None
+
+    backwards = data is not None and data["d"] == PREVIOUS
+    ordering = [_reverse_field(f) for f in fields] if backwards else fields
+    queryset = queryset.order_by(*ordering)
+    if data is not None:
+        nulls_largest = connections[queryset.db].features.nulls_order_largest
+        queryset = queryset.filter(
+            _keyset_filter(fields, data["v"], backwards, nulls_largest)
+        )
+
+    records = list(queryset[: per_page + 1])
+    has_more = len(records) > per_page
+    records = records[:per_page]
+    if backwards:
+        records.reverse()
+        has_next, has_previous = True, has_more
+    else:
+        has_next, has_previous = has_more, data is not None
+
+    next_cursor = previous_cursor = None
+    if records and has_next:
+        values = [_record_value(records[-1], field) for field in fields]
+        next_cursor = encode_cursor(fields, values, NEXT)
+    if records and has_previous:
+        values = [_record_value(records[0], field) for field in fields]
+        previous_cursor = encode_cursor(fields, values, PREVIOUS)
+
+    table.page = CursorPage(BoundRows(records, table), next_cursor, previous_cursor)
+    return table
@@ -0,0 +1,103 @@
+import logging
+
+from django.core.exceptions import FieldDoesNotExist
+
+logger = logging.getLogger(__name__)
+
+
+def get_column_paths(table_class):
+    """Devolver los accessors de las columnas de la tabla en formato ORM (a__b)."""
+    paths = []
+    for name, column in table_class.base_columns.items():
+        accessor = column.accessor or name
+        paths.append(str(accessor).replace(".", "__"))
+    return paths
+
+
+def plan_relations(model, paths):
+    """Calcular select_related, prefetch_related y only() para los paths dados.
+
+    Las relaciones a uno (FK, OneToOne) se resuelven con select_related
+    mientras no se haya pasado antes por una relación a muchos; desde ahí
+    en adelante el path completo va a prefetch_related.
+    Devuelve `(select, prefetch, only)`. `only` junta los campos concretos
+    alcanzados sin pasar por relaciones a muchos; los paths que no son
+    campos del modelo (columnas calculadas) se ignoran.
+    """
+    select, prefetch, only = set(), set(), set()
+    for path in paths:
+        current = model
+        prefix = []
+        to_many = False
+        for part in path.split("__"):
+            try:
+                field = current._meta.get_field(part)
+            except FieldDoesNotExist:
+                break
+            prefix.append(part)
+            if not field.is_relation or field.related_model is None:
+                if not to_many:
+                    only.add("__".join(prefix))
+                break
+
+            if field.many_to_many or field.one_to_many:
+                to_many = True
+            lookup = "__".join(prefix)
+            if to_many:
+                prefetch.add(lookup)
+            else:
+                select.add(lookup)
+                if field.concrete:
+                    only.add(lookup)
+            current = field.related_model
+    return select, prefetch, only
+
+
+def get_related_models(model, paths):
+    """Modelos relacionados que se leen para mostrar los paths dados.
+
+    Son los de las relaciones que `plan_relations` resuelve con
+    select_related o prefetch_related, sin repetir y sin `model`.
+    """
+    select, prefetch, _ = plan_relations(model, paths)
+    models = []
+    for lookup in sorted(select | prefetch):
+        current = model
+        for part in lookup.split("__"):
+            current = current._meta.get_field(part).related_model
+        if current is not model and current not in models:
+            models.append(current)
+    return models
+
+
+def optimize_queryset(queryset, paths, use_only=False):
+    """Aplicar al queryset las relaciones planificadas para `paths`."""
+    select, prefetch, only = plan_relations(queryset.model, paths)
+    if select:
+        queryset = queryset.select_related(*sorted(select))
+    if prefetch:
+        queryset = queryset.prefetch_related(*sorted(prefetch))
+    if use_only and only:
+        queryset = queryset.only(*sorted(only))
+    return queryset
+
+
+class QueryCounter:
+    """Contar las queries ejecutadas en una conexión dentro de un bloque with."""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.count = 0
+        self._wrapper = None
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self._wrapper = self.connection.execute_wrapper(self)
+        self._wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        return self._wrapper.__exit__(*exc_info)
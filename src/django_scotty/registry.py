@@ -0,0 +1,107 @@
+from typing import NamedTuple, Tuple
+
+from . import discovery
+
+URL_NAMES = {
+    discovery.LIST: "list-view-{slug}",
+    discovery.DETAIL: "detail-view-{slug}",
+}
+
+
+def get_url_name(kind, slug):
+    """Nombre de la URL de una vista; el mismo para add_urls, el manifiesto y las plantillas."""
+    return URL_NAMES[kind].format(slug=slug)
+
+
+class ActionMeta(NamedTuple):
+    """Una acción de la vista con sus flags, como la desempaquetan las plantillas."""
+
+    name: str
+    verbose_name: str
+    show_on_bulk: bool
+    show_confirm: bool
+
+
+class ViewMeta(NamedTuple):
+    """Lo que no cambia entre requests de una clase de vista.
+
+    Se arma al crear la clase (ver ViewMetaMixin) y los requests solo lo
+    leen: slug, nombre de la URL, acciones con sus flags y botones de la
+    línea de filtros.
+    """
+
+    kind: str
+    slug: str
+    url_name: str
+    actions: Tuple[ActionMeta, ...] = ()
+    filter_buttons: Tuple[str, ...] = ()
+
+    @property
+    def action_names(self):
+        return tuple(action.name for action in self.actions)
+
+
+def collect_actions(view, names):
+    """ActionMeta de las acciones de `names` que existen en `view` (clase o instancia)."""
+    actions = []
+    for name in names or ():
+        if not hasattr(view, name):
+            continue
+        action_method = getattr(view, name)
+        verbose_name = getattr(action_method, "verbose_name", None)
+        if verbose_name is None:
+            verbose_name = name.replace("_", " ").capitalize()
+        actions.append(
+            ActionMeta(
+                name,
+                verbose_name,
+                getattr(action_method, "show_on_bulk", True),
+                getattr(action_method, "show_confirm", False),
+            )
+        )
+    return tuple(actions)
+
+
+class ViewMetaMixin:
+    """Armar `scotty_meta` (un ViewMeta) una vez por clase, al definirla.
+
+    Si se cambian después los atributos de la clase (acciones, botones),
+    hay que volver a llamar a `refresh_scotty_meta()`. Los que se pasan a
+    `as_view()` quedan en la instancia y se respetan en ese request.
+    """
+
+    scotty_kind = discovery.LIST
+    scotty_meta = None
+    # Atributos de los que salen los botones de la línea de filtros
+    filter_button_attributes = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.refresh_scotty_meta()
+
+    @classmethod
+    def refresh_scotty_meta(cls):
+        cls.scotty_meta = cls.build_scotty_meta()
+
+    @classmethod
+    def build_scotty_meta(cls):
+        slug = cls.get_slugname()
+        return ViewMeta(
+            kind=cls.scotty_kind,
+            slug=slug,
+            url_name=get_url_name(cls.scotty_kind, slug),
+            actions=collect_actions(cls, getattr(cls, "available_action_names", None)),
+            filter_buttons=tuple(cls.get_filter_buttons()),
+        )
+
+    @classmethod
+    def get_filter_buttons(cls, view=None):
+        """Botones de la línea de filtros según los atributos de `view` (o de la clase)."""
+        return ()
+
+    @property
+    def filter_buttons(self):
+        """Los botones del ViewMeta, salvo que la instancia cambie sus atributos."""
+        if any(name in vars(self) for name in self.filter_button_attributes):
+            return tuple(self.get_filter_buttons(self))
+        return self.scotty_meta.filter_buttons
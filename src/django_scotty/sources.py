@@ -0,0 +1,285 @@
+import csv
+import heapq
+import itertools
+import json
+import logging
+import os
+
+from django.db import connections
+from django_tables2.data import TableData
+from django_tables2.utils import OrderBy, OrderByTuple
+
+logger = logging.getLogger(__name__)
+
+
+class DataSource:
+    """Origen de datos para DictTableView que no se materializa completo.
+
+    Un origen expone:
+
+    - `count()`: cantidad total de registros.
+    - `slice(offset, limit, order_by)`: solo los registros de una página.
+    - `iterator(order_by)`: todos los registros, de a uno (exportaciones).
+
+    `order_by` es una tupla de accessors de django_tables2, con "-" adelante
+    para orden descendente, por ejemplo `("-monto", "cliente.nombre")`.
+    """
+
+    verbose_name = "item"
+    verbose_name_plural = "items"
+
+    def count(self):
+        raise NotImplementedError
+
+    def slice(self, offset, limit, order_by=()):
+        raise NotImplementedError
+
+    def iterator(self, order_by=()):
+        raise NotImplementedError
+
+    def __iter__(self):
+        return self.iterator()
+
+    def __len__(self):
+        return self.count()
+
+
+class GeneratorSource(DataSource):
+    """Origen a partir de una función que devuelve un iterable nuevo cada vez.
+
+    Un generador se consume una sola vez, por eso se recibe la función que
+    lo crea (`factory`) y no el generador. Sin orden, una página se lee con
+    islice; con orden se usa heapq.nsmallest, que guarda en memoria solo
+    `offset + limit` registros. `count` puede ser un número o una función;
+    si no se pasa se recorre el iterable una vez y se guarda el resultado.
+    """
+
+    def __init__(self, factory, count=None):
+        self.factory = factory
+        self._count = count
+
+    def count(self):
+        if callable(self._count):
+            return self._count()
+        if self._count is None:
+            self._count = sum(1 for _ in self.factory())
+        return self._count
+
+    def slice(self, offset, limit, order_by=()):
+        if not order_by:
+            return list(itertools.islice(self.factory(), offset, offset + limit))
+        key = OrderByTuple(order_by).key
+        return heapq.nsmallest(offset + limit, self.factory(), key=key)[offset:]
+
+    def iterator(self, order_by=()):
+        if not order_by:
+            return iter(self.factory())
+        # Para recorrer todo ordenado no queda otra que ordenar todo
+        return iter(sorted(self.factory(), key=OrderByTuple(order_by).key))
+
+
+class _FileSource(GeneratorSource):
+    """Archivo leído de forma perezosa; el conteo se invalida si cambia el mtime."""
+
+    def __init__(self, path, encoding="utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self._mtime = None
+        super().__init__(self.read)
+
+    def count(self):
+        mtime = os.stat(self.path).st_mtime
+        if mtime != self._mtime:
+            self._mtime = mtime
+            self._count = None
+        return super().count()
+
+    def read(self):
+        raise NotImplementedError
+
+
+class CSVSource(_FileSource):
+    """Archivo CSV con cabecera; cada fila es un dict."""
+
+    def __init__(self, path, encoding="utf-8", **reader_kwargs):
+        self.reader_kwargs = reader_kwargs
+        super().__init__(path, encoding=encoding)
+
+    def read(self):
+        with open(self.path, newline="", encoding=self.encoding) as csv_file:
+            yield from csv.DictReader(csv_file, **self.reader_kwargs)
+
+
+class JSONSource(_FileSource):
+    """Archivo JSON Lines (un objeto por línea) o JSON con una lista de objetos.
+
+    JSON Lines se lee línea por línea. Una lista JSON no se puede leer de a
+    partes, así que se carga recién en el primer uso y se conserva mientras
+    el archivo no cambie.
+    """
+
+    def __init__(self, path, encoding="utf-8", lines=None):
+        if lines is None:
+            lines = path.endswith((".jsonl", ".ndjson"))
+        self.lines = lines
+        self._loaded = None
+        self._loaded_mtime = None
+        super().__init__(path, encoding=encoding)
+
+    def read(self):
+        if self.lines:
+            with open(self.path, encoding=self.encoding) as json_file:
+                for line in json_file:
+                    if line.strip():
+                        yield json.loads(line)
+            return
+
+        mtime = os.stat(self.path).st_mtime
+        if self._loaded is None or mtime != self._loaded_mtime:
+            with open(self.path, encoding=self.encoding) as json_file:
+                self._loaded = json.load(json_file)
+            self._loaded_mtime = mtime
+        yield from self._loaded
+
+
+class SQLSource(DataSource):
+    """Consulta SQL cruda; COUNT, ORDER BY y LIMIT/OFFSET los resuelve la base.
+
+    Solo se ordena por columnas que devuelve la consulta; cualquier otro
+    accessor se ignora, así el orden pedido por el usuario nunca llega al SQL
+    sin validar. Las exportaciones leen con `fetchmany` de a `chunk_size`.
+    """
+
+    def __init__(self, sql, params=None, using="default", chunk_size=2000):
+        self.sql = sql
+        self.params = params or ()
+        self.using = using
+        self.chunk_size = chunk_size
+        self._columns = None
+
+    @property
+    def connection(self):
+        return connections[self.using]
+
+    def columns(self):
+        if self._columns is None:
+            with self.connection.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT * FROM ({self.sql}) scotty_source WHERE 1 = 0",
+                    self.params,
+                )
+                self._columns = [column[0] for column in cursor.description]
+        return self._columns
+
+    def _order_clause(self, order_by):
+        columns = set(self.columns())
+        quote_name = self.connection.ops.quote_name
+        terms = []
+        for alias in order_by:
+            order = OrderBy(alias)
+            if order.bare not in columns:
+                logger.warning(
+                    f"[SCOTTY SOURCE] Columna de orden desconocida {order.bare}"
+                )
+                continue
+            direction = "DESC" if order.is_descending else "ASC"
+            terms.append(f"{quote_name(order.bare)} {direction}")
+        return f" ORDER BY {', '.join(terms)}" if terms else ""
+
+    def _fetch(self, sql, params):
+        with self.connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            columns = [column[0] for column in cursor.description]
+            while rows := cursor.fetchmany(self.chunk_size):
+                for row in rows:
+                    yield dict(zip(columns, row))
+
+    def count(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT COUNT(*) FROM ({self.sql}) scotty_source", self.params
+            )
+            return cursor.fetchone()[0]
+
+    def slice(self, offset, limit, order_by=()):
+        sql = (
+            f"SELECT * FROM ({self.sql}) scotty_source"
+            f"{self._order_clause(order_by)} LIMIT %s OFFSET %s"
+        )
+        return list(self._fetch(sql, (*self.params, limit, offset)))
+
+    def iterator(self, order_by=()):
+        sql = f"SELECT * FROM ({self.sql}) scotty_source{self._order_clause(order_by)}"
+        return self._fetch(sql, self.params)
+
+
+class TableSourceData(TableData):
+    """TableData de django_tables2 sobre un DataSource.
+
+    El paginador pide el largo y la página con un slice; solo esa página se
+    materializa. Ordenar no toca los datos, guarda los accessors para
+    pasárselos al origen.
+    """
+
+    def __init__(self, data):
+        super().__init__(data)
+        self._order_by = ()
+        self._length = None
+        self._pages = {}
+
+    def __len__(self):
+        if self._length is None:
+            self._length = self.data.count()
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            limit = max(stop - start, 0)
+            records = self._pages.pop((start, limit, self._order_by), None)
+            if records is None:
+                records = self.data.slice(start, limit, self._order_by)
+            return records[::step] if step != 1 else records
+        if key < 0:
+            key += len(self)
+        records = self.data.slice(key, 1, self._order_by)
+        if not records:
+            raise IndexError(key)
+        return records[0]
+
+    def __iter__(self):
+        return iter(self.data.iterator(self._order_by))
+
+    def prime(self, length=None, offset=None, records=None, order_by=()):
+        """Dejar el largo y una página ya consultados (por ejemplo en paralelo).
+
+        La página se usa si el paginador pide justo ese slice con ese orden.
+        """
+        if length is not None:
+            self._length = length
+        if records is not None:
+            # La última página puede traer menos registros que los pedidos
+            self._pages[(offset, len(records), tuple(order_by))] = records
+
+    def iterator(self, chunk_size=None):
+        """Recorrido completo en el orden de la tabla, para exportar."""
+        return iter(self)
+
+    @property
+    def verbose_name(self):
+        return self.data.verbose_name
+
+    @property
+    def verbose_name_plural(self):
+        return self.data.verbose_name_plural
+
+    def order_by(self, aliases):
+        """Traducir los alias de la tabla a accessors, como TableListData."""
+        accessors = []
+        for alias in aliases:
+            bound_column = self.table.columns[OrderBy(alias).bare]
+            if alias[0] != bound_column.order_by_alias[0]:
+                accessors += bound_column.order_by.opposite
+            else:
+                accessors += bound_column.order_by
+        self._order_by = tuple(accessors)
@@ -0,0 +1,38 @@
+from django import template
+
+from django_scotty.fragments import get_or_render
+
+register = template.Library()
+
+
+class CacheTableNode(template.Node):
+    def __init__(self, nodelist, table):
+        self.nodelist = nodelist
+        self.table = table
+
+    def render(self, context):
+        table = self.table.resolve(context)
+        key = getattr(table, "fragment_cache_key", None)
+        if key is None:
+            return self.nodelist.render(context)
+        return get_or_render(
+            key,
+            lambda: self.nodelist.render(context),
+            getattr(table, "unique_id", ""),
+            timeout=table.fragment_cache_timeout,
+        )
+
+
+@register.tag
+def cache_table(parser, token):
+    """
+    Cachea el HTML de la tabla si la vista le asignó `fragment_cache_key`.
+
+    {% cache_table table %}{% render_table table %}{% endcache_table %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 2:
+        raise template.TemplateSyntaxError(f"'{bits[0]}' recibe la tabla")
+    nodelist = parser.parse(("endcache_table",))
+    parser.delete_first_token()
+    return CacheTableNode(nodelist, parser.compile_filter(bits[1]))
@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from .testapp.models import Pedido
+from .testapp.views import AccionesPedidoView
+from .utils import crear_pedidos
+
+CONFIRM = 'hx-confirm="¿Está seguro que desea realizar esta acción?"'
+
+
+def html_por_fila(table, record):
+    """El HTML de las acciones armado fila por fila, como antes de precompilarlo."""
+    url = reverse(table.url_action_method)
+    view, request = table.view, table.request
+    if len(table.action_columns) == 1:
+        accion = table.action_columns[0]
+        accion_method = getattr(view, accion[0])
+        if not accion_method.condition(record, request):
+            return ""
+        confirm_attr = CONFIRM if getattr(accion_method, "show_confirm", False) else ""
+        return f"""<button hx-post=\"{url}?pk={record.pk}&action={accion[0]}\"
+                    hx-trigger=\"click\"
+                    hx-swap=\"outerHTML\"
+                    class=\"btn btn-primary\"
+                    hx-indicator=\"#spinner-load\"
+                    type=\"btn\"
+                    {confirm_attr}>{accion[1]}</button>"""
+
+    rendered_actions = ""
+    for accion in table.action_columns:
+        accion_method = getattr(view, accion[0])
+        if not accion_method.condition(record, request):
+            continue
+        confirm_attr = CONFIRM if getattr(accion_method, "show_confirm", False) else ""
+        rendered_actions += f"""<li>
+                    <a hx-post=\"{url}?pk={record.pk}&action={accion[0]}\"
+                    hx-trigger=\"click\"
+                    hx-swap=\"outerHTML\"
+                    hx-indicator=\"#spinner-load\"
+                    class=\"dropdown-item\"
+                    {confirm_attr}>{accion[1]}</a>
+                    </li>"""
+    return f"""
+                            <div class="btn-group">
+                            <button type="button"
+                            class="btn btn-primary dropdown-toggle"
+                            data-bs-toggle="dropdown" aria-expanded="false">
+                                Acciones
+                            </button>
+                            <ul class="dropdown-menu">
+                                {rendered_actions}
+                            </ul>
+                            </div>"""
+
+
+class RowActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        pedidos = crear_pedidos(6)
+        Pedido.objects.filter(pk__in=[p.pk for p in pedidos[::2]]).update(
+            estado=Pedido.ARCHIVADO
+        )
+
+    def tabla(self, path):
+        return self.client.get(path).context["table"]
+
+    def assertIgualPorFila(self, table):
+        for row in table.paginated_rows:
+            with self.subTest(pk=row.record.pk):
+                self.assertEqual(
+                    table.render_acciones(row.record), html_por_fila(table, row.record)
+                )
+
+    def test_single_action_matches_per_row_html(self):
+        table = self.tabla("/pedido/")
+        self.assertIgualPorFila(table)
+        # La condición deja sin botón a los archivados
+        rendered = [table.render_acciones(row.record) for row in table.paginated_rows]
+        self.assertEqual(rendered.count(""), 3)
+
+    def test_grouped_actions_match_per_row_html(self):
+        self.assertIgualPorFila(self.tabla("/accionespedido/"))
+
+    def test_condition_many_runs_once_per_render(self):
+        condition_many = mock.Mock(wraps=AccionesPedidoView.reabrir.condition_many)
+        with mock.patch.object(
+            AccionesPedidoView.reabrir, "condition_many", condition_many
+        ):
+            response = self.client.get("/accionespedido/")
+        condition_many.assert_called_once()
+        self.assertContains(response, "action=reabrir", count=3)
+
+    def test_failing_condition_many_falls_back_to_condition(self):
+        with mock.patch.object(
+            AccionesPedidoView.reabrir,
+            "condition_many",
+            mock.Mock(side_effect=RuntimeError),
+        ), self.assertLogs(level="ERROR"):
+            table = self.tabla("/accionespedido/")
+            self.assertIgualPorFila(table)
@@ -0,0 +1,192 @@
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.test import TestCase, override_settings
+
+from django_scotty import admission
+
+from .testapp.views import PedidoView
+from .utils import crear_pedidos
+
+HTMX = {"HTTP_HX_REQUEST": "true"}
+
+
+class ExportAdmissionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(5)
+
+    def setUp(self):
+        cache.clear()
+        self.events = []
+        admission.export_admission.connect(self.recibir)
+        self.addCleanup(admission.export_admission.disconnect, self.recibir)
+
+    def recibir(self, sender, **kwargs):
+        self.events.append((kwargs["outcome"], kwargs["reason"]))
+
+    def limitar(self, view=PedidoView, **attrs):
+        for name, value in attrs.items():
+            patcher = mock.patch.object(view, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def canjear(self, response):
+        """Seguir el HX-Redirect de la respuesta htmx como lo hace el navegador."""
+        return self.client.get(response["HX-Redirect"])
+
+    def test_too_many_rows_renders_page_without_htmx(self):
+        self.limitar(export_max_rows=3)
+        response = self.client.get("/pedido/", {"estado": "n", "_export": "xlsx"})
+        self.assertEqual(response.status_code, 422)
+        self.assertTemplateUsed(response, "django_tables2/export_rejected_page.html")
+        self.assertContains(response, "máximo de 3", status_code=422)
+        self.assertEqual(response.context["back_url"], "/pedido/?estado=n")
+        self.assertEqual(self.events, [(admission.REJECTED, admission.TOO_MANY_ROWS)])
+
+    def test_too_many_rows_renders_fragment_with_htmx(self):
+        self.limitar(export_max_rows=3)
+        response = self.client.get("/pedido/", {"_export": "xlsx"}, **HTMX)
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateNotUsed(response, "django_tables2/export_rejected_page.html")
+        self.assertIn(admission.CLIENT_EVENT, response["HX-Trigger"])
+        self.assertNotIn("HX-Redirect", response)
+
+    def test_htmx_export_redirects_to_single_use_ticket(self):
+        response = self.client.get("/pedido/", {"estado": "n", "_export": "xlsx"}, **HTMX)
+        query = parse_qs(urlsplit(response["HX-Redirect"]).query)
+        self.assertEqual(query["_export"], ["xlsx"])
+        self.assertEqual(query["estado"], ["n"])
+        self.assertIn("_export_ticket", query)
+
+        download = self.canjear(response)
+        self.assertEqual(download.status_code, 200)
+        self.assertIn("attachment", download["Content-Disposition"])
+        # Canjeado, el ticket ya no saltea los controles
+        self.limitar(export_max_rows=3)
+        self.assertEqual(self.canjear(response).status_code, 422)
+
+    def test_ticket_only_valid_for_its_query(self):
+        response = self.client.get("/pedido/", {"estado": "a", "_export": "xlsx"}, **HTMX)
+        self.limitar(export_max_rows=3)
+        token = parse_qs(urlsplit(response["HX-Redirect"]).query)["_export_ticket"][0]
+        other = self.client.get(
+            "/pedido/", {"estado": "n", "_export": "xlsx", "_export_ticket": token}
+        )
+        self.assertEqual(other.status_code, 422)
+
+    def test_xlsx_downgraded_to_csv(self):
+        self.limitar(export_xlsx_max_rows=3)
+        response = self.client.get("/pedido/", {"_export": "xlsx"}, **HTMX)
+        self.assertEqual(parse_qs(urlsplit(response["HX-Redirect"]).query)["_export"], ["csv"])
+        self.assertIn(admission.DOWNGRADED, response["HX-Trigger"])
+        self.assertEqual(self.events, [(admission.DOWNGRADED, admission.XLSX_TOO_LARGE)])
+
+        download = self.canjear(response)
+        self.assertTrue(download.streaming)
+        content = b"".join(download.streaming_content).decode()
+        self.assertEqual(len(content.strip().splitlines()), 6)
+        # El cambio de formato se registra una sola vez
+        self.assertEqual(len(self.events), 1)
+
+    def test_rate_limit(self):
+        self.limitar(export_rate_limit=(1, 60))
+        self.assertEqual(self.client.get("/pedido/", {"_export": "xlsx"}).status_code, 200)
+        response = self.client.get("/pedido/", {"_export": "xlsx"})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response["Retry-After"]) > 0)
+        self.assertEqual(
+            admission.get_export_admission_stats()[admission.RATE_LIMITED], 1
+        )
+
+    @override_settings(SCOTTY_EXPORT_MAX_CONCURRENT=1)
+    def test_busy_when_no_slot(self):
+        slot = admission.acquire_export_slot()
+        self.addCleanup(slot.release)
+        response = self.client.get("/pedido/", {"_export": "xlsx"})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.events, [(admission.REJECTED, admission.BUSY)])
+        # El preflight htmx tampoco da ticket
+        response = self.client.get("/pedido/", {"_export": "xlsx"}, **HTMX)
+        self.assertNotIn("HX-Redirect", response)
+
+    @override_settings(SCOTTY_EXPORT_MAX_CONCURRENT=1)
+    def test_streaming_export_releases_slot(self):
+        response = self.client.get("/streamingpedido/", {"_export": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertIsNone(admission.acquire_export_slot())
+        b"".join(response.streaming_content)
+        slot = admission.acquire_export_slot()
+        self.assertIsNotNone(slot)
+        slot.release()
+
+    @override_settings(SCOTTY_EXPORT_MAX_CONCURRENT=1)
+    def test_closing_unread_stream_releases_slot(self):
+        response = self.client.get("/streamingpedido/", {"_export": "csv"})
+        self.assertIsNone(admission.acquire_export_slot())
+        response.close()
+        slot = admission.acquire_export_slot()
+        self.assertIsNotNone(slot)
+        slot.release()
+
+    def test_releasing_content_releases_once_on_error(self):
+        release = mock.Mock()
+
+        def content():
+            yield b"a"
+            raise RuntimeError
+
+        wrapped = admission.ReleasingContent(content(), release)
+        self.assertEqual(next(wrapped), b"a")
+        with self.assertRaises(RuntimeError):
+            next(wrapped)
+        release.assert_called_once()
+
+    def test_async_stream_stays_async_and_releases(self):
+        release = mock.Mock()
+
+        async def content():
+            yield b"a"
+            yield b"b"
+
+        response = admission.release_after_streaming(
+            StreamingHttpResponse(content()), release
+        )
+        self.assertTrue(response.is_async)
+
+        async def leer():
+            return b"".join([part async for part in response.streaming_content])
+
+        self.assertEqual(async_to_sync(leer)(), b"ab")
+        release.assert_called_once()
+
+
+class ExportButtonTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(1)
+
+    def test_plain_button_without_limits(self):
+        response = self.client.get("/streamingpedido/")
+        self.assertFalse(response.context["export_admission"])
+        self.assertContains(response, 'onclick="exportXLSX(this)"')
+        self.assertNotContains(response, """hx-vals='{"_export": "xlsx"}'""")
+
+    def test_htmx_button_with_a_limit(self):
+        for attr, value in (
+            ("export_rate_limit", (5, 60)),
+            ("export_max_rows", 100),
+            ("export_xlsx_max_rows", 100),
+        ):
+            with self.subTest(attr=attr), mock.patch.object(PedidoView, attr, value):
+                response = self.client.get("/streamingpedido/")
+                self.assertTrue(response.context["export_admission"])
+                self.assertContains(response, """hx-vals='{"_export": "xlsx"}'""")
+
+    @override_settings(SCOTTY_EXPORT_MAX_CONCURRENT=2)
+    def test_htmx_button_with_concurrency_setting(self):
+        response = self.client.get("/streamingpedido/")
+        self.assertTrue(response.context["export_admission"])
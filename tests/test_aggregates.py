@@ -0,0 +1,21 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, override_settings
+from django.utils import translation
+
+from django_scotty.aggregates import format_cell
+
+
+@override_settings(USE_THOUSAND_SEPARATOR=True)
+class FormatCellTests(SimpleTestCase):
+    def test_single_and_multiple_values_localized_alike(self):
+        with translation.override("de"):
+            self.assertEqual(format_cell({"sum": Decimal("1234.5")}), "1.234,5")
+            self.assertEqual(
+                format_cell({"sum": Decimal("1234.5"), "max": 2000}),
+                "Total: 1.234,5 · Máximo: 2.000",
+            )
+
+    def test_empty_values(self):
+        self.assertEqual(format_cell({}), "")
+        self.assertEqual(format_cell({"sum": None}), "")
@@ -0,0 +1,103 @@
+import csv
+import io
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncClient, TransactionTestCase
+
+from .testapp.models import Pedido
+from .testapp.views import VENTAS
+from .utils import crear_pedidos
+
+
+async def leer(response):
+    """Contenido de una respuesta en streaming async, como lo lee el servidor."""
+    return b"".join([part async for part in response.streaming_content]).decode()
+
+
+def pks_de_pagina(response):
+    return [row.record.pk for row in response.context["table"].paginated_rows]
+
+
+# Las consultas corren en threads con su propia conexión: sin transacción por test
+class AsyncCottonTableViewTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.pedidos = crear_pedidos(25)
+        self.async_client = AsyncClient()
+
+    async def test_same_page_as_sync_view(self):
+        for query in ({}, {"page": "2"}, {"sort": "-monto"}, {"estado": "n", "page": "3"}):
+            with self.subTest(query=query):
+                response = await self.async_client.get("/asyncpedido/", query)
+                expected = await self.sync_get("/pedido/", query)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(pks_de_pagina(response), pks_de_pagina(expected))
+                self.assertEqual(
+                    response.context["table"].paginator.count,
+                    expected.context["table"].paginator.count,
+                )
+
+    async def sync_get(self, path, query):
+        return await sync_to_async(self.client.get)(path, query)
+
+    async def test_page_rows_come_from_prefetch(self):
+        response = await self.async_client.get("/asyncpedido/", {"page": "2"})
+        rows = response.context["table"].paginated_rows
+        # Las filas adelantadas: una lista, no el QuerySet de la página
+        self.assertIsInstance(rows.data, list)
+        self.assertEqual(len(rows), 10)
+
+    async def test_out_of_range_page_redirects(self):
+        response = await self.async_client.get("/asyncpedido/", {"page": "9"})
+        self.assertEqual(response.status_code, 302)
+
+    async def test_async_action(self):
+        pk = self.pedidos[0].pk
+        response = await self.async_client.post(
+            f"/asyncpedido/?action=archivar&pk={pk}"
+        )
+        self.assertEqual(response.status_code, 302)
+        pedido = await Pedido.objects.aget(pk=pk)
+        self.assertEqual(pedido.estado, Pedido.ARCHIVADO)
+        self.assertEqual(
+            await Pedido.objects.filter(estado=Pedido.ARCHIVADO).acount(), 1
+        )
+
+    async def test_async_action_on_filtered_queryset(self):
+        response = await self.async_client.post(
+            "/asyncpedido/", {"action": "archivar", "filter_query_string": "estado=n"}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(
+            await Pedido.objects.filter(estado=Pedido.ARCHIVADO).acount(), 25
+        )
+
+    async def test_streaming_export(self):
+        response = await self.async_client.get("/asyncpedido/", {"_export": "csv"})
+        self.assertTrue(response.streaming)
+        self.assertTrue(response.is_async)
+        self.assertIn("attachment", response["Content-Disposition"])
+        rows = list(csv.reader(io.StringIO(await leer(response))))
+        self.assertEqual(len(rows), 26)
+
+
+class AsyncDictTableViewTests(TransactionTestCase):
+    def setUp(self):
+        self.async_client = AsyncClient()
+
+    async def test_page_and_count(self):
+        response = await self.async_client.get(
+            "/asyncventas/", {"sort": "-total", "page": "2"}
+        )
+        self.assertEqual(response.status_code, 200)
+        table = response.context["table"]
+        self.assertEqual(table.paginator.count, len(VENTAS))
+        expected = sorted(VENTAS, key=lambda venta: -venta["total"])[10:20]
+        self.assertEqual([row.record for row in table.paginated_rows], expected)
+
+    async def test_streaming_export(self):
+        response = await self.async_client.get("/asyncventas/", {"_export": "csv"})
+        self.assertTrue(response.is_async)
+        rows = list(csv.reader(io.StringIO(await leer(response))))
+        self.assertEqual(len(rows), len(VENTAS) + 1)
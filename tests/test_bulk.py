@@ -0,0 +1,131 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.test import RequestFactory, TestCase
+
+from django_scotty.bulk import BulkRun, run_bulk_action, run_chunked_action
+
+from .testapp.models import Pedido
+from .testapp.views import PedidoView
+from .utils import crear_pedidos
+
+
+@mock.patch.object(PedidoView, "bulk_time_budget", 0)
+@mock.patch.object(PedidoView, "bulk_chunk_size", 2)
+class FilteredBulkActionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        crear_pedidos(5)
+
+    def archivar(self, **headers):
+        return self.client.post(
+            "/pedido/", {"action": "archivar", "filter_query_string": ""}, **headers
+        )
+
+    def archivados(self):
+        return Pedido.objects.filter(estado=Pedido.ARCHIVADO).count()
+
+    def test_plain_post_ignores_time_budget(self):
+        response = self.archivar()
+        self.assertRedirects(response, "/pedido/", fetch_redirect_response=False)
+        self.assertEqual(self.archivados(), 5)
+
+    def test_htmx_post_stops_at_time_budget(self):
+        response = self.archivar(HTTP_HX_REQUEST="true")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.archivados(), 2)
+        self.assertFalse(response.context["run"].done)
+        # Repetir el pedido retoma desde el checkpoint
+        self.archivar(HTTP_HX_REQUEST="true")
+        self.assertEqual(self.archivados(), 4)
+
+
+def archivar_queryset(queryset, request):
+    return queryset.update(estado=Pedido.ARCHIVADO)
+
+
+def crear_accion(**attrs):
+    def accion(obj):
+        raise AssertionError("No debería correr objeto por objeto")
+
+    accion.bulk = archivar_queryset
+    for name, value in attrs.items():
+        setattr(accion, name, value)
+    return accion
+
+
+class SetBasedBulkActionTests(TestCase):
+    def setUp(self):
+        self.pedidos = crear_pedidos(5)
+        self.request = RequestFactory().post("/pedido/")
+        Pedido.objects.filter(pk__in=[p.pk for p in self.pedidos[:2]]).update(prioridad=1)
+
+    def archivados(self):
+        return set(
+            Pedido.objects.filter(estado=Pedido.ARCHIVADO).values_list("pk", flat=True)
+        )
+
+    def test_single_update(self):
+        results = run_bulk_action(crear_accion(), Pedido.objects.all(), self.request)
+        self.assertEqual(results, [5])
+        self.assertEqual(len(self.archivados()), 5)
+
+    def test_batches(self):
+        bulk = mock.Mock(side_effect=archivar_queryset)
+        results = run_bulk_action(
+            crear_accion(bulk=bulk), Pedido.objects.all(), self.request, batch_size=2
+        )
+        self.assertEqual(results, [2, 2, 1])
+        self.assertEqual(bulk.call_count, 3)
+
+    def test_bulk_condition_q(self):
+        accion = crear_accion(bulk_condition=Q(prioridad=1))
+        run_bulk_action(accion, Pedido.objects.all(), self.request, batch_size=2)
+        self.assertEqual(self.archivados(), {p.pk for p in self.pedidos[:2]})
+
+    def test_bulk_condition_callable(self):
+        accion = crear_accion(
+            bulk_condition=lambda request: Q(prioridad__isnull=request.method == "POST")
+        )
+        run_bulk_action(accion, Pedido.objects.all(), self.request)
+        self.assertEqual(self.archivados(), {p.pk for p in self.pedidos[2:]})
+
+    def test_error_rolls_back_every_batch(self):
+        calls = []
+
+        def bulk(queryset, request):
+            calls.append(archivar_queryset(queryset, request))
+            if len(calls) == 2:
+                raise RuntimeError
+
+        with self.assertRaises(RuntimeError):
+            run_bulk_action(
+                crear_accion(bulk=bulk), Pedido.objects.all(), self.request, batch_size=2
+            )
+        self.assertEqual(calls, [2, 2])
+        self.assertEqual(self.archivados(), set())
+
+    def test_condition_without_bulk_condition(self):
+        accion = crear_accion(condition=lambda obj, request: obj.prioridad == 1)
+        with self.assertRaises(ImproperlyConfigured):
+            run_bulk_action(accion, Pedido.objects.all(), self.request)
+        run = BulkRun("test", "accion", 60)
+        with self.assertRaises(ImproperlyConfigured):
+            run_chunked_action(accion, Pedido.objects.all(), self.request, run, 2)
+        self.assertEqual(run.failed, 0)
+        self.assertEqual(self.archivados(), set())
+
+    def test_post_selected_rows_uses_bulk(self):
+        bulk = mock.Mock(side_effect=archivar_queryset)
+        with mock.patch.multiple(
+            PedidoView.archivar, create=True, bulk=bulk, bulk_condition=Q()
+        ):
+            response = self.client.post(
+                "/pedido/",
+                {"action": "archivar", "seleccionar": [p.pk for p in self.pedidos[:3]]},
+            )
+        self.assertEqual(response.status_code, 302)
+        bulk.assert_called_once()
+        self.assertEqual(self.archivados(), {p.pk for p in self.pedidos[:3]})
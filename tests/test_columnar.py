@@ -0,0 +1,109 @@
+import math
+from array import array
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from django_scotty import columnar
+from django_scotty.columnar import INT_MAX, INT_MIN, ColumnarData
+
+
+def sin_numpy():
+    return mock.patch.object(columnar, "numpy", None)
+
+
+class ColumnTypeTests(SimpleTestCase):
+    def columna(self, values):
+        return ColumnarData.from_records({"v": value} for value in values).columns["v"]
+
+    def test_ints_and_floats_keep_their_values(self):
+        for values in ([100, 1.5], [1.5, 100], [2**53 + 1, 0.5]):
+            with self.subTest(values=values):
+                column = self.columna(values)
+                self.assertEqual(list(column), values)
+                self.assertEqual([type(v) for v in column], [type(v) for v in values])
+
+    def test_int_column_is_a_typed_array(self):
+        column = self.columna([1, 2, INT_MAX, INT_MIN])
+        self.assertIsInstance(column, array)
+        self.assertEqual(column.typecode, "q")
+
+    def test_float_column_is_a_typed_array(self):
+        column = self.columna([1.5, 2.25])
+        self.assertIsInstance(column, array)
+        self.assertEqual(column.typecode, "d")
+
+    def test_other_values_fall_back_to_list(self):
+        for values in ([1, None], [1, "a"], [True, 1], [2**64, 1]):
+            with self.subTest(values=values):
+                column = self.columna(values)
+                self.assertIsInstance(column, list)
+                self.assertEqual(column, values)
+
+    def test_record_round_trip(self):
+        records = [{"a": 1, "b": "x"}, {"a": 2.5, "b": None}]
+        data = ColumnarData.from_records(records)
+        self.assertEqual([data.record(i) for i in range(len(data))], records)
+
+    def test_columns_are_union_of_keys(self):
+        records = [{"a": 1}, {"a": 2, "b": "x"}, {"c": 1.5}]
+        data = ColumnarData.from_records(iter(records))
+        self.assertEqual(data.names(), ["a", "b", "c"])
+        self.assertEqual(
+            [data.record(i) for i in range(len(data))],
+            [
+                {"a": 1, "b": None, "c": None},
+                {"a": 2, "b": "x", "c": None},
+                {"a": None, "b": None, "c": 1.5},
+            ],
+        )
+
+    def test_explicit_names(self):
+        data = ColumnarData.from_records([{"a": 1, "b": 2}], names=["b", "z"])
+        self.assertEqual(data.record(0), {"b": 2, "z": None})
+
+
+class ArgsortTests(SimpleTestCase):
+    def ordenar(self, values, descending):
+        data = ColumnarData.from_records({"v": value} for value in values)
+        resultados = [list(data.argsort([("v", descending)]))]
+        with sin_numpy():
+            resultados.append(list(data.argsort([("v", descending)])))
+        return resultados
+
+    def assertMismoOrden(self, values, descending, expected):
+        con_numpy, sin = self.ordenar(values, descending)
+        self.assertEqual(con_numpy, expected)
+        self.assertEqual(sin, expected)
+
+    def test_descending_with_int_min(self):
+        values = [0, INT_MIN, INT_MAX, -1]
+        self.assertMismoOrden(values, True, [2, 0, 3, 1])
+        self.assertMismoOrden(values, False, [1, 3, 0, 2])
+
+    def test_ties_keep_previous_order(self):
+        values = [2, 1, 2, 1, 2]
+        self.assertMismoOrden(values, True, [0, 2, 4, 1, 3])
+        self.assertMismoOrden(values, False, [1, 3, 0, 2, 4])
+
+    def test_nan_sorts_like_none(self):
+        values = [1.5, math.nan, 0.5, math.nan]
+        self.assertMismoOrden(values, False, [2, 0, 1, 3])
+        self.assertMismoOrden(values, True, [1, 3, 0, 2])
+
+    def test_none_last_ascending_first_descending(self):
+        values = [3, None, 1, None]
+        self.assertMismoOrden(values, False, [2, 0, 1, 3])
+        self.assertMismoOrden(values, True, [1, 3, 0, 2])
+
+    def test_multiple_keys(self):
+        data = ColumnarData.from_records(
+            [{"a": 1, "b": "y"}, {"a": 2, "b": "x"}, {"a": 1, "b": "x"}]
+        )
+        self.assertEqual(list(data.argsort([("b", False), ("a", True)])), [1, 2, 0])
+
+    def test_argsort_over_subset_index(self):
+        data = ColumnarData.from_records({"v": v} for v in [5, 3, 4, 1])
+        index = array("q", [0, 2, 3])
+        self.assertEqual(list(data.argsort([("v", True)], index)), [0, 2, 3])
+        self.assertEqual(list(data.argsort([("v", False)], index)), [3, 2, 0])
@@ -0,0 +1,58 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_scotty import counts
+
+from .testapp.models import Pedido
+from .utils import crear_pedidos
+
+
+class CachedCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        pedidos = crear_pedidos(5)
+        Pedido.objects.filter(pk__in=[p.pk for p in pedidos[:2]]).update(
+            estado=Pedido.ARCHIVADO
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_key_scoped_by_queryset(self):
+        self.assertEqual(counts.cached_count(Pedido.objects.all(), 60), 5)
+        archivados = Pedido.objects.filter(estado=Pedido.ARCHIVADO)
+        self.assertEqual(counts.cached_count(archivados, 60), 2)
+        self.assertEqual(counts.cached_count(Pedido.objects.all(), 60), 5)
+
+    def test_cached_until_model_changes(self):
+        queryset = Pedido.objects.all()
+        self.assertEqual(counts.cached_count(queryset, 60), 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(counts.cached_count(queryset, 60), 5)
+        Pedido.objects.first().delete()
+        self.assertEqual(counts.cached_count(queryset, 60), 4)
+
+    def test_empty_queryset(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(counts.cached_count(Pedido.objects.none(), 60), 0)
+
+
+class PageCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(15)
+
+    def test_filtered_count_runs_once(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get("/pedido/", {"estado": "n", "page": "2"})
+        table = response.context["table"]
+        self.assertEqual(table.paginator.count, 15)
+        self.assertEqual(len(table.rows), 15)
+        filtered_counts = [
+            query["sql"]
+            for query in captured.captured_queries
+            if "COUNT(" in query["sql"] and "estado" in query["sql"]
+        ]
+        self.assertEqual(len(filtered_counts), 1)
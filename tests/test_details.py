@@ -0,0 +1,42 @@
+from django.test import RequestFactory, TestCase
+
+from django_scotty import details
+from django_scotty.helpers import GenericDetailView
+
+from .testapp.models import Pedido
+from .utils import crear_pedidos
+
+
+class PedidoDetailView(GenericDetailView):
+    model = Pedido
+
+
+def detalle(pk, **initkwargs):
+    request = RequestFactory().get(f"/pedido/{pk}/")
+    return PedidoDetailView.as_view(**initkwargs)(request, pk=pk)
+
+
+class FieldPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pedido = crear_pedidos(1)[0]
+
+    def labels(self, response):
+        return [field["label"] for field in response.context_data["field_list"]]
+
+    def test_plan_fields_and_query(self):
+        plan = details.get_field_plan(PedidoDetailView, Pedido)
+        self.assertEqual(plan.field_names, ("cliente", "estado", "monto", "prioridad", "nota", "creado"))
+        self.assertEqual(plan.select_related, ("cliente",))
+        self.assertIs(details.get_field_plan(PedidoDetailView, Pedido), plan)
+        with self.assertNumQueries(1):
+            response = detalle(self.pedido.pk)
+            response.render()
+        self.assertEqual(self.labels(response), ["Cliente", "Estado", "Monto", "Prioridad", "Nota", "Creado"])
+
+    def test_as_view_exclude_fields(self):
+        response = detalle(self.pedido.pk, exclude_fields=["id", "monto"])
+        self.assertEqual(self.labels(response), ["Cliente", "Estado", "Prioridad", "Nota", "Creado"])
+        self.assertNotIn("monto", response.context_data["object"].__dict__)
+        # La clase sigue con su propio plan
+        self.assertIn("Monto", self.labels(detalle(self.pedido.pk)))
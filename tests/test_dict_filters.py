@@ -0,0 +1,139 @@
+import datetime
+import warnings
+from decimal import Decimal
+from unittest import mock
+
+import django_filters
+from django.test import TestCase
+from django.utils import timezone
+
+from django_scotty.columnar import ColumnarData
+from django_scotty.dict_filters import ColumnarQuerySet, DictFilterSet
+
+from .testapp.models import Pedido
+from .utils import crear_pedidos
+
+CAMPOS = ["id", "estado", "monto", "prioridad", "nota", "creado"]
+NOTAS = ["Rojo", "rojizo", "Azul", "", "ROJO oscuro", "verde"]
+
+
+def declarar_filtros():
+    """Los mismos filtros para el FilterSet del modelo y el de diccionarios."""
+    return {
+        "estado": django_filters.ChoiceFilter(choices=Pedido.ESTADOS),
+        "nota": django_filters.CharFilter(lookup_expr="icontains"),
+        "prioridades": django_filters.BaseInFilter(field_name="prioridad"),
+        "monto": django_filters.RangeFilter(),
+        "sin_prioridad": django_filters.BooleanFilter(
+            field_name="prioridad", lookup_expr="isnull"
+        ),
+        "dia": django_filters.DateFilter(field_name="creado", lookup_expr="date"),
+        "desde": django_filters.DateFilter(field_name="creado", lookup_expr="gte"),
+        "creado": django_filters.DateFromToRangeFilter(),
+    }
+
+
+PedidoFilterSet = type(
+    "PedidoFilterSet",
+    (django_filters.FilterSet,),
+    {**declarar_filtros(), "Meta": type("Meta", (), {"model": Pedido, "fields": []})},
+)
+PedidoDictFilterSet = type("PedidoDictFilterSet", (DictFilterSet,), declarar_filtros())
+
+
+class DictFilterSetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ahora = timezone.now().replace(microsecond=0)
+        for i, pedido in enumerate(crear_pedidos(24)):
+            pedido.estado = Pedido.ARCHIVADO if i % 3 == 0 else Pedido.NUEVO
+            pedido.prioridad = None if i % 4 == 0 else i % 3
+            pedido.nota = NOTAS[i % len(NOTAS)]
+            # Cada 7 horas: hay días con varios pedidos y horarios cerca de medianoche
+            pedido.creado = cls.ahora - datetime.timedelta(hours=7 * i)
+            pedido.save()
+
+    def setUp(self):
+        records = Pedido.objects.order_by("pk").values(*CAMPOS)
+        self.data = ColumnarData.from_records(records, version=1)
+
+    def casos(self):
+        hoy = timezone.localdate(self.ahora)
+        return [
+            {"estado": "a"},
+            {"nota": "rOj"},
+            {"prioridades": "1,2"},
+            {"monto_min": "3", "monto_max": "10.5"},
+            {"monto_min": "20"},
+            {"sin_prioridad": "true"},
+            {"sin_prioridad": "false"},
+            {"dia": str(hoy - datetime.timedelta(days=2))},
+            {"desde": str(hoy - datetime.timedelta(days=3))},
+            {
+                "creado_after": str(hoy - datetime.timedelta(days=5)),
+                "creado_before": str(hoy - datetime.timedelta(days=2)),
+            },
+            # Varios filtros: cada uno se resuelve sobre lo que dejó el anterior
+            {"prioridades": "2", "nota": "e", "estado": "n"},
+            {"sin_prioridad": "true", "desde": str(hoy), "monto_max": "1"},
+        ]
+
+    def esperado(self, query):
+        filterset = PedidoFilterSet(query, queryset=Pedido.objects.order_by("pk"))
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        with warnings.catch_warnings():
+            # Una fecha contra un DateTimeField: Django avisa que la hace aware
+            warnings.simplefilter("ignore", RuntimeWarning)
+            return list(filterset.qs.values_list("pk", flat=True))
+
+    def filtrar(self, query, use_indexes):
+        queryset = ColumnarQuerySet(self.data, use_indexes=use_indexes)
+        filterset = PedidoDictFilterSet(query, queryset=queryset)
+        self.assertTrue(filterset.is_valid(), filterset.errors)
+        return sorted(record["id"] for record in filterset.qs)
+
+    def test_matches_django_filter(self):
+        for query in self.casos():
+            expected = self.esperado(query)
+            for use_indexes in (True, False):
+                with self.subTest(query=query, use_indexes=use_indexes):
+                    self.assertEqual(self.filtrar(query, use_indexes), expected)
+
+    def test_cases_are_not_trivial(self):
+        for query in self.casos():
+            with self.subTest(query=query):
+                self.assertTrue(0 < len(self.esperado(query)) < Pedido.objects.count())
+
+    def test_date_on_aware_datetime_column(self):
+        hoy = timezone.localdate()
+        expected = list(
+            Pedido.objects.filter(creado__date__gte=hoy).values_list("pk", flat=True)
+        )
+        for use_indexes in (True, False):
+            queryset = ColumnarQuerySet(self.data, use_indexes=use_indexes)
+            with self.subTest(use_indexes=use_indexes):
+                self.assertEqual(
+                    sorted(r["id"] for r in queryset.filter(creado__gte=hoy)), expected
+                )
+
+    def test_decimal_filter_on_float_column(self):
+        data = ColumnarData.from_records(
+            [{"monto": 1.5}, {"monto": 2.25}, {"monto": 3.0}]
+        )
+        queryset = ColumnarQuerySet(data)
+        self.assertEqual(queryset.filter(monto__gte=Decimal("2.25")).count(), 2)
+
+    def test_indexes_reused_per_version(self):
+        key = ("hash", "estado", ())
+        queryset = ColumnarQuerySet(self.data)
+        queryset.filter(estado="a")
+        build = mock.Mock()
+        index = self.data.get_index(key, build)
+        queryset.filter(estado="n")
+        self.assertIs(self.data.get_index(key, build), index)
+        build.assert_not_called()
+
+        self.data.version = 2
+        queryset.filter(estado="n")
+        self.assertIsNot(self.data.get_index(key, build), index)
+        build.assert_not_called()
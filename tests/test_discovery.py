@@ -0,0 +1,102 @@
+import importlib
+import os
+import tempfile
+import types
+from inspect import iscoroutinefunction
+from unittest import mock
+
+from django.test import RequestFactory, TestCase
+
+from django_scotty import discovery
+from django_scotty.helpers import build_urls, get_url_entries
+
+from .testapp import views
+from .utils import crear_pedidos
+
+
+class Vistas:
+    """Vistas anidadas: su `__qualname__` tiene un punto."""
+
+    class PedidoAnidadoView(views.PedidoView):
+        pass
+
+
+# Así las encuentra get_url_entries, que recorre el módulo
+modulo = types.SimpleNamespace(
+    PedidoAnidadoView=Vistas.PedidoAnidadoView,
+    AsyncPedidoView=views.AsyncPedidoView,
+)
+
+
+class ManifestTests(TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.scotty_dir = tmp.name
+        for name in ("pedidos", "clientes"):
+            with open(os.path.join(self.scotty_dir, f"{name}.py"), "w") as module:
+                module.write("")
+        self.entries = get_url_entries([modulo])
+
+    def tocar(self, name):
+        path = os.path.join(self.scotty_dir, f"{name}.py")
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+
+    def test_roundtrip(self):
+        discovery.write_manifest("tests", self.scotty_dir, self.entries)
+        self.assertEqual(discovery.read_manifest(self.scotty_dir), self.entries)
+        self.assertEqual(
+            [(entry["class"], entry["is_async"]) for entry in self.entries],
+            [("Vistas.PedidoAnidadoView", False), ("AsyncPedidoView", True)],
+        )
+
+    def test_missing_manifest(self):
+        self.assertIsNone(discovery.read_manifest(self.scotty_dir))
+
+    def test_modified_module_invalidates(self):
+        discovery.write_manifest("tests", self.scotty_dir, self.entries)
+        self.tocar("clientes")
+        self.assertIsNone(discovery.read_manifest(self.scotty_dir))
+
+    def test_new_module_invalidates(self):
+        discovery.write_manifest("tests", self.scotty_dir, self.entries)
+        with open(os.path.join(self.scotty_dir, "zonas.py"), "w") as module:
+            module.write("")
+        self.assertIsNone(discovery.read_manifest(self.scotty_dir))
+
+    def test_invalid_manifest_is_ignored(self):
+        with open(discovery.get_manifest_path(self.scotty_dir), "w") as manifest:
+            manifest.write("{")
+        self.assertIsNone(discovery.read_manifest(self.scotty_dir))
+
+
+class LazyViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(3)
+
+    def setUp(self):
+        patcher = mock.patch.object(
+            discovery.importlib, "import_module", wraps=importlib.import_module
+        )
+        self.import_module = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_resolves_nested_class_on_first_request(self):
+        view = discovery.lazy_view(__name__, "Vistas.PedidoAnidadoView", discovery.LIST)
+        self.assertTrue(view.scotty_lazy)
+        self.import_module.assert_not_called()
+
+        for _ in range(2):
+            response = view(RequestFactory().get("/pedidoanidado/"))
+            self.assertEqual(response.status_code, 200)
+        self.import_module.assert_called_once_with(__name__)
+        self.assertIsInstance(response.context_data["view"], Vistas.PedidoAnidadoView)
+
+    def test_lazy_urls_from_entries(self):
+        urlpatterns = build_urls(get_url_entries([modulo]))
+        nested, async_view = (pattern.callback for pattern in urlpatterns)
+        self.assertFalse(iscoroutinefunction(nested))
+        self.assertTrue(iscoroutinefunction(async_view))
+        self.assertEqual(nested(RequestFactory().get("/")).status_code, 200)
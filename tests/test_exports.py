@@ -0,0 +1,87 @@
+import io
+from unittest import mock
+
+from django.db.models import QuerySet
+from django.http import FileResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase
+from openpyxl import load_workbook
+
+from django_scotty.exports import CONTENT_TYPES, workbook_response, write_workbook
+
+from .testapp.views import PedidoView, StreamingPedidoView, TotalesPedidoView
+from .utils import crear_pedidos
+
+
+class WorkbookTests(TransactionTestCase):
+    # Las hojas se arman en threads con su propia conexión
+    def setUp(self):
+        crear_pedidos(5)
+
+    def test_rows_exclude_header_and_footer(self):
+        output = io.BytesIO()
+        results = write_workbook(
+            [(PedidoView, ""), (TotalesPedidoView, "", "Totales")], output, max_workers=1
+        )
+        self.assertEqual([result.rows for result in results], [5, 5])
+        # El pie sí se escribe en la hoja
+        sheet = load_workbook(output)["Totales"]
+        self.assertEqual(sheet.max_row, 7)
+
+    def test_workbook_response(self):
+        response = workbook_response(
+            [(PedidoView, "estado=n")], RequestFactory().get("/"), filename="p.xlsx"
+        )
+        self.assertIsInstance(response, FileResponse)
+        self.assertIn('filename="p.xlsx"', response["Content-Disposition"])
+        self.assertEqual([result.rows for result in response.sheet_results], [5])
+        content = b"".join(response.streaming_content)
+        response.close()
+        self.assertEqual(load_workbook(io.BytesIO(content)).active.max_row, 6)
+
+
+@mock.patch.object(StreamingPedidoView, "export_chunk_size", 2)
+class StreamingExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(5)
+
+    def exportar(self, export_format, path="/streamingpedido/"):
+        with mock.patch.object(
+            QuerySet, "iterator", autospec=True, side_effect=QuerySet.iterator
+        ) as iterator:
+            response = self.client.get(path, {"_export": export_format})
+            content = (
+                b"".join(response.streaming_content)
+                if response.streaming
+                else response.content
+            )
+        return response, content, iterator
+
+    def test_csv(self):
+        response, content, iterator = self.exportar("csv")
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], CONTENT_TYPES["csv"])
+        self.assertEqual(
+            response["Content-Disposition"], 'attachment; filename="streamingpedido.csv"'
+        )
+        self.assertEqual(len(content.decode().strip().splitlines()), 6)
+        # Los registros se leen en bloques, sin cargar el QuerySet entero
+        iterator.assert_called_once_with(mock.ANY, chunk_size=2)
+
+    def test_xlsx(self):
+        response, content, iterator = self.exportar("xlsx")
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(response["Content-Type"], CONTENT_TYPES["xlsx"])
+        self.assertIn("streamingpedido.xlsx", response["Content-Disposition"])
+        self.assertEqual(load_workbook(io.BytesIO(content)).active.max_row, 6)
+        iterator.assert_called_once_with(mock.ANY, chunk_size=2)
+
+    def test_other_formats_use_tablib(self):
+        response, _, iterator = self.exportar("json")
+        self.assertFalse(response.streaming)
+        iterator.assert_not_called()
+
+    def test_disabled_without_streaming_export(self):
+        response, _, iterator = self.exportar("csv", path="/pedido/")
+        self.assertFalse(response.streaming)
+        iterator.assert_not_called()
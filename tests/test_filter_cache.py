@@ -0,0 +1,81 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from django_scotty import filter_cache
+
+from .testapp.models import Pedido
+from .testapp.views import PedidoView
+from .utils import crear_pedidos
+
+
+@mock.patch.object(PedidoView, "filter_result_cache", True)
+class FilterResultCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        pedidos = crear_pedidos(12)
+        Pedido.objects.filter(pk__in=[p.pk for p in pedidos[::3]]).update(
+            estado=Pedido.ARCHIVADO
+        )
+        self.keys = []
+        get_filtered_pks = filter_cache.get_filtered_pks
+
+        def espiar(key, *args):
+            self.keys.append(key)
+            return get_filtered_pks(key, *args)
+
+        for target, kwargs in (
+            ("get_filtered_pks", {"side_effect": espiar}),
+            ("pack_pks", {"wraps": filter_cache.pack_pks}),
+        ):
+            patcher = mock.patch.object(filter_cache, target, **kwargs)
+            setattr(self, target, patcher.start())
+            self.addCleanup(patcher.stop)
+
+    def pks_de_pagina(self, response):
+        return [row.record.pk for row in response.context["table"].paginated_rows]
+
+    def test_get_export_and_bulk_post_share_one_evaluation(self):
+        response = self.client.get("/pedido/", {"estado": "n", "page": "1"})
+        self.assertEqual(
+            self.pks_de_pagina(response),
+            list(
+                Pedido.objects.filter(estado=Pedido.NUEVO)
+                .order_by("pk")
+                .values_list("pk", flat=True)
+            ),
+        )
+        export = self.client.get("/pedido/", {"estado": "n", "_export": "csv"})
+        self.assertEqual(len(export.content.decode().strip().splitlines()), 9)
+        self.client.post(
+            "/pedido/",
+            {"action": "archivar", "filter_query_string": "sort=-monto&estado=n"},
+        )
+
+        self.assertEqual(len(self.keys), 3)
+        self.assertEqual(len(set(self.keys)), 1)
+        self.pack_pks.assert_called_once()
+        self.assertEqual(Pedido.objects.filter(estado=Pedido.NUEVO).count(), 0)
+
+    def test_unfiltered_request_is_not_cached(self):
+        self.client.get("/pedido/")
+        self.get_filtered_pks.assert_not_called()
+
+    def test_model_version_bump_invalidates(self):
+        self.client.get("/pedido/", {"estado": "n"})
+        filter_cache.invalidate_filter_results(Pedido)
+        response = self.client.get("/pedido/", {"estado": "n"})
+
+        self.assertEqual(len(self.keys), 2)
+        self.assertNotEqual(*self.keys)
+        self.assertEqual(self.pack_pks.call_count, 2)
+        self.assertEqual(response.context["table"].paginator.count, 8)
+
+    def test_save_invalidates(self):
+        self.client.get("/pedido/", {"estado": "n"})
+        pedido = Pedido.objects.filter(estado=Pedido.NUEVO).first()
+        pedido.estado = Pedido.ARCHIVADO
+        pedido.save()
+        response = self.client.get("/pedido/", {"estado": "n"})
+        self.assertEqual(response.context["table"].paginator.count, 7)
@@ -0,0 +1,51 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+
+from django_scotty import queries
+from django_scotty.fragments import get_fragment_cache_stats
+
+from .testapp.models import Cliente, Pedido, Zona
+from .testapp.views import PedidoTable, PedidoView
+from .utils import crear_pedidos
+
+
+class FragmentCacheVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(3)
+
+    def setUp(self):
+        cache.clear()
+
+    def cache_key(self):
+        view = PedidoView(request=RequestFactory().get("/pedido/"))
+        view.request.user = None
+        return view.get_table_fragment_cache_key()
+
+    @mock.patch.object(PedidoView, "cache_table_fragment", True)
+    def test_fragment_reused_until_a_save(self):
+        for _ in range(2):
+            self.client.get("/pedido/")
+        self.assertEqual(get_fragment_cache_stats(), {"hits": 1, "misses": 1})
+
+        pedido = Pedido.objects.first()
+        pedido.monto = 777
+        pedido.save()
+        response = self.client.get("/pedido/")
+        self.assertEqual(get_fragment_cache_stats(), {"hits": 1, "misses": 2})
+        self.assertContains(response, "777")
+
+    def test_related_models_from_columns(self):
+        paths = queries.get_column_paths(PedidoTable)
+        self.assertEqual(queries.get_related_models(Pedido, paths), [Cliente, Zona])
+
+    def test_related_change_invalidates_fragment(self):
+        key = self.cache_key()
+        self.assertEqual(self.cache_key(), key)
+        Zona.objects.get().save()
+        changed = self.cache_key()
+        self.assertNotEqual(changed, key)
+        Cliente.objects.get().save()
+        self.assertNotEqual(self.cache_key(), changed)
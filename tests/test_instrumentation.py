@@ -0,0 +1,81 @@
+import re
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from django_scotty.instrumentation import request_profiled
+
+from .testapp.views import PedidoView
+from .utils import crear_pedidos
+
+
+def leer_server_timing(header):
+    """{fase: (ms, queries)} a partir de la cabecera Server-Timing."""
+    metrics = {}
+    for metric in header.split(", "):
+        match = re.fullmatch(r'(\w+);dur=([\d.]+);desc="(\d+) q"', metric)
+        name, dur, queries = match.groups()
+        metrics[name] = (float(dur), int(queries))
+    return metrics
+
+
+@override_settings(SCOTTY_INSTRUMENTATION=True, SCOTTY_INSTRUMENTATION_OVERLAY=False)
+class InstrumentationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(15)
+
+    def setUp(self):
+        cache.clear()
+        self.profiles = []
+        request_profiled.connect(self.recibir)
+        self.addCleanup(request_profiled.disconnect, self.recibir)
+
+    def recibir(self, sender, profile, **kwargs):
+        self.profiles.append(profile)
+
+    def test_server_timing_lists_phases(self):
+        response = self.client.get("/pedido/", {"estado": "n"})
+        metrics = leer_server_timing(response["Server-Timing"])
+        for phase in ("filtros", "conteo", "tabla", "filas", "render", "total"):
+            self.assertIn(phase, metrics)
+        self.assertEqual(list(metrics)[-1], "total")
+        self.assertTrue(all(ms >= 0 for ms, _ in metrics.values()))
+
+    def test_query_counts_match_executed_queries(self):
+        with CaptureQueriesContext(connection) as executed:
+            self.client.get("/pedido/", {"page": "2"})
+        (profile,) = self.profiles
+        self.assertIs(profile.view.__class__, PedidoView)
+        self.assertEqual(profile.total_queries, len(executed))
+        phases = {timing.name: timing for timing in profile.phases.values()}
+        # Un COUNT para el paginador y un SELECT para las filas de la página
+        self.assertEqual(phases["conteo"].queries, 1)
+        self.assertEqual(phases["filas"].queries, 1)
+        self.assertLessEqual(
+            sum(timing.queries for timing in phases.values() if timing.depth == 0),
+            profile.total_queries,
+        )
+
+    def test_signal_profile_as_dict(self):
+        self.client.get("/pedido/")
+        data = self.profiles[0].as_dict()
+        self.assertEqual((data["view"], data["method"]), ("PedidoView", "GET"))
+        self.assertEqual(data["queries"], self.profiles[0].total_queries)
+        self.assertIn("conteo", [phase["name"] for phase in data["phases"]])
+
+    def test_view_attribute_overrides_setting(self):
+        with mock.patch.object(PedidoView, "instrumentation", False):
+            response = self.client.get("/pedido/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(self.profiles, [])
+
+
+class InstrumentationDisabledTests(TestCase):
+    def test_no_header_by_default(self):
+        crear_pedidos(1)
+        response = self.client.get("/pedido/")
+        self.assertNotIn("Server-Timing", response)
@@ -0,0 +1,125 @@
+import tempfile
+import time
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from unittest import mock
+
+from django.core.files.storage import FileSystemStorage
+from django.test import TestCase
+
+from django_scotty import jobs
+
+from .testapp.views import PedidoView
+from .utils import crear_pedidos
+
+
+class ExportJobTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(5)
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.store = jobs.ExportJobStore(FileSystemStorage(location=tmp.name))
+        patcher = mock.patch.object(
+            PedidoView, "get_export_job_store", lambda view: self.store
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def crear(self):
+        return self.store.create(
+            "tests.testapp.views.PedidoView", "", "csv", "pedidos.csv", None, 3600
+        )
+
+    def test_queued_export_runs_and_downloads(self):
+        with (
+            mock.patch.object(PedidoView, "async_export", True),
+            mock.patch.object(jobs, "get_executor") as get_executor,
+        ):
+            response = self.client.get("/pedido/", {"estado": "n", "_export": "csv"})
+        self.assertEqual(response.status_code, 200)
+        (job_id,), _ = get_executor.return_value.submit.call_args
+        self.assertEqual(self.store.read(job_id)["status"], jobs.PENDING)
+
+        jobs.run_export_job(job_id, self.store)
+        self.assertEqual(self.store.read(job_id)["status"], jobs.DONE)
+        download = self.client.get("/pedido/", {"_export_job": job_id, "download": "1"})
+        self.assertIn("attachment", download["Content-Disposition"])
+        content = b"".join(download.streaming_content).decode()
+        self.assertEqual(len(content.strip().splitlines()), 6)
+
+    def test_run_records_heartbeat(self):
+        job = self.crear()
+        self.assertIsNone(job["heartbeat"])
+        with mock.patch.object(PedidoView, "export_chunk_size", 2):
+            jobs.run_export_job(job["id"], self.store)
+        job = self.store.read(job["id"])
+        self.assertEqual(job["status"], jobs.DONE)
+        self.assertEqual(job["rows"], 5)
+        self.assertIsNotNone(job["started"])
+        self.assertGreaterEqual(job["heartbeat"], job["started"])
+
+    def test_mark_stale(self):
+        job = self.store.update(self.crear()["id"], status=jobs.RUNNING, heartbeat=100)
+        self.assertEqual(self.store.mark_stale(job, 60, now=150)["status"], jobs.RUNNING)
+        self.assertEqual(self.store.mark_stale(job, 60, now=200)["status"], jobs.FAILED)
+        self.assertEqual(self.store.read(job["id"])["status"], jobs.FAILED)
+
+    def test_pending_job_times_out(self):
+        job = self.crear()
+        created = job["created"]
+        self.assertEqual(
+            self.store.mark_stale(job, 60, now=created + 30)["status"], jobs.PENDING
+        )
+        marked = self.store.mark_stale(job, 60, now=created + 120)
+        self.assertEqual(marked["status"], jobs.FAILED)
+        self.assertEqual(marked["error"], "La exportación no llegó a empezar")
+
+    def test_failed_job_is_not_run(self):
+        job = self.store.update(self.crear()["id"], status=jobs.FAILED)
+        jobs.run_export_job(job["id"], self.store)
+        job = self.store.read(job["id"])
+        self.assertEqual(job["status"], jobs.FAILED)
+        self.assertIsNone(job["started"])
+
+    def enviar_al_pool(self, job):
+        """Encolar `job` en un pool falso; devuelve el Future del worker."""
+        future = Future()
+        pool = mock.Mock(**{"submit.return_value": future})
+        with mock.patch.object(jobs.ProcessPoolExportExecutor, "_pool", pool):
+            jobs.ProcessPoolExportExecutor().submit(job["id"])
+        pool.submit.assert_called_once_with(jobs.run_export_job, job["id"])
+        return future
+
+    def test_dead_pool_worker_fails_job(self):
+        job = self.crear()
+        future = self.enviar_al_pool(job)
+        with mock.patch.object(jobs, "ExportJobStore", return_value=self.store):
+            future.set_exception(BrokenProcessPool("El worker terminó de golpe"))
+        job = self.store.read(job["id"])
+        self.assertEqual(job["status"], jobs.FAILED)
+        self.assertEqual(job["error"], "El worker terminó de golpe")
+
+    def test_finished_pool_worker_leaves_job(self):
+        job = self.store.update(self.crear()["id"], status=jobs.DONE)
+        future = self.enviar_al_pool(job)
+        with mock.patch.object(jobs, "ExportJobStore", return_value=self.store):
+            future.set_result(None)
+        self.assertEqual(self.store.read(job["id"])["status"], jobs.DONE)
+
+    def test_status_poll_fails_dead_job(self):
+        job = self.store.update(
+            self.crear()["id"], status=jobs.RUNNING, heartbeat=time.time() - 3600
+        )
+        response = self.client.get("/pedido/", {"_export_job": job["id"]})
+        self.assertContains(response, "No se pudo generar la exportación")
+        self.assertEqual(self.store.read(job["id"])["status"], jobs.FAILED)
+
+    def test_rows_exclude_footer(self):
+        job = self.store.create(
+            "tests.testapp.views.TotalesPedidoView", "", "csv", "totales.csv", None, 3600
+        )
+        jobs.run_export_job(job["id"], self.store)
+        self.assertEqual(self.store.read(job["id"])["rows"], 5)
@@ -0,0 +1,102 @@
+from django.test import RequestFactory, TestCase
+
+from django_scotty import pagination
+
+from .testapp.models import Pedido
+from .testapp.views import PedidoTable, PedidoView
+from .utils import crear_pedidos
+
+
+def pagina(queryset, cursor=None, per_page=4):
+    table = PedidoTable(queryset)
+    pagination.paginate_by_cursor(table, cursor, per_page=per_page)
+    return table.page, [row.record.pk for row in table.page.object_list]
+
+
+class CursorPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        pedidos = crear_pedidos(10)
+        # Prioridades repetidas y nulas: el orden depende del desempate por pk
+        for pedido, prioridad in zip(pedidos, [3, None, 1, 3, None, 2, 1, 3, None, 2]):
+            pedido.prioridad = prioridad
+            pedido.save()
+
+    def recorrer(self, queryset):
+        """Ir página por página hacia adelante y devolver todos los pks."""
+        page, pks = pagina(queryset)
+        seen = list(pks)
+        while page.has_next:
+            page, pks = pagina(queryset, page.next_cursor)
+            seen.extend(pks)
+        return seen
+
+    def test_forward_matches_queryset_order(self):
+        for ordering in (["pk"], ["prioridad"], ["-prioridad"], ["estado", "-monto"]):
+            queryset = Pedido.objects.order_by(*ordering)
+            with self.subTest(ordering=ordering):
+                expected = list(queryset.order_by(*ordering, "pk").values_list("pk", flat=True))
+                self.assertEqual(self.recorrer(queryset), expected)
+
+    def test_previous_returns_the_same_page(self):
+        queryset = Pedido.objects.order_by("-prioridad")
+        first, first_pks = pagina(queryset)
+        second, _ = pagina(queryset, first.next_cursor)
+        back, back_pks = pagina(queryset, second.previous_cursor)
+        self.assertEqual(back_pks, first_pks)
+        self.assertFalse(back.has_previous)
+        self.assertTrue(back.has_next)
+
+    def test_first_and_last_page_flags(self):
+        first, _ = pagina(Pedido.objects.all())
+        self.assertFalse(first.has_previous)
+        self.assertIsNone(first.previous_cursor)
+        last, pks = pagina(Pedido.objects.all(), per_page=20)
+        self.assertFalse(last.has_next)
+        self.assertEqual(len(pks), 10)
+
+    def test_invalid_cursor_goes_to_first_page(self):
+        _, first_pks = pagina(Pedido.objects.all())
+        for cursor in ("no-es-base64!", pagination.encode_cursor(["x"], [1], "z")):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(pagina(Pedido.objects.all(), cursor)[1], first_pks)
+
+    def test_cursor_from_another_ordering_is_ignored(self):
+        page, _ = pagina(Pedido.objects.order_by("monto"))
+        _, pks = pagina(Pedido.objects.order_by("-monto"), page.next_cursor)
+        self.assertEqual(pks, pagina(Pedido.objects.order_by("-monto"))[1])
+
+    def test_ordering_fields_end_with_pk(self):
+        self.assertEqual(
+            pagination.get_ordering_fields(Pedido.objects.order_by("-monto")),
+            ["-monto", "pk"],
+        )
+        self.assertEqual(
+            pagination.get_ordering_fields(Pedido.objects.order_by("?")), ["pk"]
+        )
+
+
+class OffsetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(25)
+
+    def test_page_out_of_range_redirects_to_last_page(self):
+        response = self.client.get("/pedido/?page=9&estado=n")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("page=3", response["Location"])
+        self.assertIn("estado=n", response["Location"])
+
+    def test_page_counts(self):
+        response = self.client.get("/pedido/?page=2")
+        table = response.context["table"]
+        self.assertEqual(table.paginator.count, 25)
+        self.assertEqual([row.record.monto for row in table.page.object_list][0], 10)
+
+    def test_cursor_mode_does_not_count(self):
+        view = PedidoView.as_view(pagination_mode=pagination.CURSOR)
+        request = RequestFactory().get("/pedido/")
+        with self.assertNumQueries(1):
+            response = view(request)
+            response.render()
+        self.assertNotIn("de un total de", response.content.decode())
@@ -0,0 +1,52 @@
+from django.test import TestCase
+
+from .utils import crear_pedidos
+
+PARCIAL = "django_tables2/partial_django_tables2.html"
+COMPLETA = "django_tables2/base_django_tables2.html"
+
+
+def htmx(target="django-table-abc-body", **headers):
+    return {"HTTP_HX_REQUEST": "true", "HTTP_HX_TARGET": target, **headers}
+
+
+class PartialRenderTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(25)
+
+    def test_htmx_body_request_renders_only_the_body(self):
+        response = self.client.get("/pedido/", {"estado": "n", "page": "2"}, **htmx())
+        self.assertTemplateUsed(response, PARCIAL)
+        self.assertTemplateNotUsed(response, COMPLETA)
+        table = response.context["table"]
+        # Se conserva el id del contenedor que se reemplaza
+        self.assertEqual(table.unique_id, "django-table-abc")
+        self.assertEqual(response["HX-Push-Url"], "/pedido/?estado=n&page=2")
+        self.assertFalse(hasattr(response.context["filter"].form, "helper"))
+        # El estado oculto del filtro (la página) se actualiza fuera del cuerpo
+        self.assertContains(response, 'id="django-table-abc-state" hx-swap-oob="true"')
+        self.assertContains(response, '<input type="hidden" name="page" value="2">')
+        self.assertNotContains(response, '<input type="hidden" name="estado"')
+
+    def test_unfiltered_total_from_header(self):
+        with self.assertNumQueries(2):
+            # COUNT filtrado y filas; el total sin filtrar viene del header
+            response = self.client.get(
+                "/pedido/", **htmx(HTTP_X_SCOTTY_UNFILTERED="~1000")
+            )
+        table = response.context["table"]
+        self.assertEqual(table.unfiltered_records, 1000)
+        self.assertTrue(table.unfiltered_records_estimated)
+
+    def test_invalid_header_counts_again(self):
+        response = self.client.get("/pedido/", **htmx(HTTP_X_SCOTTY_UNFILTERED="x"))
+        self.assertEqual(response.context["table"].unfiltered_records, 25)
+
+    def test_other_requests_render_the_whole_page(self):
+        for headers in ({}, htmx(target="otro-body"), {"HTTP_HX_REQUEST": "true"}):
+            with self.subTest(headers=headers):
+                response = self.client.get("/pedido/", **headers)
+                self.assertTemplateUsed(response, COMPLETA)
+                self.assertNotIn("HX-Push-Url", response)
+                self.assertTrue(hasattr(response.context["filter"].form, "helper"))
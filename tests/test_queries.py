@@ -0,0 +1,103 @@
+from decimal import Decimal
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from django_scotty import queries
+
+from .testapp.models import Cliente, Pedido, Zona
+from .testapp.views import PedidoTable, PedidoView
+
+
+def crear_clientes(cantidad):
+    """Un pedido por cliente, cada cliente en su propia zona."""
+    for i in range(cantidad):
+        zona = Zona.objects.create(nombre=f"Zona {i}")
+        cliente = Cliente.objects.create(nombre=f"Cliente {i}", zona=zona)
+        Pedido.objects.create(cliente=cliente, monto=Decimal(i))
+
+
+class PlanRelationsTests(TestCase):
+    def test_column_paths(self):
+        self.assertEqual(
+            queries.get_column_paths(PedidoTable),
+            [
+                "acciones",
+                "id",
+                "cliente__nombre",
+                "cliente__zona__nombre",
+                "estado",
+                "monto",
+                "prioridad",
+            ],
+        )
+
+    def test_to_one_paths_use_select_related(self):
+        select, prefetch, only = queries.plan_relations(
+            Pedido, queries.get_column_paths(PedidoTable)
+        )
+        self.assertEqual(select, {"cliente", "cliente__zona"})
+        self.assertEqual(prefetch, set())
+        # La columna calculada (acciones) no es un campo y se ignora
+        self.assertEqual(
+            only,
+            {
+                "id",
+                "estado",
+                "monto",
+                "prioridad",
+                "cliente",
+                "cliente__nombre",
+                "cliente__zona",
+                "cliente__zona__nombre",
+            },
+        )
+
+    def test_paths_after_a_to_many_relation_are_prefetched(self):
+        select, prefetch, only = queries.plan_relations(
+            Zona, ["nombre", "cliente__nombre", "cliente__pedido__monto"]
+        )
+        self.assertEqual(select, set())
+        self.assertEqual(prefetch, {"cliente", "cliente__pedido"})
+        self.assertEqual(only, {"nombre"})
+
+    def test_related_models(self):
+        paths = queries.get_column_paths(PedidoTable)
+        self.assertEqual(queries.get_related_models(Pedido, paths), [Cliente, Zona])
+
+
+class AutoSelectRelatedTests(TestCase):
+    def consultas_de_pagina(self):
+        with CaptureQueriesContext(connection) as executed:
+            response = self.client.get("/pedido/")
+            self.assertEqual(response.status_code, 200)
+        return executed.captured_queries
+
+    def test_page_queries_do_not_grow_with_related_rows(self):
+        crear_clientes(2)
+        pocos = len(self.consultas_de_pagina())
+        crear_clientes(8)
+        self.assertEqual(len(self.consultas_de_pagina()), pocos)
+
+    def test_page_query_joins_column_relations(self):
+        crear_clientes(3)
+        sql = self.consultas_de_pagina()[-1]["sql"]
+        self.assertIn('"testapp_cliente"', sql)
+        self.assertIn('"testapp_zona"', sql)
+
+    def test_disabled_queries_per_row(self):
+        crear_clientes(3)
+        optimizado = len(self.consultas_de_pagina())
+        with mock.patch.object(PedidoView, "auto_select_related", False):
+            # Cliente y zona por cada una de las 3 filas
+            self.assertEqual(len(self.consultas_de_pagina()), optimizado + 6)
+
+    def test_only_fields(self):
+        crear_clientes(3)
+        optimizado = len(self.consultas_de_pagina())
+        with mock.patch.object(PedidoView, "auto_only_fields", True):
+            executed = self.consultas_de_pagina()
+        self.assertEqual(len(executed), optimizado)
+        self.assertNotIn('"nota"', executed[-1]["sql"])
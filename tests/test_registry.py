@@ -0,0 +1,87 @@
+from django.test import RequestFactory, TestCase
+
+from django_scotty.helpers import CottonTableView, DictTableView, GenericDetailView
+from django_scotty.registry import ActionMeta
+
+from .testapp.models import Pedido
+from .testapp.views import PedidoTable, PedidoView
+from .utils import crear_pedidos
+
+
+def contexto(view_class, **initkwargs):
+    response = view_class.as_view(**initkwargs)(RequestFactory().get("/pedido/"))
+    return response.context_data
+
+
+class ConfirmarView(PedidoView):
+    available_action_names = ["archivar", "reabrir", "no_existe"]
+
+    def reabrir(self, obj):
+        pass
+
+    reabrir.verbose_name = "Reabrir pedido"
+    reabrir.show_on_bulk = False
+    reabrir.show_confirm = True
+
+
+class ViewMetaTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        crear_pedidos(3)
+
+    def test_meta_is_built_per_class(self):
+        meta = ConfirmarView.scotty_meta
+        self.assertEqual(meta.slug, "confirmar")
+        self.assertEqual(meta.url_name, "list-view-confirmar")
+        self.assertEqual(
+            meta.actions,
+            (
+                ActionMeta("archivar", "Archivar", True, False),
+                ActionMeta("reabrir", "Reabrir pedido", False, True),
+            ),
+        )
+        self.assertIsNot(meta, PedidoView.scotty_meta)
+
+    def test_show_confirm_is_not_show_on_bulk(self):
+        action = ConfirmarView.scotty_meta.actions[1]
+        self.assertFalse(action.show_on_bulk)
+        self.assertTrue(action.show_confirm)
+
+    def test_url_names(self):
+        self.assertEqual(GenericDetailView.scotty_meta.url_name, "detail-view-generic")
+        self.assertEqual(DictTableView.scotty_meta.kind, "list")
+
+    def test_filter_buttons_add_limpiar(self):
+        self.assertEqual(
+            PedidoView.scotty_meta.filter_buttons,
+            ("filtrar", "exportar_xls", "limpiar"),
+        )
+
+    def test_context_reads_the_meta(self):
+        context = contexto(PedidoView)
+        self.assertEqual(
+            context["show_action_buttons"], ("filtrar", "exportar_xls", "limpiar")
+        )
+        self.assertEqual(context["table"].url_action_method, "list-view-pedido")
+        self.assertEqual(context["table"].available_actions, PedidoView.scotty_meta.actions)
+
+    def test_as_view_overrides_filter_buttons(self):
+        context = contexto(PedidoView, available_filter_buttons=["filtrar"])
+        self.assertEqual(context["show_action_buttons"], ("filtrar", "limpiar"))
+        context = contexto(PedidoView, available_filter_buttons=None)
+        self.assertEqual(context["show_action_buttons"], ())
+
+    def test_as_view_overrides_actions(self):
+        context = contexto(PedidoView, available_action_names=[])
+        self.assertEqual(context["table"].available_actions, ())
+
+    def test_refresh_after_class_changes(self):
+        class TemporalView(CottonTableView):
+            model = Pedido
+            table_class = PedidoTable
+            available_filter_buttons = ["filtrar"]
+
+        TemporalView.available_filter_buttons = ["exportar_xls"]
+        self.assertEqual(TemporalView.scotty_meta.filter_buttons, ("filtrar", "limpiar"))
+        TemporalView.refresh_scotty_meta()
+        self.assertEqual(TemporalView.scotty_meta.filter_buttons, ("exportar_xls",))
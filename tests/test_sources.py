@@ -0,0 +1,153 @@
+import os
+import tempfile
+from unittest import mock
+
+import django_tables2 as tables
+from django.test import SimpleTestCase, TestCase
+
+from django_scotty.sources import CSVSource, GeneratorSource, SQLSource, TableSourceData
+
+from .testapp.models import Pedido
+from .utils import crear_pedidos
+
+REGISTROS = [
+    {"id": i, "total": (i * 7) % 5, "cliente": {"nombre": "ABC"[i % 3]}}
+    for i in range(12)
+]
+
+
+def ids(records):
+    return [record["id"] for record in records]
+
+
+def ordenados(*keys):
+    """REGISTROS ordenados por `keys` [(clave, descendente)] con sorts estables."""
+    records = list(REGISTROS)
+    for key, descending in reversed(keys):
+        records.sort(key=key, reverse=descending)
+    return records
+
+
+class VentaTable(tables.Table):
+    id = tables.Column()
+    total = tables.Column()
+    cliente = tables.Column(accessor="cliente.nombre")
+
+
+class GeneratorSourceTests(SimpleTestCase):
+    def setUp(self):
+        self.source = GeneratorSource(lambda: iter(REGISTROS))
+
+    def test_slice_without_order(self):
+        self.assertEqual(ids(self.source.slice(3, 4)), [3, 4, 5, 6])
+        self.assertEqual(ids(self.source.slice(10, 5)), [10, 11])
+
+    def test_slice_with_order(self):
+        total = ordenados((lambda r: r["total"], False))
+        self.assertEqual(self.source.slice(0, 12, ("total",)), total)
+        self.assertEqual(self.source.slice(4, 3, ("total",)), total[4:7])
+
+        por_cliente = ordenados(
+            (lambda r: r["cliente"]["nombre"], True), (lambda r: r["id"], False)
+        )
+        self.assertEqual(
+            self.source.slice(2, 5, ("-cliente.nombre", "id")), por_cliente[2:7]
+        )
+
+    def test_iterator_with_order(self):
+        self.assertEqual(
+            ids(self.source.iterator(("-total", "id"))),
+            ids(ordenados((lambda r: r["total"], True), (lambda r: r["id"], False))),
+        )
+        self.assertEqual(ids(self.source.iterator()), list(range(12)))
+
+    def test_count(self):
+        factory = mock.Mock(side_effect=lambda: iter(REGISTROS))
+        source = GeneratorSource(factory)
+        self.assertEqual(source.count(), 12)
+        self.assertEqual(source.count(), 12)
+        factory.assert_called_once()
+        self.assertEqual(GeneratorSource(factory, count=lambda: 99).count(), 99)
+
+    def test_table_page_follows_table_order(self):
+        table = VentaTable(TableSourceData(self.source), order_by="-total")
+        table.paginate(page=2, per_page=5)
+        expected = ordenados((lambda r: r["total"], True))[5:10]
+        self.assertEqual([row.record for row in table.page.object_list], expected)
+        self.assertEqual(table.paginator.count, 12)
+
+    def test_primed_page_is_not_queried_again(self):
+        data = TableSourceData(self.source)
+        table = VentaTable(data, order_by="id")
+        page = self.source.slice(10, 5, ("id",))
+        data.prime(length=12, offset=10, records=page, order_by=("id",))
+        with mock.patch.object(self.source, "slice") as slice_:
+            table.paginate(page=3, per_page=5)
+            self.assertEqual(
+                ids(row.record for row in table.page.object_list), [10, 11]
+            )
+        slice_.assert_not_called()
+
+
+class SQLSourceTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.pedidos = crear_pedidos(7)
+        for i, pedido in enumerate(cls.pedidos):
+            pedido.prioridad = i % 3
+            pedido.save()
+
+    def setUp(self):
+        self.source = SQLSource(
+            f"SELECT id, prioridad, monto FROM {Pedido._meta.db_table} WHERE id > %s",
+            [0],
+            chunk_size=2,
+        )
+
+    def esperado(self, *order_by):
+        return list(Pedido.objects.order_by(*order_by).values_list("pk", flat=True))
+
+    def test_count(self):
+        self.assertEqual(self.source.count(), 7)
+
+    def test_slice_with_order(self):
+        expected = self.esperado("-prioridad", "id")
+        self.assertEqual(
+            ids(self.source.slice(2, 3, ("-prioridad", "id"))), expected[2:5]
+        )
+        self.assertEqual(
+            ids(self.source.slice(5, 10, ("-prioridad", "id"))), expected[5:]
+        )
+
+    def test_iterator_reads_in_chunks(self):
+        self.assertEqual(
+            ids(self.source.iterator(("prioridad", "-id"))),
+            self.esperado("prioridad", "-id"),
+        )
+
+    def test_unknown_order_column_is_ignored(self):
+        with self.assertLogs("django_scotty.sources", "WARNING"):
+            records = self.source.slice(0, 7, ("cliente.nombre; DROP", "-id"))
+        self.assertEqual(ids(records), self.esperado("-id"))
+
+
+class CSVSourceTests(SimpleTestCase):
+    def test_count_follows_file_changes(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as csv_file:
+            csv_file.write("id,total\n1,5\n2,3\n")
+        self.addCleanup(os.remove, csv_file.name)
+        source = CSVSource(csv_file.name)
+        self.assertEqual(source.count(), 2)
+        self.assertEqual(
+            source.slice(0, 2, ("total",)),
+            [
+                {"id": "2", "total": "3"},
+                {"id": "1", "total": "5"},
+            ],
+        )
+
+        with open(csv_file.name, "a") as csv_file_:
+            csv_file_.write("3,4\n")
+        mtime = os.stat(csv_file.name).st_mtime + 10
+        os.utime(csv_file.name, (mtime, mtime))
+        self.assertEqual(source.count(), 3)
@@ -0,0 +1,33 @@
+from django.db import models
+
+
+class Zona(models.Model):
+    nombre = models.CharField(max_length=50)
+
+    def __str__(self):
+        return self.nombre
+
+
+class Cliente(models.Model):
+    nombre = models.CharField(max_length=100)
+    zona = models.ForeignKey(Zona, on_delete=models.CASCADE)
+
+    def __str__(self):
+        return self.nombre
+
+
+class Pedido(models.Model):
+    NUEVO = "n"
+    ARCHIVADO = "a"
+    ESTADOS = [(NUEVO, "Nuevo"), (ARCHIVADO, "Archivado")]
+
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE)
+    estado = models.CharField(max_length=1, choices=ESTADOS, default=NUEVO)
+    monto = models.DecimalField(max_digits=12, decimal_places=2)
+    # Nullable para probar el orden con nulos en la paginación por cursor
+    prioridad = models.IntegerField(null=True)
+    nota = models.CharField(max_length=50, blank=True)
+    creado = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ["id"]
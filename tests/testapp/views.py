@@ -0,0 +1,89 @@
+import django_filters
+import django_tables2 as tables
+
+from django_scotty.async_views import AsyncCottonTableView, AsyncDictTableView
+from django_scotty.helpers import ActionTable, CottonTableView
+from django_scotty.sources import GeneratorSource
+
+from .models import Pedido
+
+
+class PedidoTable(ActionTable):
+    cliente = tables.Column(accessor="cliente.nombre", order_by="cliente__nombre")
+    zona = tables.Column(accessor="cliente.zona.nombre", order_by="cliente__zona__nombre")
+
+    class Meta:
+        model = Pedido
+        fields = ["id", "cliente", "zona", "estado", "monto", "prioridad"]
+
+
+class PedidoFilter(django_filters.FilterSet):
+    class Meta:
+        model = Pedido
+        fields = ["estado"]
+
+
+class PedidoView(CottonTableView):
+    model = Pedido
+    table_class = PedidoTable
+    filterset_class = PedidoFilter
+    paginate_by = 10
+    available_action_names = ["archivar"]
+
+    def archivar(self, obj):
+        obj.estado = Pedido.ARCHIVADO
+        obj.save(update_fields=["estado"])
+
+    archivar.condition = lambda obj, request: obj.estado != Pedido.ARCHIVADO
+
+
+class AccionesPedidoView(PedidoView):
+    available_action_names = ["archivar", "reabrir"]
+
+    def reabrir(self, obj):
+        obj.estado = Pedido.NUEVO
+        obj.save(update_fields=["estado"])
+
+    reabrir.show_confirm = True
+    reabrir.condition = lambda obj, request: obj.estado == Pedido.ARCHIVADO
+    reabrir.condition_many = lambda records, request: [
+        record.pk for record in records if record.estado == Pedido.ARCHIVADO
+    ]
+
+
+class StreamingPedidoView(PedidoView):
+    streaming_export = True
+
+
+class TotalesPedidoView(PedidoView):
+    column_aggregates = {"monto": "sum"}
+
+
+class AsyncPedidoView(AsyncCottonTableView):
+    model = Pedido
+    table_class = PedidoTable
+    filterset_class = PedidoFilter
+    paginate_by = 10
+    streaming_export = True
+    available_action_names = ["archivar"]
+
+    async def archivar(self, obj):
+        obj.estado = Pedido.ARCHIVADO
+        await obj.asave(update_fields=["estado"])
+
+    archivar.condition = lambda obj, request: obj.estado != Pedido.ARCHIVADO
+
+
+VENTAS = [{"id": i, "total": (i * 7) % 25} for i in range(25)]
+
+
+class VentaTable(tables.Table):
+    id = tables.Column()
+    total = tables.Column()
+
+
+class AsyncVentasView(AsyncDictTableView):
+    table_class = VentaTable
+    table_pagination = {"per_page": 10}
+    streaming_export = True
+    data_source = GeneratorSource(lambda: VENTAS, count=len(VENTAS))
@@ -0,0 +1,5 @@
+from django_scotty.helpers import add_urls
+
+from .testapp import views
+
+urlpatterns = add_urls([views])
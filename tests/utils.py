@@ -0,0 +1,12 @@
+from decimal import Decimal
+
+from .testapp.models import Cliente, Pedido, Zona
+
+
+def crear_pedidos(cantidad, **kwargs):
+    """Crear `cantidad` pedidos de un mismo cliente, con montos 0, 1, 2..."""
+    zona = Zona.objects.create(nombre="Norte")
+    cliente = Cliente.objects.create(nombre="Ana", zona=zona)
+    return Pedido.objects.bulk_create(
+        Pedido(cliente=cliente, monto=Decimal(i), **kwargs) for i in range(cantidad)
+    )